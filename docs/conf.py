@@ -249,3 +249,6 @@ intersphinx_mapping = {'python': ('http://docs.python.org/3', None)}
 autodoc_default_flags = ['members', 'undoc-members', 'special-members']
 
 autoclass_content = 'class'
+
+# Optional dependencies that need not be installed to build the documentation
+autodoc_mock_imports = ['numpy']
@@ -0,0 +1,83 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the admission module
+
+"""
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+import nxpy.ccase.admission
+import nxpy.ccase.test.fake
+import nxpy.test.test
+
+
+class AdmissionTest(nxpy.test.test.TestCase):
+
+    def test_vob_of_selector_pass(self):
+        a = nxpy.ccase.admission.Admission()
+        self.assertEqual(a.vobOf(r"describe activity:act@\pvob"), r"\pvob")
+        self.assertEqual(a.vobOf(r"lsstream -in project:p@/vobs/pvob -fmt x"), "/vobs/pvob")
+
+    def test_vob_of_path_pass(self):
+        a = nxpy.ccase.admission.Admission(vobs=( r"\src", "/vobs/lib" ))
+        self.assertEqual(a.vobOf(r"checkout -nq M:\view\src\dir\a.c"), r"\src")
+        self.assertEqual(a.vobOf("ls \"/view/v/vobs/lib/b c.h@@/main/3\""), "/vobs/lib")
+        self.assertEqual(a.vobOf(r"describe M:\view\src\a.c@@\main\2"), r"\src")
+
+    def test_vob_of_unknown_pass(self):
+        a = nxpy.ccase.admission.Admission(vobs=( r"\src", ))
+        self.assertTrue(a.vobOf("ls other/dir") is None)
+        self.assertTrue(a.vobOf("lsvob") is None)
+
+    def test_busy_fail(self):
+        a = nxpy.ccase.admission.Admission(max_in_flight=1)
+        with a.admit(r"describe x@\pvob"):
+            self.assertEqual(a.inFlight(r"\pvob"), 1)
+            self.assertRaises(nxpy.ccase.admission.Busy, a.acquire, r"\pvob")
+            a.acquire(r"\other")
+            a.release(r"\other")
+        self.assertEqual(a.inFlight(r"\pvob"), 0)
+
+    def test_bounded_wait_pass(self):
+        a = nxpy.ccase.admission.Admission(max_in_flight=1, timeout=2)
+        a.acquire(r"\pvob")
+        t = threading.Timer(0.1, a.release, ( r"\pvob", ))
+        t.start()
+        a.acquire(r"\pvob")
+        a.release(r"\pvob")
+        t.join()
+
+    def test_rate_pass(self):
+        a = nxpy.ccase.admission.Admission(rate=20, timeout=None)
+        start = time.time()
+        for i in range(5):
+            a.acquire(None)
+            a.release(None)
+        self.assertTrue(time.time() - start >= 0.15)
+
+    def test_rate_fail(self):
+        a = nxpy.ccase.admission.Admission(rate=1, limits={ r"\fast": ( 0, 0, 1 ) })
+        a.acquire(r"\pvob")
+        self.assertRaises(nxpy.ccase.admission.Busy, a.acquire, r"\pvob")
+        for i in range(3):
+            a.acquire(r"\fast")
+
+    def test_cleartool_pass(self):
+        a = nxpy.ccase.admission.Admission(max_in_flight=1)
+        with nxpy.ccase.test.fake.FakeEnv() as env:
+            tool = env.tool(admission=a)
+            self.assertTrue(tool.describe(r"activity:a@\pvob"))
+            with a.admit(r"lsvob x@\pvob"):
+                self.assertRaises(nxpy.ccase.admission.Busy, tool.describe, r"activity:a@\pvob")
+            self.assertTrue(tool.describe(r"activity:a@\pvob"))
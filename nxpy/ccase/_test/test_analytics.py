@@ -0,0 +1,87 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the analytics module
+
+"""
+
+from __future__ import absolute_import
+
+import nxpy.ccase.history
+import nxpy.test.test
+
+try:
+    import numpy
+    import nxpy.ccase.analytics
+except ImportError:
+    numpy = None
+
+
+_day = 86400
+
+
+def _store():
+    store = nxpy.ccase.history.HistoryStore()
+    t0 = 100 * _day
+    for i in range(60):
+        user = ( "ann", "bob", "cid" )[i % 3]
+        element = "/v/%s/f%d.c" % ( ( "src", "doc" )[i % 2], i % 5 )
+        store.append(t0 + i * 3600 * 4, user, "checkin", element, "/main/%d" % i)
+    store.append(t0, "ann", "mkelem", "/v/src/new.c", "")
+    return store
+
+
+class AnalyticsTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        if numpy is None:
+            self.skipTest("numpy not available")
+        self.a = nxpy.ccase.analytics.HistoryArrays.fromStore(_store())
+
+    def test_columns(self):
+        self.assertEqual(61, len(self.a))
+        self.assertEqual(numpy.float64, self.a.columns["time"].dtype)
+        self.assertEqual([ "/v/src", "/v/doc" ], self.a.values("directory"))
+        self.assertEqual("/v/doc", self.a.values("directory")[self.a.columns["directory"][1]])
+
+    def test_inputs_unchanged(self):
+        columns = dict(self.a.columns)
+        del columns["directory"]
+        tables = dict(self.a.tables)
+        del tables["directory"]
+        nxpy.ccase.analytics.HistoryArrays(columns, tables)
+        self.assertFalse("directory" in columns)
+        self.assertFalse("directory" in tables)
+
+    def test_group_by(self):
+        self.assertEqual({ "ann": 21, "bob": 20, "cid": 20 }, self.a.groupBy("user"))
+        mask = self.a.select(operation="checkin")
+        self.assertEqual({ "ann": 20, "bob": 20, "cid": 20 }, self.a.groupBy("user", mask))
+        self.assertEqual({ "ann": 11, "bob": 10, "cid": 10 }, self.a.distinct("user", "element"))
+        self.assertEqual(0, self.a.select(user="nobody").sum())
+        self.assertRaises(ValueError, self.a.select, colour="red")
+
+    def test_top(self):
+        self.assertEqual([ ( "/v/src", 31 ), ( "/v/doc", 30 ) ], self.a.hotspots())
+        churn = self.a.churn(3)
+        self.assertEqual(3, len(churn))
+        self.assertTrue(all(c == 6 for e, c in churn))
+        self.assertEqual([ ( "ann", 21 ) ], self.a.top("user", 1))
+        self.assertEqual([], self.a.top("user", 5, self.a.select(user="nobody")))
+
+    def test_histogram(self):
+        starts, counts = self.a.histogram()
+        self.assertEqual(100 * _day, starts[0])
+        self.assertEqual([ 7, 6, 6, 6, 6, 6, 6, 6, 6, 6 ], list(counts))
+        starts, counts = self.a.histogram(nxpy.ccase.analytics.WEEK, name="user")
+        self.assertEqual(( 3, len(starts) ), counts.shape)
+        self.assertEqual(61, counts.sum())
+        starts, counts = self.a.histogram(mask=self.a.select(user="nobody"))
+        self.assertEqual(0, len(starts))
@@ -0,0 +1,94 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the baselines module
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+
+import nxpy.ccase.baselines
+import nxpy.ccase.test.fake
+import nxpy.test.test
+
+
+_baselines = "".join("baseline:%s@/vobs/pvob\tcomponent:%s@/vobs/pvob\t" % ( n, c ) +
+        "stream:int@/vobs/pvob\t%s\n" % " ".join("baseline:%s@/vobs/pvob" % d for d in deps)
+        for n, c, deps in (
+            ( "sys_1", "sys", ( "app_1", "lib_1" ) ),
+            ( "app_1", "app", ( "core_1", ) ),
+            ( "core_1", "core", () ),
+            ( "lib_1", "lib", () ),
+            ( "lib_2", "lib", () ) ))
+
+_streams = ( "stream:int@/vobs/pvob\t\n" +
+             "stream:dev@/vobs/pvob\tbaseline:sys_1@/vobs/pvob\n" +
+             "stream:fix@/vobs/pvob\tbaseline:lib_2@/vobs/pvob baseline:app_1@/vobs/pvob\n" )
+
+_rules = [
+    { "match": r"^lsbl -invob /vobs/pvob", "out": _baselines },
+    { "match": r"^lsstream -invob /vobs/pvob", "out": _streams },
+]
+
+
+def _bl(name):
+    return "baseline:%s@/vobs/pvob" % name
+
+
+def _st(name):
+    return "stream:%s@/vobs/pvob" % name
+
+
+class BaselineCatalogTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv(_rules)
+        tool = self.env.tool()
+        self.catalog = nxpy.ccase.baselines.BaselineCatalog.load(tool, [ "/vobs/pvob" ])
+        tool.close()
+
+    def tearDown(self):
+        self.env.close()
+
+    def test_load(self):
+        self.assertEqual(5, len(self.catalog))
+        self.assertEqual("component:sys@/vobs/pvob", self.catalog[_bl("sys_1")].component)
+        self.assertEqual(( _bl("app_1"), _bl("lib_1") ), self.catalog.dependencies(_bl("sys_1")))
+        self.assertEqual(( _bl("sys_1"), ), self.catalog.foundation(_st("dev")))
+        self.assertEqual((), self.catalog.foundation(_st("int")))
+        self.assertEqual(1, len([ c for c in self.env.commands() if c.startswith("lsbl") ]))
+
+    def test_queries(self):
+        c = self.catalog
+        self.assertEqual(frozenset(( _bl("app_1"), _bl("lib_1"), _bl("core_1") )),
+                c.members(_bl("sys_1")))
+        self.assertTrue(c.includes(_bl("sys_1"), _bl("core_1")))
+        self.assertFalse(c.includes(_bl("sys_1"), _bl("lib_2")))
+        self.assertEqual(frozenset(( _bl("app_1"), _bl("sys_1") )), c.composites(_bl("core_1")))
+        self.assertEqual("baseline:lib_1@/vobs/pvob",
+                c.components(_bl("sys_1"))["component:lib@/vobs/pvob"])
+        self.assertEqual([ _st("dev"), _st("fix") ], c.builtOn(_bl("core_1")))
+        self.assertEqual([ _st("fix") ], c.builtOn(_bl("lib_2")))
+        self.assertEqual([], c.builtOn(_bl("unknown")))
+
+    def test_save(self):
+        d = tempfile.mkdtemp(prefix="nxpy_ccase_baselines_")
+        try:
+            path = os.path.join(d, "baselines.json.gz")
+            self.catalog.save(path)
+            loaded = nxpy.ccase.baselines.BaselineCatalog.fromFile(path)
+            self.assertEqual(list(self.catalog), list(loaded))
+            self.assertEqual(self.catalog.foundation(_st("fix")), loaded.foundation(_st("fix")))
+        finally:
+            shutil.rmtree(d)
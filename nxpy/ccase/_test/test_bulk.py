@@ -0,0 +1,109 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the bulk and pool modules
+
+"""
+
+from __future__ import absolute_import
+
+import os
+
+import nxpy.ccase.bulk
+import nxpy.ccase.pool
+import nxpy.ccase.test.fake
+import nxpy.command.option
+import nxpy.core.temp_file
+import nxpy.test.test
+
+
+class BulkJobTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv([ { "match": r"^checkin.* bad",
+                "err": "cleartool: Error: Unable to check in.\n", "status": 1 } ])
+        self.pool = nxpy.ccase.pool.SessionPool(2, self.env.tool)
+        self.dir = nxpy.core.temp_file.TempDir()
+        self.journal = os.path.join(self.dir.name, "journal.txt")
+        self.items = [ "elem%d" % i for i in range(10) ] + [ "bad" ]
+
+    def tearDown(self):
+        self.pool.close()
+        self.env.close()
+        self.dir.__exit__(None, None, None)
+
+    def test_run_pass(self):
+        reports = []
+        job = nxpy.ccase.bulk.BulkJob(self.pool, "checkin", self.items, self.journal,
+                batch_size=3, progress=reports.append)
+        result = job.run()
+        self.assertEqual(sorted(result.done), sorted(self.items[:-1]))
+        self.assertEqual(list(result.failed.keys()), [ "bad" ])
+        self.assertEqual(len(reports), 4)
+        self.assertEqual(reports[-1].done, 10)
+        self.assertEqual(reports[-1].total, 11)
+        self.assertTrue(len(self.pool.sessions) <= 2)
+        self.assertEqual(job.pending(), [ "bad" ])
+
+    def test_resume_pass(self):
+        with open(self.journal, "w") as f:
+            f.write("elem0\nelem1\nelem2\nelem3\nelem")
+        job = nxpy.ccase.bulk.BulkJob(self.pool, "checkin", self.items, self.journal,
+                batch_size=4)
+        result = job.run()
+        self.assertEqual(result.skipped, 4)
+        self.assertEqual(len(result.done), 6)
+        self.assertFalse([ c for c in self.env.commands() if "elem1 " in c + " " ])
+        self.assertEqual(job.pending(), [ "bad" ])
+
+    def test_abort_fail(self):
+        items = [ "bad%d" % i for i in range(10) ]
+        job = nxpy.ccase.bulk.BulkJob(nxpy.ccase.pool.SessionPool(1, self.env.tool), "checkin",
+                items, self.journal, batch_size=2, max_failures=3)
+        result = job.run()
+        job.pool.close()
+        self.assertTrue(result.aborted)
+        self.assertEqual(len(result.failed), 4)
+
+    def test_blame_pass(self):
+        self.env.setRules([
+                { "match": r"^checkin .*elem\d+ .*bad",
+                  "err": "cleartool: Error: Unable to check in \"bad\".\n", "status": 1 },
+                { "match": r"^checkin -nc elem\d+$",
+                  "err": "cleartool: Error: Element is not checked out.\n", "status": 1 } ])
+        pool = nxpy.ccase.pool.SessionPool(1, self.env.tool)
+        job = nxpy.ccase.bulk.BulkJob(pool, "checkin", self.items, self.journal, batch_size=11)
+        result = job.run()
+        self.assertEqual(result.done, self.items[:-1])
+        self.assertEqual(list(result.failed.keys()), [ "bad" ])
+        self.assertEqual(1, len([ c for c in self.env.commands() if c.startswith("checkin") ]))
+        job = nxpy.ccase.bulk.BulkJob(pool, "checkin", [ "elem1", "elem2" ],
+                os.path.join(self.dir.name, "other.txt"), batch_size=1)
+        self.assertEqual(job.run().done, [ "elem1", "elem2" ])
+        pool.close()
+
+    def test_already_done_pass(self):
+        self.env.setRules([
+                { "match": r"^checkin .*bad",
+                  "err": "cleartool: Error: Unable to check in.\n", "status": 1 },
+                { "match": r"^checkin -nc elem\d+$",
+                  "err": "cleartool: Error: Element is not checked out.\n", "status": 1 } ])
+        pool = nxpy.ccase.pool.SessionPool(1, self.env.tool)
+        result = nxpy.ccase.bulk.BulkJob(pool, "checkin", self.items, self.journal,
+                batch_size=11).run()
+        pool.close()
+        self.assertEqual(result.done, self.items[:-1])
+        self.assertEqual(list(result.failed.keys()), [ "bad" ])
+
+    def test_error_fail(self):
+        job = nxpy.ccase.bulk.BulkJob(self.pool, "checkin", self.items, self.journal,
+                batch_size=3, options={ "bogus": True })
+        self.assertRaises(nxpy.command.option.InvalidOptionError, job.run)
+        self.assertEqual(job.pending(), self.items)
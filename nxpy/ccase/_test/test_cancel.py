@@ -0,0 +1,109 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for ClearTool deadlines and cancellation
+
+"""
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+import nxpy.ccase.admission
+import nxpy.ccase.cleartool
+import nxpy.ccase.test.fake
+import nxpy.core.temp_file
+import nxpy.test.test
+
+
+class CancelTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv([ { "match": "^update", "delay": 30 },
+                { "match": "^checkin", "delay": 1, "out": "Loading \"x\"\n" } ])
+
+    def tearDown(self):
+        self.env.close()
+
+    def test_deadline_fail(self):
+        tool = self.env.tool()
+        start = time.time()
+        with tool.limit(0.3):
+            self.assertRaises(nxpy.ccase.cleartool.DeadlineExceeded, tool.update)
+        self.assertTrue(time.time() - start < 5)
+        self.assertEqual(tool.lsvob(), "lsvob\n")
+
+    def test_cancel_fail(self):
+        tool = self.env.tool()
+        token = nxpy.ccase.cleartool.CancelToken()
+        t = threading.Timer(0.2, token.cancel)
+        t.start()
+        with tool.limit(token=token):
+            self.assertRaises(nxpy.ccase.cleartool.Cancelled, tool.update)
+            self.assertRaises(nxpy.ccase.cleartool.Cancelled, tool.lsvob)
+        t.join()
+        self.assertEqual(tool.lsvob(), "lsvob\n")
+
+    def test_nested_limit_pass(self):
+        tool = self.env.tool()
+        with tool.limit(60):
+            outer = tool._deadline
+            with tool.limit(120):
+                self.assertEqual(tool._deadline, outer)
+            with tool.limit(1):
+                self.assertTrue(tool._deadline < outer)
+            self.assertEqual(tool._deadline, outer)
+        self.assertTrue(tool._deadline is None)
+
+    def test_restart_fail(self):
+        tool = nxpy.ccase.cleartool.ClearTool(cmd=self.env.interpreter())
+        self.assertRaises(nxpy.ccase.cleartool.ClearToolError, tool.restart)
+
+    def test_no_factory_fail(self):
+        tool = nxpy.ccase.cleartool.ClearTool(cmd=self.env.interpreter())
+        with tool.limit(0.2):
+            self.assertRaises(nxpy.ccase.cleartool.DeadlineExceeded, tool.checkin, "x")
+        self.assertRaises(nxpy.ccase.cleartool.SessionBusy, tool.lsvob)
+        time.sleep(1.5)
+        self.assertEqual(tool.lsvob(), "lsvob\n")
+        self.assertEqual(tool.describe("x"), "describe x\n")
+
+    def test_admission_deadline_fail(self):
+        a = nxpy.ccase.admission.Admission(max_in_flight=1, timeout=None)
+        tool = self.env.tool(admission=a)
+        a.acquire(None)
+        start = time.time()
+        with tool.limit(0.3):
+            self.assertRaises(nxpy.ccase.cleartool.DeadlineExceeded, tool.lsvob)
+        token = nxpy.ccase.cleartool.CancelToken()
+        t = threading.Timer(0.2, token.cancel)
+        t.start()
+        with tool.limit(token=token):
+            self.assertRaises(nxpy.ccase.cleartool.Cancelled, tool.lsvob)
+        t.join()
+        self.assertTrue(time.time() - start < 5)
+        a.release(None)
+        self.assertEqual(tool.lsvob(), "lsvob\n")
+
+    def test_admission_replay_fail(self):
+        with nxpy.core.temp_file.TempDir() as vob:
+            for timeout in ( 0, None ):
+                a = nxpy.ccase.admission.Admission(max_in_flight=1, timeout=timeout,
+                        vobs=[ vob.name ])
+                tool = self.env.tool(admission=a)
+                tool.cd(vob.name)
+                start = time.time()
+                with tool.limit(0.3):
+                    self.assertRaises(nxpy.ccase.cleartool.DeadlineExceeded, tool.update)
+                self.assertTrue(time.time() - start < 5)
+                self.assertEqual(tool.state.cwd, vob.name)
+                self.assertEqual(tool._run("pwd")[0].strip(), vob.name)
+                tool.close()
@@ -0,0 +1,90 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the changeset module
+
+"""
+
+from __future__ import absolute_import
+
+import os
+
+import nxpy.ccase.changeset
+import nxpy.ccase.test.fake
+import nxpy.core.temp_file
+import nxpy.test.test
+
+
+_rules = [
+    { "match": r"^lsactivity", "out": "activity:a1@/pvob\nactivity:a2@/pvob\n" },
+    { "match": r"Cp\" activity:a1", "out": "/v/src/a.c@@/main/1, /v/src/b.c@@/main/4" },
+    { "match": r"Cp\" activity:a2", "out": "/v/src/a.c@@/main/2" },
+    { "match": r"%On.*a\.c@@/main/1",
+      "out": "oid:a\t20190101.100000\t/v/src/a.c@@\n" +
+             "oid:a1\t20190102.100000\t/v/src/a.c@@/main/1\n" +
+             "oid:b\t20190101.100000\t/v/src/b.c@@\n" +
+             "oid:b4\t20190103.100000\t/v/src/b.c@@/main/4\n" },
+    { "match": r"%On.*a\.c@@/main/2",
+      "out": "oid:a\t20190101.100000\t/v/src/a.c@@\n" +
+             "oid:a2\t20190105.100000\t/v/src/a.c@@/main/2\n" },
+]
+
+
+class ParseTimeTest(nxpy.test.test.TestCase):
+
+    def test_date_fields_pass(self):
+        self.assertEqual(nxpy.ccase.changeset.date_fields("20190312.154512"),
+                ( 2019, 3, 12, 15, 45, 12 ))
+
+    def test_date_fields_fail(self):
+        with self.assertRaises(ValueError):
+            nxpy.ccase.changeset.date_fields("2019-03-12")
+
+
+class ChangeSetIndexTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv(_rules)
+        self.tool = self.env.tool()
+
+    def tearDown(self):
+        self.env.close()
+
+    def test_update_pass(self):
+        index = nxpy.ccase.changeset.ChangeSetIndex()
+        self.assertEqual(index.update(self.tool, "stream:s@/pvob"),
+                [ "activity:a1@/pvob", "activity:a2@/pvob" ])
+        last = index.last("/v/src/a.c")
+        self.assertEqual(last.activity, "activity:a2@/pvob")
+        self.assertEqual(last.version, "/main/2")
+        self.assertEqual([ e.version for e in index.history("oid:a") ], [ "/main/1", "/main/2" ])
+        self.assertEqual(index.elements("activity:a1@/pvob"), [ "/v/src/a.c", "/v/src/b.c" ])
+        self.assertTrue(index.last("/v/src/c.c") is None)
+
+    def test_incremental_pass(self):
+        index = nxpy.ccase.changeset.ChangeSetIndex()
+        index.update(self.tool, "stream:s@/pvob")
+        count = len(self.env.commands())
+        self.assertEqual(index.update(self.tool, "stream:s@/pvob"), [])
+        self.assertEqual(len(self.env.commands()), count + 1)
+        self.assertEqual(index.update(self.tool, "stream:s@/pvob", rescan=( "activity:a2@/pvob", )),
+                [ "activity:a2@/pvob" ])
+        self.assertEqual(len(index.history("/v/src/a.c")), 2)
+
+    def test_save_load_pass(self):
+        index = nxpy.ccase.changeset.ChangeSetIndex()
+        index.update(self.tool, "stream:s@/pvob")
+        with nxpy.core.temp_file.TempDir() as d:
+            path = os.path.join(d.name, "index.json.gz")
+            index.save(path)
+            loaded = nxpy.ccase.changeset.ChangeSetIndex(path)
+            self.assertEqual(loaded.activities, index.activities)
+            self.assertEqual(loaded.history("oid:b"), index.history("oid:b"))
+            self.assertTrue("activity:a1@/pvob" in loaded)
@@ -0,0 +1,91 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the checkouts module
+
+"""
+
+from __future__ import absolute_import
+
+import nxpy.ccase.checkouts
+import nxpy.ccase.test.fake
+import nxpy.command.option
+import nxpy.test.test
+
+
+def _line(path, user, view, activity, reserved="reserved"):
+    return "\t".join(( path, "/main/dev/CHECKEDOUT", user, view, activity, reserved,
+            "20190312.154512" )) + "\n"
+
+
+_all = ( _line("/v/src/a.c", "ann", "ann_dev", "activity:fix1@/pvob") +
+         _line("/v/src/b.c", "bob", "bob_dev", "activity:fix2@/pvob", "unreserved") +
+         _line("/v/src", "ann", "ann_dev", "activity:fix1@/pvob") +
+         _line("/v/doc/readme", "bob", "bob_dev", "") )
+
+_src = ( _line("/v/src/a.c", "ann", "ann_dev", "activity:fix1@/pvob") +
+         _line("/v/src/c.c", "ann", "ann_dev", "activity:fix3@/pvob") )
+
+_rules = [
+    { "match": r"^lscheckout -avobs", "out": _all },
+    { "match": r"^lscheckout -recurse .*\"/v/src\"", "out": _src },
+]
+
+
+class CheckoutsTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv(_rules)
+        self.tool = self.env.tool()
+
+    def tearDown(self):
+        self.tool.close()
+        self.env.close()
+
+    def test_parse(self):
+        records = nxpy.ccase.checkouts.parse_checkouts(_all + "garbage\n")
+        self.assertEqual(4, len(records))
+        self.assertTrue(records[0].reserved)
+        self.assertFalse(records[1].reserved)
+        self.assertEqual("bob_dev", records[1].view)
+
+    def test_load(self):
+        index = nxpy.ccase.checkouts.CheckoutIndex()
+        index.load(self.tool)
+        self.assertEqual(4, len(index))
+        self.assertEqual([ "/v/src", "/v/src/a.c" ], [ c.path for c in index.byUser("ann") ])
+        self.assertEqual([ "/v/doc/readme", "/v/src/b.c" ],
+                [ c.path for c in index.byView("bob_dev") ])
+        self.assertEqual([ "activity:fix1@/pvob", "activity:fix2@/pvob" ], index.activities)
+        self.assertEqual([ "/v/src/a.c", "/v/src/b.c" ],
+                [ c.path for c in index.inDirectory("/v/src") ])
+        self.assertEqual([ "/v/src", "/v/src/a.c", "/v/src/b.c" ],
+                [ c.path for c in index.below("/v/src") ])
+        self.assertTrue("/v/doc/readme" in index)
+        self.assertFalse("/v/doc" in index)
+        self.assertEqual([ "lscheckout -avobs -fmt \"%s\"" %
+                nxpy.ccase.checkouts._fmt ], self.env.commands()[-1:])
+
+    def test_refresh(self):
+        index = nxpy.ccase.checkouts.CheckoutIndex()
+        index.load(self.tool)
+        found = index.refresh(self.tool, [ "/v/src" ])
+        self.assertEqual(2, len(found))
+        self.assertEqual([ "/v/src/a.c", "/v/src/c.c" ], [ c.path for c in index.below("/v/src") ])
+        self.assertEqual([ "/v/doc/readme" ], [ c.path for c in index.byUser("bob") ])
+        self.assertEqual([ "/v/src/c.c" ],
+                [ c.path for c in index.byActivity("activity:fix3@/pvob") ])
+        self.assertEqual([], index.byActivity("activity:fix2@/pvob"))
+
+    def test_options(self):
+        self.assertRaises(nxpy.command.option.InvalidOptionError, self.tool.lscheckout, "x",
+                avobs=True)
+        self.assertRaises(nxpy.command.option.InvalidOptionError, self.tool.lscheckout,
+                me=True, user="ann")
@@ -0,0 +1,71 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the deliver module
+
+"""
+
+from __future__ import absolute_import
+
+import nxpy.ccase.deliver
+import nxpy.ccase.pool
+import nxpy.ccase.test.fake
+import nxpy.test.test
+
+
+_preview = """Changes to be DELIVERED:
+    FROM: stream "dev1"
+    TO: stream "int"
+Using target view: "int_view".
+Activities included in this operation:
+        activity:fix1@/pvob  user  "Fix one"
+        /v/dev1/vob/src/a.c@@/main/dev1/3
+        /v/dev1/vob/src/b.c@@/main/dev1/1
+        activity:fix2@/pvob  user  "Fix two"
+        /v/dev1/vob/src/a.c@@/main/dev1/4
+"""
+
+_rules = [
+    { "match": r"^describe.*istream", "out": "stream:int@/pvob" },
+    { "match": r"^lsstream", "out": "stream:int@/pvob\nstream:dev1@/pvob\nstream:dev2@/pvob\n" },
+    { "match": r"^deliver.*dev1", "out": _preview, "delay": 0.2 },
+    { "match": r"^deliver.*dev2", "out": "No activities to deliver.\n",
+      "err": "cleartool: Error: Element \"/v/dev2/vob/src/c.c\" is checked out.\n", "delay": 0.2 },
+]
+
+
+class DeliverTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv(_rules)
+        self.pool = nxpy.ccase.pool.SessionPool(2, self.env.tool)
+
+    def tearDown(self):
+        self.pool.close()
+        self.env.close()
+
+    def test_preview_project_pass(self):
+        reports = nxpy.ccase.deliver.preview_project(self.pool, "project:p@/pvob")
+        self.assertEqual([ r.stream for r in reports ],
+                [ "stream:dev1@/pvob", "stream:dev2@/pvob" ])
+        dev1, dev2 = reports
+        self.assertEqual(dev1.source, "dev1")
+        self.assertEqual(dev1.target, "int")
+        self.assertEqual(list(dev1.activities.keys()), [ "activity:fix1@/pvob",
+                "activity:fix2@/pvob" ])
+        self.assertEqual(dev1.activities["activity:fix2@/pvob"],
+                [ "/v/dev1/vob/src/a.c@@/main/dev1/4" ])
+        self.assertEqual(dev1.conflicts, [ "/v/dev1/vob/src/a.c" ])
+        self.assertFalse(dev2.pending)
+        self.assertEqual(dev2.conflicts, [ "/v/dev2/vob/src/c.c" ])
+        self.assertEqual(len(dev2.errors), 1)
+        self.assertTrue(any(c.startswith("deliver -long -preview -stream stream:dev1@/pvob")
+                for c in self.env.commands()))
+        self.assertTrue(sum(r.elapsed for r in reports) >= 0.4)
@@ -0,0 +1,99 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the export module
+
+"""
+
+from __future__ import absolute_import
+
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import nxpy.ccase.export
+import nxpy.ccase.test.fake
+import nxpy.test.test
+
+
+def _events(vob, days):
+    return "".join("201903%02d.120000\tann\tcheckin\t/%s/f%d.c\t/main/%d\n" % ( d, vob, d, d )
+            for d in days)
+
+
+_rules = [
+    { "match": r"^lsvob -short", "out": "/va\n/vb\n" },
+    { "match": r"^lshistory -all -fmt .* -since 05-Mar-2019.12:00:00 /va$",
+      "out": _events("va", ( 6, 5 )) },
+    { "match": r"^lshistory -all -fmt .* /va$", "out": _events("va", ( 5, 4, 3, 2, 1 )) },
+    { "match": r"^lshistory -all -fmt .* /vb$", "out": "" },
+    { "match": r"^lsactivity -fmt .* -invob /pvob$",
+      "out": "20190301.100000\tbob\tactivity:a1@/pvob\tstream:s@/pvob\tFix, \"quoted\"\n" },
+]
+
+
+class ExportTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv(_rules)
+        self.dir = tempfile.mkdtemp(prefix="nxpy_ccase_export_")
+
+    def tearDown(self):
+        self.env.close()
+        shutil.rmtree(self.dir)
+
+    def _main(self, *args):
+        stderr = sys.stderr
+        sys.stderr = io.StringIO() if sys.version_info[0] > 2 else io.BytesIO()
+        try:
+            return nxpy.ccase.export.main(list(args) + [ "--sessions", "2" ], self.env.tool)
+        finally:
+            sys.stderr = stderr
+
+    def test_since(self):
+        self.assertEqual("12-Mar-2019.15:45:12", nxpy.ccase.export.since("20190312.154512"))
+        self.assertEqual("2019-03-12T15:45:12", nxpy.ccase.export.iso_time("20190312.154512"))
+
+    def test_history_resume(self):
+        self.assertEqual(0, self._main("history", self.dir))
+        path = os.path.join(self.dir, "history-va-00001.jsonl")
+        with io.open(path, encoding="utf-8") as f:
+            records = [ json.loads(l) for l in f ]
+        self.assertEqual(5, len(records))
+        self.assertEqual({ "shard": "/va", "time": "2019-03-05T12:00:00", "user": "ann",
+                "operation": "checkin", "element": "/va/f5.c", "branch": "/main",
+                "version": "/main/5" }, records[0])
+        self.assertEqual([ "export-state.json", "history-va-00001.jsonl" ],
+                sorted(os.listdir(self.dir)))
+        self.assertEqual(0, self._main("history", self.dir))
+        with io.open(os.path.join(self.dir, "history-va-00002.jsonl"), encoding="utf-8") as f:
+            records = [ json.loads(l) for l in f ]
+        self.assertEqual([ "/va/f6.c" ], [ r["element"] for r in records ])
+        e = nxpy.ccase.export.Exporter(self.dir)
+        self.assertEqual("20190306.120000", e.cursor(nxpy.ccase.export.Shard("/va", "/va", {})))
+
+    def test_activities_csv_gz(self):
+        self._main("activities", self.dir, "--format", "csv", "--compress", "gz", "--vob",
+                "/pvob")
+        with gzip.open(os.path.join(self.dir, "activities-pvob-00001.csv.gz"), "rb") as f:
+            text = f.read().decode("utf-8")
+        rows = list(csv.reader(text.splitlines()))
+        self.assertEqual([ "shard", "time", "user", "activity", "stream", "headline" ], rows[0])
+        self.assertEqual([ "/pvob", "2019-03-01T10:00:00", "bob", "activity:a1@/pvob",
+                "stream:s@/pvob", "Fix, \"quoted\"" ], rows[1])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, nxpy.ccase.export.Exporter, self.dir, "labels")
+        self.assertRaises(ValueError, nxpy.ccase.export.Exporter, self.dir, format_="xml")
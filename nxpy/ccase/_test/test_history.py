@@ -0,0 +1,116 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the history module
+
+"""
+
+from __future__ import absolute_import
+
+import nxpy.ccase.changeset
+import nxpy.ccase.cleartool
+import nxpy.ccase.history
+import nxpy.ccase.test.fake
+import nxpy.test.test
+
+
+def _history():
+    lines = []
+    for i in range(300):
+        user = ( "ann", "bob", "cid" )[i % 3]
+        branch = ( "/main", "/main/dev" )[i % 2]
+        lines.append("201903%02d.1200%02d\t%s\tcheckin\t/v/src/f%d.c\t%s/%d" % ( 1 + i % 28,
+                i % 60, user, i % 10, branch, i ))
+    lines.append("20190301.120000\tann\tmkelem\t/v/src/new.c\t")
+    return "\n".join(lines) + "\n"
+
+
+class HistoryStoreTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv([ { "match": r"^lshistory",
+                "out": _history() } ])
+        self.tool = self.env.tool()
+        self.store = nxpy.ccase.history.HistoryStore()
+
+    def tearDown(self):
+        self.tool.close()
+        self.env.close()
+
+    def test_load(self):
+        self.assertEqual(301, self.store.load(self.tool, "/v/src", recurse=True))
+        self.assertEqual(301, len(self.store))
+        e = self.store[5]
+        self.assertEqual(( "cid", "checkin", "/v/src/f5.c", "/main/dev", 5 ), e[1:])
+        self.assertEqual(-1, self.store[300].version)
+        self.assertEqual([ "ann", "bob", "cid" ], self.store.values("user"))
+        self.assertEqual(10 + 1, len(self.store.values("element")))
+        self.assertEqual("i", self.store.column("user").typecode)
+
+    def test_feed(self):
+        self.assertTrue(self.store.feed("20190301.120000\tann\tcheckin\t/v/a.c\t/main/1\r\n"))
+        self.assertFalse(self.store.feed("garbage"))
+        self.assertFalse(self.store.feed("2019x\tann\tcheckin\t/v/a.c\t/main/1"))
+        self.assertEqual(1, len(self.store))
+
+    def test_select(self):
+        self.store.load(self.tool, "/v/src")
+        rows = self.store.select(user="ann", branch="/main/dev")
+        self.assertEqual(50, len(rows))
+        self.assertTrue(all(self.store[i].user == "ann" for i in rows))
+        rows = self.store.select(user=( "ann", "bob" ), operation="checkin")
+        self.assertEqual(200, len(rows))
+        since = nxpy.ccase.changeset.parse_time("20190310.000000")
+        until = nxpy.ccase.changeset.parse_time("20190311.000000")
+        rows = self.store.select(since=since, until=until)
+        self.assertTrue(all(self.store[i].time >= since and self.store[i].time < until
+                for i in rows))
+        self.assertEqual(11, len(rows))
+        self.assertEqual(0, len(self.store.select(user="nobody")))
+        self.assertRaises(ValueError, self.store.select, colour="red")
+
+    def test_group_by(self):
+        self.store.load(self.tool, "/v/src")
+        counts = self.store.count("user")
+        self.assertEqual({ "ann": 101, "bob": 100, "cid": 100 }, counts)
+        groups = self.store.groupBy("branch", self.store.select(user="bob"))
+        self.assertEqual([ "/main", "/main/dev" ], sorted(groups))
+        self.assertEqual(50, len(groups["/main"]))
+        self.assertEqual(101, sum(self.store.count("version").values()) - 200)
+
+
+class StreamTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        lines = _history().splitlines(True)
+        self.env = nxpy.ccase.test.fake.FakeEnv([
+                { "match": r"^lshistory .* /v/src$", "chunks": lines },
+                { "match": r"^lshistory .* /v/bad$", "err": "cleartool: Error: bad\n" } ])
+        self.tool = self.env.tool()
+
+    def tearDown(self):
+        self.tool.close()
+        self.env.close()
+
+    def test_stream_pass(self):
+        lines = []
+        with self.tool.watch(nxpy.ccase.cleartool.LineWatcher(lines.append), stream=True):
+            with self.tool.raw():
+                self.assertEqual("", self.tool.lshistory("/v/src", fmt="x"))
+        self.assertEqual(_history().splitlines(), lines)
+        store = nxpy.ccase.history.HistoryStore()
+        self.assertEqual(301, store.load(self.tool, "/v/src"))
+
+    def test_stream_fail(self):
+        with self.tool.watch(lambda chunk: None, stream=True):
+            with self.assertRaises(nxpy.ccase.cleartool.FailedCommand) as c:
+                self.tool.lshistory("/v/bad", fmt="x")
+        self.assertTrue("bad" in c.exception.stderr)
+        self.assertEqual(_history(), self.tool.lshistory("/v/src", fmt="x"))
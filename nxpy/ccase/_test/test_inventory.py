@@ -0,0 +1,104 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the inventory module
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+
+import nxpy.ccase.inventory
+import nxpy.ccase.test.fake
+import nxpy.test.test
+
+
+_vobs = ( "* /vobs/src     /net/host/vobstore/src.vbs public (ucmvob,replicated)\n" +
+          "* /vobs/pvob    /net/host/vobstore/pvob.vbs public (ucmvob)\n" +
+          "  /vobs/old     /net/host/vobstore/old.vbs private\n" )
+
+_views = ( "* ann_dev      /net/host/viewstore/ann_dev.vws\n" +
+           "  bob_dev      /net/host/viewstore/bob_dev.vws\n" )
+
+_rules = [
+    { "match": r"^lsvob$", "out": _vobs },
+    { "match": r"^lsview$", "out": _views },
+    { "match": r"^lsproject -invob /vobs/pvob",
+      "out": "project:p1@/vobs/pvob\tstream:p1_int@/vobs/pvob\n" },
+    { "match": r"^lsstream -invob /vobs/pvob",
+      "out": "stream:p1_int@/vobs/pvob\tproject:p1@/vobs/pvob\n" +
+             "stream:ann@/vobs/pvob\tproject:p1@/vobs/pvob\n" },
+]
+
+_changed = [
+    { "match": r"^lsvob$", "out": _vobs.replace("* /vobs/src", "  /vobs/src") },
+    { "match": r"^lsview$", "out": _views.splitlines()[0] + "\n" +
+      "  cid_dev      /net/host/viewstore/cid_dev.vws\n" },
+    _rules[2],
+    { "match": r"^lsstream -invob /vobs/pvob",
+      "out": "stream:p1_int@/vobs/pvob\tproject:p1@/vobs/pvob\n" +
+             "stream:ann@/vobs/pvob\tproject:p1@/vobs/pvob\n" +
+             "stream:cid@/vobs/pvob\tproject:p1@/vobs/pvob\n" },
+]
+
+
+class InventoryTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv(_rules)
+        self.dir = tempfile.mkdtemp(prefix="nxpy_ccase_inventory_")
+        self.path = os.path.join(self.dir, "inventory.json.gz")
+
+    def tearDown(self):
+        self.env.close()
+        shutil.rmtree(self.dir)
+
+    def test_parse(self):
+        vobs = nxpy.ccase.inventory.parse_vobs(_vobs)
+        self.assertEqual(( "/vobs/src", "/net/host/vobstore/src.vbs", True, True,
+                "ucmvob,replicated" ), vobs[0])
+        self.assertEqual(( "/vobs/old", "/net/host/vobstore/old.vbs", False, False, "" ),
+                vobs[2])
+        views = nxpy.ccase.inventory.parse_views(_views)
+        self.assertEqual([ ( "ann_dev", "/net/host/viewstore/ann_dev.vws", True ),
+                ( "bob_dev", "/net/host/viewstore/bob_dev.vws", False ) ], views)
+
+    def test_snapshot(self):
+        tool = self.env.tool()
+        snap = nxpy.ccase.inventory.Snapshot.take(tool, [ "/vobs/pvob" ])
+        self.assertEqual(3, len(snap[nxpy.ccase.inventory.VOBS]))
+        self.assertEqual("stream:p1_int@/vobs/pvob",
+                snap[nxpy.ccase.inventory.PROJECTS]["project:p1@/vobs/pvob"].integration)
+        snap.save(self.path)
+        loaded = nxpy.ccase.inventory.Snapshot.load(self.path)
+        self.assertEqual(snap.categories, loaded.categories)
+        self.assertEqual(0, len(nxpy.ccase.inventory.diff(snap, loaded)))
+        tool.close()
+
+    def test_poll(self):
+        tool = self.env.tool()
+        first = nxpy.ccase.inventory.Inventory(tool, [ "/vobs/pvob" ], self.path).poll()
+        self.assertEqual(3 + 2 + 1 + 2, len(first))
+        tool.close()
+        self.env.setRules(_changed)
+        tool = self.env.tool()
+        inventory = nxpy.ccase.inventory.Inventory(tool, [ "/vobs/pvob" ], self.path)
+        d = inventory.poll()
+        self.assertEqual([ "/vobs/src" ], d.unmounted)
+        self.assertEqual([ "cid_dev" ], [ v.tag for v in d.added(nxpy.ccase.inventory.VIEWS) ])
+        self.assertEqual([ "bob_dev" ], [ v.tag for v in d.removed(nxpy.ccase.inventory.VIEWS) ])
+        self.assertEqual([ "stream:cid@/vobs/pvob" ],
+                [ s.name for s in d.added(nxpy.ccase.inventory.STREAMS) ])
+        self.assertEqual(4, len(d))
+        self.assertFalse(inventory.poll())
+        tool.close()
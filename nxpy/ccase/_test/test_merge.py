@@ -0,0 +1,86 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the merge module
+
+"""
+
+from __future__ import absolute_import
+
+import nxpy.ccase.cleartool
+import nxpy.ccase.merge
+import nxpy.ccase.pool
+import nxpy.ccase.test.fake
+import nxpy.command.option
+import nxpy.test.test
+
+
+def _needs(path, n):
+    return "Needs Merge \"%s\" [to /main/dev/%d from /main/int/%d base /main/%d]\n" % ( path, n,
+            n + 1, n - 1 )
+
+
+_listing = ( "directory version      /r/a@@/main/1     Rule: /main/LATEST\n" +
+             "directory version      /r/b@@/main/1     Rule: /main/LATEST\n" +
+             "version                /r/top.c@@/main/2     Rule: /main/LATEST\n" +
+             "view private object    /r/junk.o\n" +
+             "view private directory  /r/build\n" )
+
+_rules = [
+    { "match": r"^ls -long /r$", "out": _listing },
+    { "match": r"^findmerge -directory -ftag int -log (NUL|/dev/null) -print /r /r/top.c$",
+      "out": _needs("/r/top.c", 2) },
+    { "match": r"^findmerge -ftag int -log (NUL|/dev/null) -print /r/a$",
+      "out": _needs("/r/a/x.c", 3) + _needs("/r/a/y.c", 4) +
+             "Needs Merge \"/r/a\" [(automatic) to /main/dev/1 from /main/int/2 (base also " +
+             "/main/1)]\n", "delay": 0.1 },
+    { "match": r"^findmerge -ftag int -log (NUL|/dev/null) -print /r/b$", "out": "", "delay": 0.1 },
+    { "match": r"^findmerge .* /r/build$",
+      "err": "cleartool: Error: Not a vob object: \"/r/build\".\n" },
+    { "match": r"^findmerge -ftag bad",
+      "err": "cleartool: Error: View tag not found: \"bad\".\n" },
+]
+
+
+class MergeTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv(_rules)
+        self.pool = nxpy.ccase.pool.SessionPool(3, self.env.tool)
+
+    def tearDown(self):
+        self.pool.close()
+        self.env.close()
+
+    def test_parse_line(self):
+        c = nxpy.ccase.merge.parse_line(_needs("/r/x.c", 5))
+        self.assertEqual(( "/r/x.c", "/main/dev/5", "/main/int/6", "/main/4", False ), c)
+        c = nxpy.ccase.merge.parse_line("Needs Merge \"d\" [(automatic) to /main/1 from " +
+                "/main/b/1 (base also /main/0)]")
+        self.assertEqual(( "d", "/main/1", "/main/b/1", "/main/0", True ), c)
+        self.assertTrue(nxpy.ccase.merge.parse_line("A 'findmerge' log has been written") is None)
+
+    def test_plan(self):
+        with self.pool.session() as tool:
+            candidates = nxpy.ccase.merge.plan(tool, "/r/a", ftag="int")
+            self.assertEqual([ "/r/a/x.c", "/r/a/y.c", "/r/a" ], [ c.path for c in candidates ])
+            self.assertRaises(nxpy.ccase.cleartool.FailedCommand, nxpy.ccase.merge.plan, tool,
+                    "/r", ftag="bad")
+            self.assertRaises(nxpy.command.option.InvalidOptionError, nxpy.ccase.merge.plan,
+                    tool, "/r")
+
+    def test_parallel_plan(self):
+        candidates = list(nxpy.ccase.merge.parallel_plan(self.pool, "/r", ftag="int"))
+        self.assertEqual(sorted([ "/r/top.c", "/r/a/x.c", "/r/a/y.c", "/r/a" ]),
+                sorted(c.path for c in candidates))
+
+    def test_parallel_plan_failure(self):
+        self.assertRaises(nxpy.ccase.cleartool.FailedCommand, list,
+                nxpy.ccase.merge.parallel_plan(self.pool, "/r", ftag="bad"))
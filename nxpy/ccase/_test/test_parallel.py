@@ -0,0 +1,111 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the parallel module
+
+"""
+
+from __future__ import absolute_import
+
+import io
+import os
+import shutil
+import tempfile
+
+import nxpy.ccase.parallel
+import nxpy.ccase.test.fake
+import nxpy.test.test
+
+
+def _history(count):
+    lines = []
+    for i in range(count):
+        lines.append(u"2019-03-%02dT15:45:12+01:00   Nicola Musatti (user%d.users@host)" %
+                ( 1 + i % 28, i % 4 ))
+        lines.append(u"  create version \"src/f%d.c@@/main/%d\"" % ( i, i ))
+        if i % 3:
+            lines.append(u"  \"Comment for change %d, è accented\"" % i)
+    return u"\n".join(lines) + u"\n"
+
+
+_activities = u"""activity "fix_1"
+  2019-03-12T15:45:12+01:00 by Nicola Musatti (nicola.users@host)
+  owner: nicola
+  group: users
+  stream: dev@/pvob
+  title: Fix: a bug
+  change set versions:
+    src/a.c@@/main/dev/3
+    src/b.c@@/main/dev/1
+activity "fix_2"
+  2019-03-13T10:00:00+01:00 by Nicola Musatti (nicola.users@host)
+  owner: nicola
+  group: users
+  stream: dev@/pvob
+  title: Another fix
+  change set versions:
+"""
+
+
+class ParallelTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="nxpy_ccase_parallel_")
+        self.path = os.path.join(self.dir, "history.txt")
+        self.text = _history(500)
+        with io.open(self.path, "w", encoding="utf-8") as f:
+            f.write(self.text)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_split(self):
+        chunks = nxpy.ccase.parallel.split(self.path, 2000)
+        self.assertTrue(len(chunks) > 10)
+        data = self.text.encode("utf-8")
+        self.assertEqual(0, chunks[0][0])
+        self.assertEqual(len(data), chunks[-1][1])
+        for ( s1, e1 ), ( s2, e2 ) in zip(chunks[:-1], chunks[1:]):
+            self.assertEqual(e1, s2)
+            self.assertEqual(b"\n2", data[s2-1:s2+1])
+
+    def test_history_long(self):
+        records = nxpy.ccase.parallel.history_long(self.text)
+        self.assertEqual(500, len(records))
+        self.assertEqual(( "2019-03-02T15:45:12+01:00", "user1", "create version",
+                "src/f1.c@@/main/1", u"Comment for change 1, è accented" ), records[1])
+        self.assertEqual("", records[0].comment)
+
+    def test_activity_long(self):
+        records = nxpy.ccase.parallel.activity_long(_activities)
+        self.assertEqual(( "fix_1", "2019-03-12T15:45:12+01:00", "nicola", "users", "dev@/pvob",
+                "Fix: a bug", [ "src/a.c@@/main/dev/3", "src/b.c@@/main/dev/1" ] ), records[0])
+        self.assertEqual([], records[1].versions)
+
+    def test_parse_file(self):
+        expected = nxpy.ccase.parallel.history_long(self.text)
+        records = list(nxpy.ccase.parallel.parse_file(self.path,
+                nxpy.ccase.parallel.history_long, workers=2, chunk_size=3000))
+        self.assertEqual(expected, records)
+        records = list(nxpy.ccase.parallel.parse_file(self.path,
+                nxpy.ccase.parallel.history_long, workers=1, chunk_size=3000))
+        self.assertEqual(expected, records)
+
+    def test_capture(self):
+        with nxpy.ccase.test.fake.FakeEnv([ { "match": r"^lshistory", "out": self.text } ]) as env:
+            tool = env.tool()
+            try:
+                path = os.path.join(self.dir, "captured.txt")
+                size = nxpy.ccase.parallel.capture(tool, path, "lshistory", "src", long=True)
+            finally:
+                tool.close()
+        self.assertEqual(os.path.getsize(path), size)
+        self.assertEqual(500, len(list(nxpy.ccase.parallel.parse_file(path,
+                nxpy.ccase.parallel.history_long, chunk_size=5000))))
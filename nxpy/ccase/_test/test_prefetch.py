@@ -0,0 +1,111 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the prefetch module
+
+"""
+
+from __future__ import absolute_import
+
+import time
+
+import nxpy.ccase.pool
+import nxpy.ccase.prefetch
+import nxpy.ccase.test.fake
+import nxpy.test.test
+
+
+_rules = [
+    { "match": r"^lsstream -in project:p1@/vobs/pvob",
+      "out": "12-Mar-19.15:45:12  dev  ann  \"Development\"\n" +
+             "12-Mar-19.15:46:01  fix  bob  \"Fixes\"\n" },
+    { "match": r"^lsactivity -short -in stream:dev@/vobs/pvob", "out": "fix_1\nfix_2\n" },
+    { "match": r"^lsactivity -short -view v$", "out": "fix_1\nfix_2\n" },
+    { "match": r"^lsactivity -short -in stream:fix@/vobs/pvob", "out": "fix_3\n" },
+    { "match": r"^describe -short activity:(fix_\d)@/vobs/pvob", "out": "described\n" },
+]
+
+
+class PrefetchTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv(_rules)
+        self.pool = nxpy.ccase.pool.SessionPool(2, self.env.tool)
+        self.prefetcher = nxpy.ccase.prefetch.Prefetcher(self.env.tool(), self.pool,
+                options={ "describe": { "short": True }, "lsactivity": { "short": True } })
+
+    def tearDown(self):
+        self.prefetcher.close()
+        self.pool.close()
+        self.env.close()
+
+    def _wait(self, count):
+        limit = time.time() + 30
+        while self.prefetcher.prefetched < count and time.time() < limit:
+            time.sleep(0.05)
+        self.assertEqual(count, self.prefetcher.prefetched)
+
+    def test_listed(self):
+        self.assertEqual([ "dev", "fix" ],
+                nxpy.ccase.prefetch.listed(_rules[0]["out"], { "proj": "p" }))
+        self.assertEqual([ "fix_1", "fix_2" ],
+                nxpy.ccase.prefetch.listed(_rules[1]["out"], { "short": True }))
+        self.assertEqual([], nxpy.ccase.prefetch.listed("x\n", { "fmt": "%n" }))
+        self.assertEqual("activity:a@/vobs/pvob", nxpy.ccase.prefetch.selector("activity", "a",
+                { "in_stream": "stream:s@/vobs/pvob" }))
+        self.assertEqual("activity:a@/p", nxpy.ccase.prefetch.selector("activity", "a@/p", {}))
+        self.assertTrue(nxpy.ccase.prefetch.selector("activity", "a", {}) is None)
+        self.assertTrue(nxpy.ccase.prefetch.selector("activity", "a",
+                { "in_stream": "stream:s" }) is None)
+
+    def test_unqualified(self):
+        p = self.prefetcher
+        self.assertEqual("fix_1\nfix_2\n", p.lsactivity(short=True, view="v"))
+        time.sleep(0.3)
+        self.assertEqual(0, p.prefetched)
+        self.assertFalse([ c for c in self.env.commands() if c.startswith("describe") ])
+
+    def test_describe(self):
+        p = self.prefetcher
+        p.lsactivity(in_stream="stream:dev@/vobs/pvob", short=True)
+        self._wait(2)
+        self.assertEqual("described\n", p.describe("activity:fix_1@/vobs/pvob", short=True))
+        self.assertEqual("described\n", p.describe("activity:fix_2@/vobs/pvob", short=True))
+        self.assertEqual(2, p.hits)
+        self.assertEqual(1, len([ c for c in self.env.commands() if "fix_1" in c ]))
+        p.describe("activity:fix_1@/vobs/pvob", short=True)
+        self.assertEqual(2, p.hits)
+        self.assertEqual(2, p.misses)
+
+    def test_streams(self):
+        p = self.prefetcher
+        p.lsstream(proj="project:p1@/vobs/pvob")
+        self._wait(2)
+        self.assertEqual("fix_3\n", p.lsactivity(in_stream="stream:fix@/vobs/pvob", short=True))
+        self.assertEqual(1, p.hits)
+        self._wait(3)
+
+    def test_invalidation(self):
+        p = self.prefetcher
+        p.lsactivity(in_stream="stream:dev@/vobs/pvob", short=True)
+        self._wait(2)
+        p.checkout("a.c")
+        p.describe("activity:fix_1@/vobs/pvob", short=True)
+        self.assertEqual(0, p.hits)
+        self.assertEqual(2, len([ c for c in self.env.commands() if "fix_1" in c ]))
+
+    def test_expiry(self):
+        self.prefetcher.ttl = 0.0
+        p = self.prefetcher
+        p.lsactivity(in_stream="stream:dev@/vobs/pvob", short=True)
+        self._wait(2)
+        time.sleep(0.05)
+        p.describe("activity:fix_1@/vobs/pvob", short=True)
+        self.assertEqual(0, p.hits)
@@ -0,0 +1,65 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the ClearTool raw output mode
+
+"""
+
+from __future__ import absolute_import
+
+import sys
+import unittest
+
+import nxpy.ccase.cleartool
+import nxpy.ccase.test.fake
+import nxpy.test.test
+
+
+_big = "".join("%08d history line\n" % i for i in range(100000))
+
+
+@unittest.skipIf(sys.platform == "win32", "Raw mode is not supported on Windows")
+class RawTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv([
+                { "match": r"^lshistory", "out": _big },
+                { "match": r"^lsvob", "chunks": [ "* /vob  /stg/vob.vbs\nCommand 1 returned" ],
+                  "chunk_delay": 0.1, "out": " status 0\r\nCommand " },
+                { "match": r"^describe", "err": "cleartool: Error: Unable to access.\n",
+                  "status": 1 },
+                { "match": r"^update", "delay": 30 } ])
+        self.tool = self.env.tool()
+
+    def tearDown(self):
+        self.env.close()
+
+    def test_raw_pass(self):
+        with self.tool.raw():
+            out = self.tool.lshistory("/vob")
+        self.assertTrue(isinstance(out, memoryview))
+        self.assertEqual(len(out), len(_big))
+        self.assertEqual(out.tobytes().decode("ascii"), _big)
+
+    def test_split_trailer_pass(self):
+        with self.tool.raw():
+            out = self.tool.lsvob()
+        self.assertEqual(out.tobytes(), b"* /vob  /stg/vob.vbs\n")
+
+    def test_raw_fail(self):
+        with self.tool.raw():
+            self.assertRaises(nxpy.ccase.cleartool.FailedCommand, self.tool.describe, "x")
+            self.assertEqual(self.tool.pwd(), self.tool.pwd())
+
+    def test_deadline_fail(self):
+        with self.tool.raw():
+            with self.tool.limit(0.2):
+                self.assertRaises(nxpy.ccase.cleartool.DeadlineExceeded, self.tool.update)
+            self.assertEqual(self.tool.lsvob().tobytes(), b"* /vob  /stg/vob.vbs\n")
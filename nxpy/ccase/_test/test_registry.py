@@ -0,0 +1,100 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the declarative command registry
+
+"""
+
+from __future__ import absolute_import
+
+import nxpy.ccase.cleartool
+import nxpy.ccase.test.fake
+import nxpy.command.option
+import nxpy.test.test
+
+
+def _parser(command, args, defaults, options):
+    return nxpy.command.option.Parser(nxpy.ccase.cleartool._config, command, args, options,
+            **defaults)
+
+
+class RegistryTest(nxpy.test.test.TestCase):
+    def setUp(self):
+        self.commands = nxpy.ccase.cleartool.commands
+
+    def _same(self, name, args, options):
+        spec = self.commands[name]
+        expected = _parser(spec.command, args, dict(spec.defaults), options).getCommandLine()
+        self.assertEqual(expected.split(), spec.build(args, options).split())
+
+    def test_matches_parser(self):
+        self._same("describe", ( "activity:a@\\pvob", ), { "fmt": "%Xn" })
+        self._same("ls", ( "src", ), { "long": True, "short": False, "nxn": False })
+        self._same("lsactivity", (), { "in_stream": "stream:s@\\pvob", "fmt": "%Xn\\n" })
+        self._same("checkin", ( "a.c", "b.c" ), { "comment": "fix", "identical": True })
+        self._same("checkout", ( "a.c", ), {})
+        self._same("update", (), { "force": True, "log": "u.log" })
+        self._same("deliver", (), { "preview": True, "stream": "s", "activities": ( "a", "b" ) })
+        self._same("rmname", ( "x", ), { "checkout": False })
+
+    def test_options_in_default_order(self):
+        self.assertEqual('lsstream -in p -fmt "%Xn"',
+                self.commands["lsstream"].build((), { "fmt": "%Xn", "proj": "p" }))
+
+    def test_invalid_option(self):
+        self.assertRaises(nxpy.command.option.InvalidOptionError,
+                self.commands["describe"].build, ( "x", ), { "nosuch": True })
+
+    def test_exclusive(self):
+        self.assertRaises(nxpy.command.option.InvalidOptionError,
+                self.commands["describe"].build, ( "x", ), { "fmt": "%n", "short": True })
+
+    def test_exactly_one(self):
+        spec = self.commands["lsproject"]
+        self.assertRaises(nxpy.command.option.InvalidOptionError, spec.build, (), {})
+        self.assertEqual("lsproject -cview", spec.build((), { "cview": True }))
+
+    def test_arguments(self):
+        self.assertRaises(nxpy.ccase.cleartool.InvalidArgument,
+                self.commands["checkin"].build, (), {})
+        self.assertRaises(nxpy.command.option.InvalidOptionError,
+                self.commands["lsview"].build, ( "tag", ), { "cview": True })
+        self.assertRaises(nxpy.command.option.InvalidOptionError,
+                self.commands["setactivity"].build, ( "act", ), { "none": True })
+
+    def test_new_commands(self):
+        self.assertEqual('lsbl -component c -stream s -fmt "%n"',
+                self.commands["lsbl"].build((), { "stream": "s", "component": "c",
+                "fmt": "%n" }))
+        self.assertRaises(nxpy.command.option.InvalidOptionError, self.commands["lsbl"].build,
+                (), { "stream": "s", "invob": "v" })
+        self.assertEqual("mklabel -replace -recurse -nc L dir",
+                self.commands["mklabel"].build(( "L", "dir" ), { "replace": True,
+                "recurse": True }))
+        self.assertEqual("lshistory -all x", self.commands["lshistory"].build(( "x", ),
+                { "all": True }))
+
+
+class GeneratedMethodTest(nxpy.test.test.TestCase):
+    def test_methods(self):
+        for name in nxpy.ccase.cleartool.commands:
+            self.assertTrue(callable(getattr(nxpy.ccase.cleartool.ClearTool, name)))
+
+    def test_execution(self):
+        with nxpy.ccase.test.fake.FakeEnv([ { "match": "^lsbl", "out": "bl1\n" } ]) as env:
+            tool = env.tool()
+            try:
+                self.assertEqual("bl1\n", tool.lsbl(stream="s"))
+                self.assertEqual('describe -fmt "%n" x', tool.commandLine("describe", "x",
+                        fmt="%n"))
+                tool.describe("x", short=True)
+            finally:
+                tool.close()
+            self.assertEqual([ "lsbl -stream s", "describe -short x" ], env.commands()[-2:])
@@ -0,0 +1,92 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the replay module
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+
+import nxpy.ccase.cleartool
+import nxpy.ccase.replay
+import nxpy.ccase.test.fake
+import nxpy.core.temp_file
+import nxpy.test.test
+
+
+class ReplayTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv([
+                { "match": r"^lsvob", "out": "* /vob /stg/vob.vbs\n", "delay": 0.1 },
+                { "match": r"^describe", "err": "cleartool: Error: Not found.\n", "status": 1 } ])
+        self.dir = nxpy.core.temp_file.TempDir()
+        self.trace = os.path.join(self.dir.name, "trace.jsonl")
+
+    def tearDown(self):
+        self.env.close()
+        self.dir.__exit__(None, None, None)
+
+    def _record(self):
+        with nxpy.ccase.replay.Recorder(self.trace) as rec:
+            t1 = rec.attach(self.env.tool())
+            t2 = self.env.tool(recorder=rec)
+            t1.lsvob()
+            t2.ls("a", "b", short=False)
+            time.sleep(0.2)
+            t1.lsvob()
+            self.assertRaises(nxpy.ccase.cleartool.FailedCommand, t2.describe, "x")
+            t1.pwd()
+            t1.pwd()
+
+    def test_record_pass(self):
+        self._record()
+        replayer = nxpy.ccase.replay.Replayer(self.trace)
+        self.assertEqual([ r["method"] for r in replayer.records ],
+                [ "lsvob", "ls", "lsvob", "describe", "pwd", "pwd" ])
+        ls = replayer.records[1]
+        self.assertEqual(ls["args"], [ "a", "b" ])
+        self.assertEqual(ls["kwargs"], { "short": False })
+        self.assertEqual(ls["commands"][0]["cmd"], "ls -nxn a b")
+        self.assertEqual(ls["commands"][0]["out"], "ls -nxn a b\n")
+        self.assertTrue(replayer.records[0]["elapsed"] >= 0.1)
+        self.assertTrue("error" in replayer.records[3])
+        self.assertEqual(len(replayer.records[5]["commands"]), 0)
+        self.assertEqual(sorted(replayer.sessions().keys()), [ 0, 1 ])
+
+    def test_replay_pass(self):
+        self._record()
+        replayer = nxpy.ccase.replay.Replayer(self.trace)
+        report = replayer.replay(self.env.tool, rate=2.0)
+        s = report.summary()
+        self.assertEqual(s["calls"], 6)
+        self.assertEqual(s["errors"], 1)
+        self.assertTrue(report.duration >= 0.1)
+        fast = replayer.replay(self.env.tool, rate=0, commands=True)
+        self.assertEqual(fast.summary()["errors"], 1)
+
+    def test_replay_fake_pass(self):
+        self._record()
+        replayer = nxpy.ccase.replay.Replayer(self.trace)
+        with nxpy.ccase.test.fake.FakeEnv(replayer.rules(timing=False)) as env:
+            tool = env.tool()
+            self.assertEqual(tool.lsvob(), "* /vob /stg/vob.vbs\n")
+            self.assertRaises(nxpy.ccase.cleartool.FailedCommand, tool.describe, "x")
+
+    def test_execute_pass(self):
+        tool = self.env.tool()
+        self.assertEqual(tool.execute("lsvob"), ( "* /vob /stg/vob.vbs\n", "", "lsvob" ))
+        self.assertRaises(nxpy.ccase.cleartool.FailedCommand, tool.execute, "describe x")
+        out, err, cmd = tool.execute("describe x", raise_on_error=False)
+        self.assertEqual(err, "cleartool: Error: Not found.\n")
+        tool.close()
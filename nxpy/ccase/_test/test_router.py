@@ -0,0 +1,84 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the router module
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+
+import nxpy.ccase.cleartool
+import nxpy.ccase.router
+import nxpy.ccase.test.fake
+import nxpy.core.temp_file
+import nxpy.test.test
+
+
+class ViewRouterTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv([ { "match": r"^ls", "out": "{cwd}\n" } ])
+        self.dir = nxpy.core.temp_file.TempDir()
+        self.roots = {}
+        for tag in ( "v1", "v2", "v3" ):
+            self.roots[tag] = os.path.join(self.dir.name, tag)
+            os.mkdir(self.roots[tag])
+        self.router = nxpy.ccase.router.ViewRouter(self.roots, self.env.tool, max_views=2)
+
+    def tearDown(self):
+        self.router.close()
+        self.env.close()
+        self.dir.__exit__(None, None, None)
+
+    def test_route_path_pass(self):
+        self.assertEqual(self.router.ls(os.path.join(self.roots["v1"], "a.c")).strip(),
+                self.roots["v1"])
+        self.assertEqual(self.router.ls(self.roots["v2"]).strip(), self.roots["v2"])
+        self.router.ls(self.roots["v1"])
+        self.assertEqual(len([ c for c in self.env.commands() if c.startswith("cd") ]), 2)
+
+    def test_route_view_pass(self):
+        self.assertEqual(self.router.lsproject(view="v2").strip(), self.roots["v2"])
+        self.assertEqual(self.router.views, [ "v2" ])
+
+    def test_route_view_option_pass(self):
+        self.assertEqual(self.router.ls(view="v1").strip(), self.roots["v1"])
+        self.router.update(view="v1")
+        self.assertTrue([ c for c in self.env.commands() if c.startswith("update") and
+                "-view" not in c ])
+
+    def test_default_root_pass(self):
+        router = nxpy.ccase.router.ViewRouter(factory=self.env.tool)
+        self.assertEqual(router.viewOf("/view/v1/vobs/a.c"), "v1")
+        self.assertEqual(router.viewOf("M:\\v2\\vobs\\a.c"), "v2")
+        self.assertTrue(router.viewOf("/vobs/a.c") is None)
+        self.assertRaises(nxpy.ccase.cleartool.FailedCommand, router.ls, "/view/v1/vobs/a.c")
+        self.assertTrue("cd " + nxpy.ccase.router.default_root("v1") in self.env.commands())
+        router.close()
+
+    def test_route_fail(self):
+        self.assertRaises(nxpy.ccase.cleartool.InvalidArgument, self.router.ls, "/elsewhere")
+        self.assertRaises(AttributeError, getattr, self.router, "nonexistent")
+
+    def test_evict_pass(self):
+        for tag in ( "v1", "v2", "v3" ):
+            with self.router.session(tag) as tool:
+                self.assertEqual(tool.pwd(), self.roots[tag])
+        self.assertEqual(self.router.views, [ "v2", "v3" ])
+        time.sleep(0.05)
+        self.router.evictIdle(0.01)
+        self.assertEqual(self.router.views, [])
+
+    def test_session_fail(self):
+        self.assertRaises(nxpy.ccase.cleartool.FailedCommand, self.router.ls, view="missing")
+        self.assertEqual(self.router.views, [])
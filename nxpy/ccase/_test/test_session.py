@@ -0,0 +1,110 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the ClearTool session state mirror
+
+"""
+
+from __future__ import absolute_import
+
+import os
+
+import nxpy.ccase.cleartool
+import nxpy.ccase.test.fake
+import nxpy.core.temp_file
+import nxpy.test.test
+
+
+class SessionStateTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv([
+                { "match": r"^lsview -cview", "out": "* my_view /views/my_view.vws\n" },
+                { "match": r"^setactivity", "out": "Set activity.\n" } ])
+        self.dir = nxpy.core.temp_file.TempDir()
+        self.sub = os.path.join(self.dir.name, "sub")
+        os.mkdir(self.sub)
+        self.tool = self.env.tool()
+
+    def tearDown(self):
+        self.env.close()
+        self.dir.__exit__(None, None, None)
+
+    def test_cd_pass(self):
+        self.tool.cd()
+        self.tool.cd()
+        self.tool.cd(self.dir.name)
+        self.tool.cd(self.dir.name)
+        self.assertEqual(self.tool.pwd(), os.path.normpath(self.dir.name))
+        self.tool.cd("sub")
+        self.assertEqual(self.tool.pwd(), self.sub)
+        self.tool.cd(self.sub)
+        self.assertEqual(self.env.commands(), [ "cd", "cd " + self.dir.name, "cd sub" ])
+
+    def test_cd_quoted_pass(self):
+        spaced = os.path.join(self.dir.name, "a b")
+        os.mkdir(spaced)
+        self.tool.cd(self.dir.name)
+        self.tool.cd("\"a b\"")
+        self.assertEqual(self.tool.pwd(), spaced)
+        self.tool.cd("\"%s\"" % spaced)
+        self.assertEqual(self.env.commands(), [ "cd " + self.dir.name, "cd \"a b\"" ])
+        self.tool.restart()
+        self.assertEqual(self.tool._run("pwd")[0].strip(), spaced)
+
+    def test_cd_fail(self):
+        self.tool.cd(self.dir.name)
+        self.assertRaises(nxpy.ccase.cleartool.FailedCommand, self.tool.cd, "missing")
+        self.assertEqual(self.tool.state.cwd, os.path.normpath(self.dir.name))
+
+    def test_pwd_pass(self):
+        self.tool.cd()
+        self.assertEqual(self.tool.pwd(), self.tool.pwd())
+        self.assertEqual(self.env.commands(), [ "cd", "pwd" ])
+
+    def test_setactivity_pass(self):
+        self.assertTrue(self.tool.setactivity("act"))
+        self.assertTrue(self.tool.setactivity("act"))
+        self.tool.setactivity("act", view="other")
+        self.tool.setactivity(None)
+        self.assertEqual(self.tool.state.activity, None)
+        self.tool.setactivity("act")
+        self.assertEqual(len(self.env.commands()), 4)
+        self.tool.cd(self.dir.name)
+        self.tool.setactivity("act")
+        self.assertEqual(len(self.env.commands()), 6)
+
+    def test_view_pass(self):
+        self.tool.lsview(cview=True)
+        self.assertEqual(self.tool.state.view, "my_view")
+        self.tool.lsview(cview=True)
+        self.assertEqual(len(self.env.commands()), 1)
+        self.tool.cd(self.dir.name)
+        self.assertTrue(self.tool.state.view is None)
+
+    def test_replay_pass(self):
+        self.tool.cd(self.sub)
+        self.tool.restart()
+        self.assertEqual(self.tool._run("pwd")[0].strip(), self.sub)
+        self.assertEqual(self.tool.state.cwd, self.sub)
+
+
+class UnbufferedInterpreterTest(nxpy.test.test.TestCase):
+
+    def test_large_output_pass(self):
+        line = "x" * 999 + "\n"
+        rules = [ { "match": r"^lsvob", "chunks": [ line ] * 100 } ]
+        with nxpy.ccase.test.fake.FakeEnv(rules) as env:
+            tool = nxpy.ccase.cleartool.ClearTool(
+                    cmd=nxpy.ccase.cleartool.UnbufferedInterpreter(env.command_line), stall=3)
+            try:
+                self.assertEqual(tool.lsvob(), line * 100)
+            finally:
+                tool.close()
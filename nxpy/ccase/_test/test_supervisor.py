@@ -0,0 +1,178 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for session supervision
+
+"""
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+import nxpy.ccase.cleartool
+import nxpy.ccase.pool
+import nxpy.ccase.supervisor
+import nxpy.ccase.test.fake
+import nxpy.command.error
+import nxpy.test.test
+
+
+_good = [ { "match": r"^lsvob", "out": "/va\n" }, { "match": r"^checkin", "out": "done\n" } ]
+
+
+class SupervisionTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv()
+
+    def tearDown(self):
+        self.env.close()
+
+    def test_died(self):
+        self.env.setRules([ { "match": r"^lsvob", "exit": True } ])
+        tool = self.env.tool()
+        self.assertRaises(nxpy.ccase.cleartool.SessionDied, tool.lsvob)
+        self.assertTrue(tool.alive)
+        self.env.setRules(_good)
+        tool.restart()
+        self.assertEqual("/va\n", tool.lsvob())
+
+    def test_retry_read_only(self):
+        self.env.setRules([ { "match": r"^lsvob", "exit": True } ])
+        tool = self.env.tool(retries=1)
+        tool.pwd()
+        self.env.setRules(_good)
+        self.assertEqual("/va\n", tool.lsvob())
+
+    def test_no_retry_for_updates(self):
+        self.env.setRules([ { "match": r"^checkin", "exit": True } ])
+        tool = self.env.tool(retries=1)
+        tool.pwd()
+        self.env.setRules(_good)
+        self.assertRaises(nxpy.ccase.cleartool.SessionDied, tool.checkin, "a.c")
+        self.assertEqual("done\n", tool.checkin("a.c"))
+
+    def test_stall(self):
+        self.env.setRules([ { "match": r"^lsvob", "delay": 5 } ])
+        tool = self.env.tool(retries=1, stall=0.3)
+        tool.pwd()
+        self.env.setRules(_good)
+        start = time.time()
+        self.assertEqual("/va\n", tool.lsvob())
+        self.assertTrue(time.time() - start < 3)
+        self.env.setRules([ { "match": r"^lsvob", "delay": 5 } ])
+        tool = self.env.tool(stall=0.3)
+        self.assertRaises(nxpy.command.error.TimeoutError, tool.lsvob)
+
+    def test_retry_watched(self):
+        self.env.setRules([ { "match": r"^lsvob", "delay": 5 } ])
+        tool = self.env.tool(retries=1, stall=0.3)
+        tool.cd(self.env.dir)
+        self.env.setRules(_good)
+        chunks = []
+        with tool.watch(chunks.append):
+            self.assertEqual("/va\n", tool.lsvob())
+        out = "".join(chunks)
+        self.assertTrue(out.startswith("/va\n"))
+        self.assertEqual(1, out.count("returned status"))
+        self.assertEqual([ "cd " + self.env.dir, "lsvob" ], self.env.commands()[-2:])
+
+    def test_no_retry_after_output(self):
+        self.env.setRules([ { "match": r"^lsvob", "chunks": [ "/va\n", "/vb\n" ],
+                "chunk_delay": 5 } ])
+        tool = self.env.tool(retries=1, stall=0.3)
+        tool.cd(self.env.dir)
+        self.env.setRules(_good)
+        lines = []
+        with tool.watch(nxpy.ccase.cleartool.LineWatcher(lines.append)):
+            self.assertRaises(nxpy.command.error.TimeoutError, tool.lsvob)
+        self.assertEqual([ "/va" ], lines)
+        self.assertEqual("/va\n", tool.lsvob())
+
+    def test_respawn(self):
+        self.env.setRules(_good)
+        tool = self.env.tool()
+        tool.cd(self.env.dir)
+        tool.cmd.popen.kill()
+        tool.cmd.popen.wait()
+        self.assertFalse(tool.alive)
+        self.assertEqual("/va\n", tool.lsvob())
+        self.assertEqual([ "cd " + self.env.dir, "lsvob" ], self.env.commands()[-2:])
+
+    def test_probe(self):
+        tool = self.env.tool()
+        self.assertTrue(tool.probe())
+        self.env.setRules([ { "match": r"^pwd$", "delay": 5 } ])
+        tool = self.env.tool()
+        start = time.time()
+        self.assertFalse(tool.probe(0.3))
+        self.assertTrue(time.time() - start < 3)
+
+    def test_probe_busy(self):
+        self.env.setRules([ { "match": r"^checkin", "delay": 1, "out": "done\n" } ])
+        tool = nxpy.ccase.cleartool.ClearTool(cmd=self.env.interpreter())
+        with tool.limit(0.2):
+            self.assertRaises(nxpy.ccase.cleartool.DeadlineExceeded, tool.checkin, "a.c")
+        self.assertFalse(tool.probe())
+        time.sleep(1.5)
+        self.assertTrue(tool.probe())
+        tool.close()
+
+
+class SupervisorTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv(_good)
+        self.pool = nxpy.ccase.pool.SessionPool(2, self.env.tool)
+
+    def tearDown(self):
+        self.pool.close()
+        self.env.close()
+
+    def test_sweep(self):
+        tools = [ self.pool.acquire(), self.pool.acquire() ]
+        for t in tools:
+            self.pool.release(t)
+        tools[0].cmd.popen.kill()
+        tools[0].cmd.popen.wait()
+        supervisor = nxpy.ccase.supervisor.Supervisor(self.pool)
+        self.assertEqual(1, supervisor.sweep())
+        self.assertEqual(2, supervisor.probes)
+        self.assertTrue(all(t.alive for t in tools))
+        with self.pool.session() as tool:
+            self.assertEqual(0, supervisor.sweep())
+        self.assertEqual(3, supervisor.probes)
+
+    def test_sweep_one_at_a_time(self):
+        tools = [ self.pool.acquire(), self.pool.acquire() ]
+        for t in tools:
+            self.pool.release(t)
+        self.env.setRules([ { "match": r"^pwd$", "delay": 1 } ])
+        for t in tools:
+            t.restart()
+        supervisor = nxpy.ccase.supervisor.Supervisor(self.pool)
+        sweep = threading.Thread(target=supervisor.sweep)
+        sweep.start()
+        time.sleep(0.3)
+        start = time.time()
+        with self.pool.session():
+            self.assertTrue(time.time() - start < 0.5)
+        sweep.join()
+        self.assertEqual(2, supervisor.probes)
+        self.assertEqual(0, supervisor.restarts)
+
+    def test_background(self):
+        with self.pool.session():
+            pass
+        with nxpy.ccase.supervisor.Supervisor(self.pool, interval=0.05) as supervisor:
+            time.sleep(0.5)
+        self.assertTrue(supervisor.probes > 0)
+        self.assertTrue(supervisor.error is None)
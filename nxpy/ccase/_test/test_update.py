@@ -0,0 +1,83 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the update module
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+
+import nxpy.ccase.pool
+import nxpy.ccase.test.fake
+import nxpy.ccase.update
+import nxpy.core.temp_file
+import nxpy.test.test
+
+
+_report = [
+    "Processing dir \"src\".\n",
+    "Loading \"src/a.c\" (1024 bytes).\nLoading \"src/b",
+    ".c\" (12 bytes).\nUnloaded \"src/old.c\".\n",
+    "Keeping hijacked object \"src/h.c\" - base \"\\main\\3\".\n",
+    "Log has been written to \"{cwd}/update.log\".\n",
+]
+
+
+class UpdateTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv([ { "match": r"^update",
+                "chunks": _report, "chunk_delay": 0.05 } ])
+        self.dir = nxpy.core.temp_file.TempDir()
+        self.roots = []
+        for tag in ( "v1", "v2", "v3" ):
+            self.roots.append(os.path.join(self.dir.name, tag))
+            os.mkdir(self.roots[-1])
+        self.pool = nxpy.ccase.pool.SessionPool(2, self.env.tool)
+
+    def tearDown(self):
+        self.pool.close()
+        self.env.close()
+        self.dir.__exit__(None, None, None)
+
+    def test_update_views_pass(self):
+        events = []
+        done = []
+        results = nxpy.ccase.update.update_views(self.pool, self.roots + [ "missing" ],
+                progress=lambda *a: events.append(( time.time(), ) + a), done=done.append)
+        self.assertEqual([ r.root for r in results ], self.roots + [ "missing" ])
+        for r in results[:3]:
+            self.assertTrue(r.ok)
+            self.assertEqual(r.loaded, [ "src/a.c", "src/b.c" ])
+            self.assertEqual(r.unloaded, [ "src/old.c" ])
+            self.assertEqual(r.hijacked, [ "src/h.c" ])
+            self.assertEqual(r.log, os.path.join(r.root, "update.log"))
+            self.assertTrue(r.elapsed >= 0.2)
+        self.assertFalse(results[3].ok)
+        self.assertTrue(results[3].error is not None)
+        self.assertEqual(len(events), 12)
+        self.assertEqual(len(done), 4)
+        first = min(e[0] for e in events if e[1] == self.roots[0])
+        self.assertTrue(first < results[0].start + results[0].elapsed)
+        self.assertEqual(len(self.pool.sessions), 2)
+
+    def test_update_error_fail(self):
+        self.env.setRules([ { "match": r"^update", "chunks": _report[:2],
+                "err": "cleartool: Warning: Slow.\ncleartool: Error: Unable to load \"x\".\n",
+                "status": 1 } ])
+        with self.pool.session() as tool:
+            r = nxpy.ccase.update.update_view(tool, self.roots[0])
+        self.assertFalse(r.ok)
+        self.assertTrue("Unable to load" in r.error.stderr)
+        self.assertFalse("Warning" in r.error.stderr)
+        self.assertEqual(r.loaded, [ "src/a.c" ])
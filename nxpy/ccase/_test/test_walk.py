@@ -0,0 +1,91 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Tests for the walk module
+
+"""
+
+from __future__ import absolute_import
+
+import os.path
+
+import nxpy.ccase.cleartool
+import nxpy.ccase.pool
+import nxpy.ccase.test.fake
+import nxpy.ccase.walk
+import nxpy.test.test
+
+
+def _listing(directory, width):
+    lines = []
+    for i in range(width):
+        lines.append("version                f%d.c@@/main/%d     Rule: /main/LATEST" % ( i, i ))
+    lines.append("version                co.c@@/main/CHECKEDOUT from /main/2     Rule: CHECKEDOUT")
+    lines.append("view private object    junk.o")
+    return lines
+
+
+def _rules():
+    rules = []
+    dirs = [ "/r" ]
+    for i in range(4):
+        dirs.append("/r/d%d" % i)
+        for j in range(3):
+            dirs.append("/r/d%d/e%d" % ( i, j ))
+    for d in dirs:
+        lines = _listing(d, 3)
+        subs = [ s for s in dirs if os.path.dirname(s) == d ]
+        for s in subs:
+            lines.append("directory version      %s@@/main/1     Rule: /main/LATEST" %
+                    os.path.basename(s))
+        rules.append({ "match": "^ls -long %s$" % d, "out": "\n".join(lines) + "\n",
+                "delay": 0.02 })
+    rules.append({ "match": "^ls -long /bad", "err": "cleartool: Error: Not a vob object.\n",
+            "status": 1 })
+    return rules
+
+
+class WalkTest(nxpy.test.test.TestCase):
+
+    def setUp(self):
+        self.env = nxpy.ccase.test.fake.FakeEnv(_rules())
+
+    def tearDown(self):
+        self.env.close()
+
+    def test_parse_line_pass(self):
+        e = nxpy.ccase.walk.parse_line(
+                "version      /d/a.c@@/main/CHECKEDOUT from /main/2    Rule: CHECKEDOUT", "/d")
+        self.assertEqual(e, ( "/d/a.c", "version", "/main/CHECKEDOUT", "checkedout", False ))
+        e = nxpy.ccase.walk.parse_line("version      b.c@@/main/4 [hijacked]    Rule: x", "/d")
+        self.assertEqual(e.state, nxpy.ccase.walk.HIJACKED)
+        self.assertEqual(e.version, "/main/4")
+        e = nxpy.ccase.walk.parse_line("view private object    junk.o", "/d")
+        self.assertEqual(e.state, nxpy.ccase.walk.PRIVATE)
+        self.assertTrue(nxpy.ccase.walk.parse_line("", "/d") is None)
+
+    def test_walk_pass(self):
+        tool = self.env.tool()
+        entries = list(nxpy.ccase.walk.walk(tool, "/r"))
+        self.assertEqual(len(entries), 17 * 5 + 16)
+        self.assertEqual(len([ e for e in entries if e.directory ]), 16)
+        self.assertEqual(len([ e for e in entries if e.state == "checkedout" ]), 17)
+
+    def test_parallel_walk_pass(self):
+        serial = sorted(nxpy.ccase.walk.walk(self.env.tool(), "/r"))
+        with nxpy.ccase.pool.SessionPool(4, self.env.tool) as pool:
+            parallel = sorted(nxpy.ccase.walk.parallel_walk(pool, "/r"))
+            self.assertEqual(len(pool.sessions), 4)
+        self.assertEqual(parallel, serial)
+
+    def test_parallel_walk_fail(self):
+        with nxpy.ccase.pool.SessionPool(2, self.env.tool) as pool:
+            self.assertRaises(nxpy.ccase.cleartool.FailedCommand, list,
+                    nxpy.ccase.walk.parallel_walk(pool, "/bad"))
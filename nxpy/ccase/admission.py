@@ -0,0 +1,220 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Per-VOB admission control for cleartool commands.
+
+An :py:class:`.Admission` instance may be shared among several :py:class:`.ClearTool` instances,
+possibly used from different threads, in order to limit the load they place on each VOB server.
+
+"""
+
+from __future__ import absolute_import
+
+import contextlib
+import re
+import threading
+import time
+
+import nxpy.ccase.cleartool
+
+
+class Busy(nxpy.ccase.cleartool.ClearToolError):
+    r"""Raised when a command cannot be admitted within the allowed wait."""
+
+    def __init__(self, vob, cmd):
+        self.vob = vob
+        self.command = cmd
+        super(Busy, self).__init__("%s: VOB busy, command not admitted: %s" % ( vob, cmd ))
+
+
+_poll = 0.05
+
+_selector_re = re.compile(r"(?<!@)@(?!@)([\\/][^\s\"',]+)")
+_token_re = re.compile(r"\"([^\"]*)\"|'([^']*)'|(\S+)")
+
+
+def _components(path):
+    return [ c for c in re.split(r"[\\/]+", path) if c ]
+
+
+class _Gate(object):
+    r"""Concurrency and rate limits for a single VOB."""
+
+    def __init__(self, max_in_flight, rate, burst):
+        self.max_in_flight = max_in_flight
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.in_flight = 0
+        self.tokens = self.burst
+        self.last = time.time()
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + ( now - self.last ) * self.rate)
+        self.last = now
+
+    def wait_time(self, now):
+        r"""Return 0 if a command may start now, otherwise how long to wait before retrying."""
+        self._refill(now)
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return None
+        if self.rate and self.tokens < 1.0:
+            return ( 1.0 - self.tokens ) / self.rate
+        return 0
+
+    def take(self):
+        self.in_flight += 1
+        if self.rate:
+            self.tokens -= 1.0
+
+    def give(self):
+        self.in_flight -= 1
+
+
+class Admission(object):
+    r"""
+    Limits the number of commands in flight and the number of commands started per second on each
+    VOB.
+
+    The VOB a command refers to is identified from its *@\\vob* selectors or from element paths
+    that contain one of the known VOB tags; commands that cannot be associated to a VOB share a
+    common default gate, subject to the same limits.
+
+    """
+    def __init__(self, max_in_flight=0, rate=0, burst=1, timeout=0, vobs=(), limits={}):
+        r"""
+        *max_in_flight* is the maximum number of concurrent commands per VOB and *rate* the maximum
+        number of commands started per second per VOB, with up to *burst* commands allowed at once;
+        zero means no limit. *timeout* is the number of seconds a command may wait for admission
+        before :py:exc:`.Busy` is raised: zero means fail immediately, *None* wait forever.
+        *vobs* is an iterable of known VOB tags, used to recognize element paths. *limits* maps VOB
+        tags to *(max_in_flight, rate, burst)* tuples that override the defaults for that VOB.
+
+        """
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.limits = dict(limits)
+        self._vobs = []
+        self._gates = {}
+        self._cond = threading.Condition()
+        for v in vobs:
+            self.addVob(v)
+        for v in self.limits:
+            self.addVob(v)
+
+    def addVob(self, tag):
+        r"""Add *tag* to the known VOB tags."""
+        comps = _components(tag)
+        if comps and ( tag, comps ) not in self._vobs:
+            self._vobs.append(( tag, comps ))
+            self._vobs.sort(key=lambda v: -len(v[1]))
+
+    def vobOf(self, cmd, cwd=None):
+        r"""
+        Return the tag of the VOB command line *cmd* refers to, or *None* if unknown. Relative
+        paths are resolved against *cwd*, if known.
+
+        """
+        m = _selector_re.search(cmd)
+        if m:
+            return self._known(m.group(1)) or m.group(1)
+        for t in _token_re.finditer(cmd):
+            token = t.group(1) or t.group(2) or t.group(3)
+            if token.startswith("-"):
+                continue
+            tag = self._match(token.split("@@")[0])
+            if tag:
+                return tag
+        if cwd is not None:
+            return self._match(cwd)
+        return None
+
+    def _known(self, tag):
+        comps = _components(tag)
+        for t, c in self._vobs:
+            if c == comps:
+                return t
+        return None
+
+    def _match(self, path):
+        comps = _components(path)
+        for tag, tc in self._vobs:
+            n = len(tc)
+            for i in range(len(comps) - n + 1):
+                if comps[i:i+n] == tc:
+                    return tag
+        return None
+
+    def _gate(self, vob):
+        try:
+            return self._gates[vob]
+        except KeyError:
+            max_in_flight, rate, burst = self.limits.get(vob, ( self.max_in_flight, self.rate,
+                    self.burst ))
+            g = _Gate(max_in_flight, rate, burst)
+            self._gates[vob] = g
+            return g
+
+    def acquire(self, vob, cmd="", timeout=-1, token=None):
+        r"""
+        Wait for admission of a command on *vob*. *timeout* overrides the instance's default
+        when not negative. Raise :py:exc:`.Busy` on failure, or :py:exc:`.cleartool.Cancelled` if
+        *token*, a :py:class:`.cleartool.CancelToken`, is cancelled while waiting.
+
+        """
+        if timeout is not None and timeout < 0:
+            timeout = self.timeout
+        end = None if timeout is None else time.time() + timeout
+        with self._cond:
+            g = self._gate(vob)
+            while True:
+                now = time.time()
+                w = g.wait_time(now)
+                if w == 0:
+                    g.take()
+                    return
+                if token is not None:
+                    if token.cancelled:
+                        raise nxpy.ccase.cleartool.Cancelled(cmd)
+                    w = _poll if w is None else min(w, _poll)
+                if end is not None:
+                    left = end - now
+                    if left <= 0:
+                        raise Busy(vob, cmd)
+                    w = left if w is None else min(w, left)
+                self._cond.wait(w)
+
+    def release(self, vob):
+        r"""Signal the completion of a command on *vob*."""
+        with self._cond:
+            self._gate(vob).give()
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def admit(self, cmd, timeout=-1, cwd=None, token=None):
+        r"""
+        Context manager that holds an admission slot for command line *cmd*, executed from the
+        *cwd* directory. *timeout* and *token* are as for :py:meth:`.acquire`.
+
+        """
+        vob = self.vobOf(cmd, cwd)
+        self.acquire(vob, cmd, timeout, token)
+        try:
+            yield vob
+        finally:
+            self.release(vob)
+
+    def inFlight(self, vob=None):
+        r"""Return the number of commands currently running on *vob*."""
+        with self._cond:
+            g = self._gates.get(vob)
+            return g.in_flight if g else 0
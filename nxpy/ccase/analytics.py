@@ -0,0 +1,181 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Vectorized analysis of history events: churn, user activity and hot spots.
+
+Requires NumPy, which may be installed together with this package as the *analytics* extra.
+
+"""
+
+from __future__ import absolute_import
+
+import os.path
+
+import numpy as np
+import six
+
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+_strings = ( "user", "operation", "element", "branch" )
+
+
+class HistoryArrays(object):
+    r"""
+    History events as NumPy arrays: *time* holds seconds since the epoch, while *user*,
+    *operation*, *element*, *branch* and *directory* hold integer identifiers, which index the
+    lists returned by :py:meth:`.values`; *version* holds version numbers. Selections are
+    expressed as boolean masks, which all the queries accept.
+
+    """
+    def __init__(self, columns, tables):
+        r"""
+        *columns* maps column names to arrays of equal length, *tables* maps the names of the
+        string columns to the lists of their values.
+
+        """
+        self.columns = dict(columns)
+        self.tables = dict(tables)
+        self._index = {}
+        elements = tables["element"]
+        dirs = {}
+        index = np.empty(len(elements), dtype=np.int32)
+        for i, e in enumerate(elements):
+            index[i] = dirs.setdefault(os.path.dirname(e), len(dirs))
+        self.tables["directory"] = sorted(dirs, key=dirs.get)
+        self.columns["directory"] = index[columns["element"]]
+
+    @classmethod
+    def fromStore(cls, store):
+        r"""Create an instance from the current contents of a :py:class:`.history.HistoryStore`."""
+        columns = dict(( name, np.array(store.column(name)) )
+                for name in ( "time", "version" ) + _strings)
+        tables = dict(( name, list(store.values(name)) ) for name in _strings)
+        return cls(columns, tables)
+
+    def __len__(self):
+        return len(self.columns["time"])
+
+    def values(self, name):
+        r"""Return the list of strings referred to by the identifiers in column *name*."""
+        return self.tables[name]
+
+    def select(self, since=None, until=None, **criteria):
+        r"""
+        Return a boolean mask of the events that happened between *since* included and *until*
+        excluded and match all the *criteria*. These are keyword arguments named after the string
+        columns, whose value is either a string or a collection of strings.
+
+        """
+        mask = np.ones(len(self), dtype=bool)
+        t = self.columns["time"]
+        if since is not None:
+            mask &= t >= since
+        if until is not None:
+            mask &= t < until
+        for name, value in criteria.items():
+            if name not in self.tables:
+                raise ValueError("%s: unknown column" % name)
+            if isinstance(value, six.string_types):
+                value = ( value, )
+            index = self._lookup(name)
+            ids = [ index[v] for v in value if v in index ]
+            mask &= np.isin(self.columns[name], ids)
+        return mask
+
+    def _lookup(self, name):
+        try:
+            return self._index[name]
+        except KeyError:
+            index = dict(( v, i ) for i, v in enumerate(self.tables[name]))
+            self._index[name] = index
+            return index
+
+    def _ids(self, name, mask):
+        col = self.columns[name]
+        return col if mask is None else col[mask]
+
+    def counts(self, name, mask=None):
+        r"""
+        Return an array with the number of events for each identifier in string column *name*,
+        among those selected by *mask*.
+
+        """
+        return np.bincount(self._ids(name, mask), minlength=len(self.tables[name]))
+
+    def groupBy(self, name, mask=None):
+        r"""Return a dictionary that maps the values of column *name* to their event counts."""
+        counts = self.counts(name, mask)
+        values = self.tables[name]
+        return dict(( values[i], int(counts[i]) ) for i in np.flatnonzero(counts))
+
+    def distinct(self, name, other, mask=None):
+        r"""
+        Return a dictionary that maps the values of column *name* to the number of distinct
+        values of column *other* in their events, e.g. the number of elements changed by each user.
+
+        """
+        width = len(self.tables[other])
+        if width == 0:
+            return {}
+        keys = self._ids(name, mask).astype(np.int64) * width
+        pairs = np.unique(keys + self._ids(other, mask))
+        counts = np.bincount(pairs // width, minlength=len(self.tables[name]))
+        values = self.tables[name]
+        return dict(( values[i], int(counts[i]) ) for i in np.flatnonzero(counts))
+
+    def top(self, name, n=10, mask=None):
+        r"""
+        Return a list of the *n* values of column *name* with most events, as *(value, count)*
+        tuples in decreasing count order.
+
+        """
+        counts = self.counts(name, mask)
+        n = min(n, np.count_nonzero(counts))
+        if n <= 0:
+            return []
+        best = np.argpartition(-counts, n - 1)[:n]
+        best = best[np.lexsort(( best, -counts[best] ))]
+        values = self.tables[name]
+        return [ ( values[i], int(counts[i]) ) for i in best ]
+
+    def histogram(self, bucket=DAY, mask=None, name=None):
+        r"""
+        Count events in time buckets *bucket* seconds wide, aligned to multiples of *bucket*
+        since the epoch. Return an array of bucket start times and an array of counts; if *name*
+        is specified the counts array has one row per identifier in column *name*.
+
+        """
+        t = self._ids("time", mask)
+        if len(t) == 0:
+            shape = ( len(self.tables[name]), 0 ) if name else ( 0, )
+            return np.zeros(0), np.zeros(shape, dtype=np.int64)
+        b = np.floor(t / bucket).astype(np.int64)
+        first = b.min()
+        b -= first
+        width = int(b.max()) + 1
+        starts = ( first + np.arange(width) ) * float(bucket)
+        if name is None:
+            return starts, np.bincount(b, minlength=width)
+        rows = len(self.tables[name])
+        flat = np.bincount(self._ids(name, mask).astype(np.int64) * width + b,
+                minlength=rows * width)
+        return starts, flat.reshape(rows, width)
+
+    def churn(self, n=10, mask=None, operation="checkin"):
+        r"""Return the *n* elements with most events of kind *operation*, as for :py:meth:`.top`."""
+        selected = self.select(operation=operation)
+        return self.top("element", n, selected if mask is None else selected & mask)
+
+    def hotspots(self, n=10, mask=None):
+        r"""Return the *n* directories whose elements have most events, as for :py:meth:`.top`."""
+        return self.top("directory", n, mask)
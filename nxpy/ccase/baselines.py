@@ -0,0 +1,204 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Catalog of UCM baselines and of the dependencies between them.
+
+Baselines and the foundation baselines of streams are loaded in bulk, one *lsbl* and one
+*lsstream* query per project VOB, rather than by describing baselines one at a time. As
+baselines never change once created the resulting dependency graph is immutable, so closures
+are computed once and reused.
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import gzip
+import json
+
+
+Baseline = collections.namedtuple("Baseline", ( "name", "component", "stream", "depends_on" ))
+Baseline.__doc__ = r"""
+A baseline: its selector *name*, its *component* and *stream* selectors and the tuple of the
+selectors of the baselines it *depends_on*, which is empty unless it's a composite baseline.
+
+"""
+
+baseline_fmt = r"%Xn\t%[component]Xp\t%[bl_stream]Xp\t%[depends_on]Xp\n"
+r"""The *lsbl* format understood by :py:func:`.parse_baselines`."""
+
+stream_fmt = r"%Xn\t%[found_bls]Xp\n"
+r"""The *lsstream* format understood by :py:func:`.parse_foundations`."""
+
+
+def parse_baselines(out):
+    r"""Return a list of :py:class:`.Baseline` tuples parsed from *lsbl* output."""
+    result = []
+    for line in out.splitlines():
+        fields = line.split("\t")
+        if len(fields) != 4:
+            continue
+        result.append(Baseline(fields[0], fields[1], fields[2], tuple(fields[3].split())))
+    return result
+
+
+def parse_foundations(out):
+    r"""
+    Return a dictionary that maps stream selectors to the tuple of their foundation baselines,
+    parsed from *lsstream* output.
+
+    """
+    result = {}
+    for line in out.splitlines():
+        fields = line.split("\t")
+        if len(fields) == 2:
+            result[fields[0]] = tuple(fields[1].split())
+    return result
+
+
+def _closure(start, edges):
+    seen = set()
+    todo = list(edges.get(start, ()))
+    while todo:
+        n = todo.pop()
+        if n not in seen:
+            seen.add(n)
+            todo.extend(edges.get(n, ()))
+    seen.discard(start)
+    return frozenset(seen)
+
+
+class BaselineCatalog(object):
+    r"""
+    An immutable graph of *baselines*, a collection of :py:class:`.Baseline` tuples, together
+    with *foundations*, a dictionary that maps stream selectors to their foundation baselines.
+    Dependencies may refer to baselines not in the catalog, e.g. those of other project VOBs;
+    they take part in queries all the same.
+
+    """
+    _format_version = 1
+
+    def __init__(self, baselines=(), foundations=None):
+        self._baselines = collections.OrderedDict(( b.name, b ) for b in baselines)
+        self._foundations = dict(( s, tuple(f) ) for s, f in ( foundations or {} ).items())
+        self._depends = dict(( b.name, b.depends_on ) for b in self._baselines.values())
+        self._dependents = {}
+        for b in self._baselines.values():
+            for d in b.depends_on:
+                self._dependents.setdefault(d, []).append(b.name)
+        self._users = {}
+        for s, bls in self._foundations.items():
+            for b in bls:
+                self._users.setdefault(b, []).append(s)
+        self._members = {}
+        self._composites = {}
+
+    @classmethod
+    def load(cls, tool, pvobs):
+        r"""
+        Load the baselines and stream foundations of the project VOBs in *pvobs* by means of
+        *tool*, a :py:class:`.ClearTool`.
+
+        """
+        baselines = []
+        foundations = {}
+        for pvob in pvobs:
+            baselines.extend(parse_baselines(tool.lsbl(invob=pvob, fmt=baseline_fmt)))
+            foundations.update(parse_foundations(tool.lsstream(invob=pvob, fmt=stream_fmt)))
+        return cls(baselines, foundations)
+
+    def save(self, path):
+        r"""Write the catalog to *path* as gzip compressed JSON."""
+        data = { "version": self._format_version,
+                "baselines": [ list(b[:3]) + [ list(b.depends_on) ]
+                        for b in self._baselines.values() ],
+                "foundations": dict(( s, list(f) ) for s, f in self._foundations.items()) }
+        with gzip.open(path, "wb") as f:
+            f.write(json.dumps(data, separators=( ",", ":" )).encode("utf-8"))
+
+    @classmethod
+    def fromFile(cls, path):
+        r"""Read a catalog written by :py:meth:`.save`."""
+        with gzip.open(path, "rb") as f:
+            data = json.loads(f.read().decode("utf-8"))
+        if data.get("version") != cls._format_version:
+            raise ValueError("%s: unsupported catalog format" % path)
+        return cls([ Baseline(b[0], b[1], b[2], tuple(b[3])) for b in data["baselines"] ],
+                data["foundations"])
+
+    def __len__(self):
+        return len(self._baselines)
+
+    def __iter__(self):
+        return iter(self._baselines.values())
+
+    def __contains__(self, name):
+        return name in self._baselines
+
+    def __getitem__(self, name):
+        return self._baselines[name]
+
+    def streams(self):
+        r"""Return the list of the streams whose foundations are known."""
+        return list(self._foundations)
+
+    def foundation(self, stream):
+        r"""Return the tuple of the foundation baselines of *stream*."""
+        return self._foundations.get(stream, ())
+
+    def dependencies(self, name):
+        r"""Return the tuple of the baselines baseline *name* directly depends on."""
+        return self._depends.get(name, ())
+
+    def members(self, name):
+        r"""
+        Return the frozenset of all the baselines that make up composite baseline *name*,
+        directly or through other composite baselines.
+
+        """
+        try:
+            return self._members[name]
+        except KeyError:
+            return self._members.setdefault(name, _closure(name, self._depends))
+
+    def composites(self, name):
+        r"""Return the frozenset of all the composite baselines that include baseline *name*."""
+        try:
+            return self._composites[name]
+        except KeyError:
+            return self._composites.setdefault(name, _closure(name, self._dependents))
+
+    def includes(self, composite, name):
+        r"""Tell whether baseline *name* is a member of *composite*."""
+        return name in self.members(composite)
+
+    def components(self, name):
+        r"""
+        Return a dictionary that maps components to their baselines among baseline *name* and
+        its members. Members not in the catalog are left out.
+
+        """
+        result = {}
+        for n in ( name, ) + tuple(self.members(name)):
+            b = self._baselines.get(n)
+            if b is not None:
+                result[b.component] = n
+        return result
+
+    def builtOn(self, name):
+        r"""
+        Return the sorted list of the streams that have baseline *name* in their foundation,
+        directly or as a member of a composite baseline.
+
+        """
+        result = set()
+        for n in ( name, ) + tuple(self.composites(name)):
+            result.update(self._users.get(n, ()))
+        return sorted(result)
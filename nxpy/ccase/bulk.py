@@ -0,0 +1,245 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Resumable bulk execution of cleartool sub-commands over large sets of elements.
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import io
+import os
+import re
+import sys
+import threading
+import time
+
+import six
+from six.moves import queue
+
+import nxpy.ccase.cleartool
+
+
+Progress = collections.namedtuple("Progress", ( "done", "failed", "skipped", "total", "elapsed",
+        "throughput" ))
+Progress.__doc__ = r"""
+Progress report: items *done*, *failed* and *skipped* because already done, out of *total*; the
+*elapsed* time in seconds and the *throughput* in items per second.
+
+"""
+
+
+_already_done = {
+    "checkin": re.compile(r"is not checked out"),
+    "checkout": re.compile(r"is already checked out"),
+    "rmname": re.compile(r"No such file or directory"),
+    "uncheckout": re.compile(r"is not checked out"),
+}
+
+_quoted_re = re.compile(r"\"([^\"]+)\"")
+
+
+class BulkResult(object):
+    r"""Outcome of a :py:meth:`.BulkJob.run` invocation."""
+
+    def __init__(self):
+        self.done = []
+        r"""Items completed in this run."""
+        self.failed = collections.OrderedDict()
+        r"""Items that failed, mapped to the corresponding exception."""
+        self.skipped = 0
+        r"""Number of items skipped because they were found in the journal."""
+        self.aborted = False
+        r"""*True* if the run was stopped because of too many failures."""
+
+
+class BulkJob(object):
+    r"""
+    Runs a :py:class:`.ClearTool` sub-command over many elements, in batches distributed among the
+    sessions of a :py:class:`.pool.SessionPool`. Completed items are appended to a journal file, so
+    that a run interrupted by a crash or by a series of failures may be resumed by running the same
+    job again: items found in the journal are skipped.
+
+    cleartool keeps processing the other elements of a batch when one of them fails, so when a
+    batch fails the elements named in its error messages are considered failed and the others
+    done; if the errors cannot be attributed to specific elements the items are retried one at a
+    time. Errors stating that an item was already processed, e.g. that an element to be checked
+    in is not checked out, count as success. Failed items are not journaled and are thus
+    attempted again when the job is resumed.
+
+    """
+    def __init__(self, pool, command, items, journal, batch_size=50, options={}, progress=None,
+            max_failures=None, already_done=None):
+        r"""
+        *pool* provides the sessions; *command* is the name of the :py:class:`.ClearTool` method
+        to invoke, e.g. *"checkin"*, which receives each batch of *items* as positional arguments
+        and *options* as keyword arguments. *journal* is the path of the checkpoint file.
+        *progress* is an optional callable invoked with a :py:class:`.Progress` tuple after each
+        batch. If more than *max_failures* items fail the run is aborted. *already_done* is a
+        regular expression matching the errors that mean that an item needs no processing; it
+        defaults to a suitable one for *checkin*, *checkout*, *rmname* and *uncheckout*.
+
+        """
+        self.pool = pool
+        self.command = command
+        self.items = list(items)
+        self.journal = journal
+        self.batch_size = batch_size
+        self.options = options
+        self.progress = progress
+        self.max_failures = max_failures
+        if already_done is None:
+            already_done = _already_done.get(command)
+        elif isinstance(already_done, six.string_types):
+            already_done = re.compile(already_done)
+        self.already_done = already_done
+        self._lock = threading.Lock()
+
+    def completed(self):
+        r"""Return the set of items recorded in the journal."""
+        if not os.path.exists(self.journal):
+            return set()
+        with io.open(self.journal, encoding="utf-8") as f:
+            return set(l.rstrip("\n") for l in f if l.endswith("\n"))
+
+    def pending(self):
+        r"""Return the items that have not been completed yet, in their original order."""
+        done = self.completed()
+        return [ i for i in self.items if i not in done ]
+
+    def run(self):
+        r"""
+        Process the pending items and return a :py:class:`.BulkResult`. If an unexpected exception
+        is raised while processing a batch the run is stopped and the first such exception is
+        raised again once all the workers are done.
+
+        """
+        result = BulkResult()
+        todo = self.pending()
+        result.skipped = len(self.items) - len(todo)
+        batches = queue.Queue()
+        for i in range(0, len(todo), self.batch_size):
+            batches.put(todo[i:i+self.batch_size])
+        self._start = time.time()
+        errors = []
+        with io.open(self.journal, "a", encoding="utf-8") as journal:
+            if self._torn():
+                journal.write(u"\n")
+            workers = [ threading.Thread(target=self._work, args=( batches, journal, result,
+                    errors ))
+                    for i in range(min(self.pool.size, batches.qsize())) ]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+        if errors:
+            six.reraise(*errors[0])
+        return result
+
+    def _torn(self):
+        r"""Check whether the journal's last line was left incomplete by a crash."""
+        with io.open(self.journal, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def _work(self, batches, journal, result, errors):
+        while not result.aborted and not errors:
+            try:
+                batch = batches.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                with self.pool.session() as tool:
+                    done, failed = self._execute(tool, batch)
+            except Exception:
+                with self._lock:
+                    errors.append(sys.exc_info())
+                return
+            with self._lock:
+                for item in done:
+                    journal.write(six.text_type(item) + u"\n")
+                journal.flush()
+                result.done.extend(done)
+                result.failed.update(failed)
+                if self.max_failures is not None and len(result.failed) > self.max_failures:
+                    result.aborted = True
+                self._report(result)
+
+    def _done(self, err):
+        r"""Tell whether all the errors in *err* state that the item was already processed."""
+        lines = [ l for l in err.splitlines() if "Error:" in l ]
+        return bool(self.already_done and lines and all(self.already_done.search(l)
+                for l in lines))
+
+    def _blame(self, batch, e):
+        r"""
+        Split *batch* into done and failed items according to the error messages of *e*, a
+        :py:exc:`.cleartool.FailedCommand`. Return *None* if an error names no item.
+
+        """
+        items = dict(( os.path.normpath(six.text_type(i)), i ) for i in batch)
+        messages = collections.OrderedDict()
+        for line in ( e.stderr or "" ).splitlines():
+            if "Error:" not in line:
+                continue
+            named = [ items[n] for n in ( os.path.normpath(q) for q in _quoted_re.findall(line) )
+                    if n in items ]
+            if not named:
+                return None
+            for item in named:
+                messages.setdefault(item, []).append(line)
+        if not messages:
+            return None
+        failed = {}
+        for item, lines in messages.items():
+            err = "\n".join(lines)
+            if not self._done(err):
+                failed[item] = nxpy.ccase.cleartool.FailedCommand(e.command, err=err)
+        return [ i for i in batch if i not in failed ], failed
+
+    def _execute(self, tool, batch):
+        func = getattr(tool, self.command)
+        try:
+            func(*batch, **self.options)
+            return batch, {}
+        except nxpy.ccase.cleartool.FailedCommand:
+            e = sys.exc_info()[1]
+            if len(batch) == 1:
+                if self._done(e.stderr or ""):
+                    return batch, {}
+                return [], { batch[0]: e }
+            blamed = self._blame(batch, e)
+            if blamed is not None:
+                return blamed
+        done = []
+        failed = {}
+        for item in batch:
+            try:
+                func(item, **self.options)
+                done.append(item)
+            except nxpy.ccase.cleartool.FailedCommand:
+                e = sys.exc_info()[1]
+                if self._done(e.stderr or ""):
+                    done.append(item)
+                else:
+                    failed[item] = e
+        return done, failed
+
+    def _report(self, result):
+        if self.progress is None:
+            return
+        elapsed = time.time() - self._start
+        done = len(result.done)
+        self.progress(Progress(done, len(result.failed), result.skipped, len(self.items), elapsed,
+                done / elapsed if elapsed > 0 else 0.0))
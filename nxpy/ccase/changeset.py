@@ -0,0 +1,179 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Element to activity reverse index, built from UCM activity change sets.
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import gzip
+import json
+import os
+import time
+
+
+ChangeSetEntry = collections.namedtuple("ChangeSetEntry", ( "activity", "version", "time" ))
+ChangeSetEntry.__doc__ = r"""A version of an element contributed by an activity."""
+
+
+_batch_size = 100
+_describe_fmt = r"%On\t%Nd\t%Xn\n"
+
+
+def date_fields(date):
+    r"""
+    Split a *%Nd* formatted date, e.g. *20190312.154512*, into a tuple of year, month, day, hour,
+    minute and second. Raise :py:exc:`ValueError` if *date* is malformed.
+
+    """
+    return ( int(date[0:4]), int(date[4:6]), int(date[6:8]), int(date[9:11]), int(date[11:13]),
+            int(date[13:15]) )
+
+
+def parse_time(date):
+    r"""Convert a *%Nd* formatted date, e.g. *20190312.154512*, to seconds since the epoch."""
+    return int(time.mktime(date_fields(date) + ( 0, 0, -1 )))
+
+
+class ChangeSetIndex(object):
+    r"""
+    Maps elements, identified by path or OID, to the activities that changed them. The index is
+    filled incrementally by :py:meth:`.update`, which only examines activities not yet indexed,
+    and may be saved to and loaded from a gzip compressed JSON file. Queries never execute
+    cleartool commands.
+
+    """
+
+    _format_version = 1
+
+    def __init__(self, path=None):
+        r"""Create an empty index or, if *path* exists, load it from there."""
+        self.path = path
+        self._activities = []
+        self._act_ids = {}
+        self._elements = {}
+        self._oids = {}
+        if path is not None and os.path.exists(path):
+            self._read(path)
+
+    def _act_id(self, activity):
+        try:
+            return self._act_ids[activity]
+        except KeyError:
+            self._act_ids[activity] = len(self._activities)
+            self._activities.append(activity)
+            return self._act_ids[activity]
+
+    @property
+    def activities(self):
+        r"""The activities indexed so far."""
+        return list(self._activities)
+
+    def __contains__(self, activity):
+        return activity in self._act_ids
+
+    def add(self, activity, records):
+        r"""
+        Index the change set of *activity*. *records* is an iterable of *(oid, path, version,
+        time)* tuples, where *oid* may be *None*. Entries previously recorded for *activity* are
+        replaced.
+
+        """
+        self.remove(activity)
+        a = self._act_id(activity)
+        for oid, path, version, time_ in records:
+            self._elements.setdefault(path, []).append(( a, version, time_ ))
+            if oid:
+                self._oids[oid] = path
+
+    def remove(self, activity):
+        r"""Remove the entries contributed by *activity*, which remains known to the index."""
+        a = self._act_ids.get(activity)
+        if a is None:
+            return
+        for path in list(self._elements.keys()):
+            entries = [ e for e in self._elements[path] if e[0] != a ]
+            if entries:
+                self._elements[path] = entries
+            else:
+                del self._elements[path]
+
+    def update(self, tool, stream, rescan=()):
+        r"""
+        Index the activities of *stream* that are not yet known, using *tool*, a
+        :py:class:`.ClearTool` instance. The activities in *rescan* are indexed again, e.g.
+        because they are still open. Return the list of activities examined.
+
+        """
+        rescan = set(rescan)
+        acts = [ a for a in tool.lsactivity(in_stream=stream, fmt=r"%Xn\n").splitlines() if a ]
+        todo = [ a for a in acts if a not in self._act_ids or a in rescan ]
+        for a in todo:
+            self.add(a, self._fetch(tool, a))
+        return todo
+
+    def _fetch(self, tool, activity):
+        out = tool.describe(activity, fmt=r"%[versions]Cp")
+        versions = [ v.strip() for v in out.split(",") if v.strip() ]
+        records = []
+        for i in range(0, len(versions), _batch_size):
+            args = []
+            for v in versions[i:i+_batch_size]:
+                args.append("\"%s@@\"" % v.split("@@")[0])
+                args.append("\"%s\"" % v)
+            lines = [ l for l in tool.describe(*args, fmt=_describe_fmt).splitlines() if l ]
+            for elem, ver in zip(lines[0::2], lines[1::2]):
+                oid = elem.split("\t", 2)[0]
+                date, xname = ver.split("\t", 2)[1:]
+                path, version = xname.split("@@", 1)
+                records.append(( oid, path, version, parse_time(date) ))
+        return records
+
+    def history(self, element):
+        r"""
+        Return the list of :py:class:`.ChangeSetEntry` tuples for *element*, given as path or OID,
+        ordered by time.
+
+        """
+        path = self._oids.get(element, element)
+        entries = sorted(self._elements.get(path, ()), key=lambda e: e[2])
+        return [ ChangeSetEntry(self._activities[a], v, t) for a, v, t in entries ]
+
+    def last(self, element):
+        r"""Return the most recent :py:class:`.ChangeSetEntry` for *element*, or *None*."""
+        h = self.history(element)
+        return h[-1] if h else None
+
+    def elements(self, activity):
+        r"""Return the paths of the elements changed by *activity*."""
+        a = self._act_ids.get(activity)
+        return sorted(p for p, entries in self._elements.items() if any(e[0] == a for e in entries))
+
+    def save(self, path=None):
+        r"""Write the index to *path*, or to the path it was loaded from."""
+        path = path or self.path
+        data = { "version": self._format_version, "activities": self._activities,
+                "elements": self._elements, "oids": self._oids }
+        with gzip.open(path, "wb") as f:
+            f.write(json.dumps(data, separators=( ",", ":" )).encode("utf-8"))
+        self.path = path
+
+    def _read(self, path):
+        with gzip.open(path, "rb") as f:
+            data = json.loads(f.read().decode("utf-8"))
+        if data.get("version") != self._format_version:
+            raise ValueError("%s: unsupported index format" % path)
+        self._activities = data["activities"]
+        self._act_ids = dict(( a, i ) for i, a in enumerate(self._activities))
+        self._elements = dict(( p, [ tuple(e) for e in entries ] )
+                for p, entries in data["elements"].items())
+        self._oids = data["oids"]
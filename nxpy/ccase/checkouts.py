@@ -0,0 +1,194 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Checkout inventory, built from *lscheckout* output and indexed for fast queries.
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import os.path
+
+import nxpy.ccase.changeset
+
+
+Checkout = collections.namedtuple("Checkout", ( "path", "version", "user", "view", "activity",
+        "reserved", "time" ))
+Checkout.__doc__ = r"""
+A checked out element: its *path*, the checked out *version*, e.g. */main/dev/CHECKEDOUT*, the
+*user* and *view* tag that own the checkout, the *activity* selector, empty outside UCM, whether
+the checkout is *reserved* and its *time* in seconds since the epoch.
+
+"""
+
+
+_fmt = r"%En\t%Vn\t%u\t%Tf\t%[activity]Xp\t%Rf\t%Nd\n"
+_batch_size = 100
+
+
+def parse_checkouts(out):
+    r"""Return the list of :py:class:`.Checkout` tuples described by *lscheckout* output."""
+    records = []
+    for line in out.splitlines():
+        fields = line.split("\t")
+        if len(fields) != 7:
+            continue
+        path, version, user, view, activity, reserved, date = fields
+        records.append(Checkout(path, version, user, view, activity, reserved == "reserved",
+                nxpy.ccase.changeset.parse_time(date)))
+    return records
+
+
+def list_checkouts(tool, *paths, **options):
+    r"""
+    Return the list of :py:class:`.Checkout` tuples reported by *lscheckout* for *paths*, by
+    means of *tool*, a :py:class:`.ClearTool`; *options* are passed on to
+    :py:meth:`.ClearTool.lscheckout`.
+
+    """
+    return parse_checkouts(tool.lscheckout(*paths, fmt=_fmt, **options))
+
+
+def _below(path, directory):
+    if path == directory:
+        return True
+    directory = directory.rstrip("/\\")
+    return path.startswith(directory) and path[len(directory):len(directory)+1] in ( "/", "\\" )
+
+
+class CheckoutIndex(object):
+    r"""
+    Maps users, views, activities and directories to the checkouts they own or contain. The index
+    is filled by :py:meth:`.load` and may be refreshed one subtree at a time by
+    :py:meth:`.refresh`. Queries never execute cleartool commands.
+
+    """
+    def __init__(self, records=()):
+        r"""Create an index containing the :py:class:`.Checkout` tuples in *records*."""
+        self._clear()
+        for r in records:
+            self.add(r)
+
+    def _clear(self):
+        self._checkouts = {}
+        self._users = {}
+        self._views = {}
+        self._activities = {}
+        self._dirs = {}
+
+    def _keys(self, c):
+        return ( ( self._users, c.user ), ( self._views, c.view ),
+                ( self._activities, c.activity ), ( self._dirs, os.path.dirname(c.path) ) )
+
+    def add(self, checkout):
+        r"""Add *checkout*, a :py:class:`.Checkout`, replacing any for the same path and view."""
+        key = ( checkout.path, checkout.view )
+        self.discard(*key)
+        self._checkouts[key] = checkout
+        for d, k in self._keys(checkout):
+            d.setdefault(k, set()).add(key)
+
+    def discard(self, path, view=None):
+        r"""Remove the checkouts of *path*, only those in *view* if it is specified."""
+        if view is not None:
+            keys = [ ( path, view ) ] if ( path, view ) in self._checkouts else []
+        else:
+            keys = [ k for k in self._dirs.get(os.path.dirname(path), ()) if k[0] == path ]
+        for key in keys:
+            c = self._checkouts.pop(key)
+            for d, k in self._keys(c):
+                d[k].discard(key)
+                if not d[k]:
+                    del d[k]
+
+    def load(self, tool, **options):
+        r"""
+        Replace the contents of the index with the checkouts in all the VOBs, as seen by *tool*, a
+        :py:class:`.ClearTool`. *options* are passed on to :py:meth:`.ClearTool.lscheckout`, e.g.
+        *me=True* or *cview=True*.
+
+        """
+        records = list_checkouts(tool, avobs=True, **options)
+        self._clear()
+        for r in records:
+            self.add(r)
+        return records
+
+    def refresh(self, tool, paths, **options):
+        r"""
+        Scan again the checkouts below each of *paths*, replacing the ones indexed there, by means
+        of *tool*. *options* are as for :py:meth:`.load`. Return the checkouts found.
+
+        """
+        paths = list(paths)
+        for p in paths:
+            for c in self.below(p):
+                self.discard(c.path, c.view)
+        records = []
+        for i in range(0, len(paths), _batch_size):
+            args = [ "\"%s\"" % p for p in paths[i:i+_batch_size] ]
+            records.extend(list_checkouts(tool, *args, recurse=True, **options))
+        for r in records:
+            self.add(r)
+        return records
+
+    def _select(self, d, key):
+        return sorted(( self._checkouts[k] for k in d.get(key, ()) ), key=lambda c: c.path)
+
+    def byUser(self, user):
+        r"""Return the checkouts owned by *user*, ordered by path."""
+        return self._select(self._users, user)
+
+    def byView(self, view):
+        r"""Return the checkouts in the view tagged *view*, ordered by path."""
+        return self._select(self._views, view)
+
+    def byActivity(self, activity):
+        r"""Return the checkouts made under *activity*, ordered by path."""
+        return self._select(self._activities, activity)
+
+    def inDirectory(self, directory):
+        r"""Return the checkouts of the elements contained in *directory*, ordered by path."""
+        return self._select(self._dirs, directory)
+
+    def below(self, directory):
+        r"""Return the checkouts of *directory* and of all the elements below it, by path."""
+        parent = os.path.dirname(directory.rstrip("/\\"))
+        keys = []
+        for d, k in self._dirs.items():
+            if d == parent or _below(d, directory):
+                keys.extend(k)
+        return sorted(( self._checkouts[k] for k in keys if _below(k[0], directory) ),
+                key=lambda c: c.path)
+
+    @property
+    def users(self):
+        r"""The users that own checkouts."""
+        return sorted(self._users)
+
+    @property
+    def views(self):
+        r"""The views that contain checkouts."""
+        return sorted(self._views)
+
+    @property
+    def activities(self):
+        r"""The activities with checkouts, excluding the empty one for non UCM checkouts."""
+        return sorted(a for a in self._activities if a)
+
+    def __len__(self):
+        return len(self._checkouts)
+
+    def __iter__(self):
+        return iter(sorted(self._checkouts.values()))
+
+    def __contains__(self, path):
+        return any(k[0] == path for k in self._dirs.get(os.path.dirname(path), ()))
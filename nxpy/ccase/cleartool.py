@@ -15,11 +15,22 @@ Implemented by driving interactively the cleartool program.
 
 from __future__ import absolute_import
 
+import collections
+import contextlib
+import functools
+import os
+import os.path
 import re
+import select
+import subprocess
 import sys
+import threading
+import time
 
+import nxpy.command.error
 import nxpy.command.interpreter
 import nxpy.command.option
+import nxpy.core.nonblocking_subprocess
 
 
 class ClearToolError(Exception):
@@ -42,18 +53,171 @@ class FailedCommand(nxpy.command.interpreter.BadCommand, ClearToolError):
         super(FailedCommand, self).__init__(cmd, "\n".join(message))
 
 
+class SessionDied(FailedCommand):
+    r"""Raised when the interpreter process terminates while a command is being executed."""
+
+    def __init__(self, cmd):
+        super(SessionDied, self).__init__(cmd, err="cleartool terminated unexpectedly")
+
+
+class Cancelled(ClearToolError):
+    r"""Raised when a command is abandoned because its cancellation token was triggered."""
+
+    def __init__(self, cmd, message="Command cancelled"):
+        self.command = cmd
+        super(Cancelled, self).__init__("%s: %s" % ( message, cmd ))
+
+
+class DeadlineExceeded(Cancelled):
+    r"""Raised when a command is abandoned because its deadline expired."""
+
+    def __init__(self, cmd):
+        super(DeadlineExceeded, self).__init__(cmd, "Deadline exceeded")
+
+
+class SessionBusy(ClearToolError):
+    r"""
+    Raised when a command is issued while the interpreter is still executing an abandoned command
+    and couldn't be restarted, because no factory is available.
+
+    """
+    def __init__(self, cmd, pending):
+        self.command = cmd
+        self.pending = pending
+        super(SessionBusy, self).__init__("Still executing abandoned command %s: %s" % ( pending,
+                cmd ))
+
+
+class CancelToken(object):
+    r"""
+    Allows a command to be abandoned from a different thread. The same token may be shared by
+    several :py:class:`.ClearTool` instances.
+
+    """
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        r"""Request cancellation of the commands that use this token."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        r"""*True* if cancellation was requested."""
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        r"""Wait for cancellation for at most *timeout* seconds; return whether it happened."""
+        return self._event.wait(timeout)
+
+
+class LineWatcher(object):
+    r"""
+    Adapts a *callback* that takes one line of output at a time, without line terminator, for use
+    with :py:meth:`.ClearTool.watch`. Result trailers are not passed on.
+    
+    """
+    _trailer_re = re.compile(r"^Command \d+ returned status \d+$")
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.buffer = ""
+
+    def __call__(self, chunk):
+        lines = ( self.buffer + chunk ).split("\n")
+        self.buffer = lines.pop()
+        for l in lines:
+            l = l.rstrip("\r")
+            if not self._trailer_re.match(l):
+                self.callback(l)
+
+    def flush(self):
+        r"""Pass on the last line, if it wasn't terminated."""
+        if self.buffer:
+            l, self.buffer = self.buffer.rstrip("\r"), ""
+            if not self._trailer_re.match(l):
+                self.callback(l)
+
+
+def _plain_path(arg):
+    r"""
+    Return command line argument *arg* without the quotes that may surround it, or *None* if it
+    isn't a single path.
+
+    """
+    if len(arg) > 1 and arg[0] == arg[-1] and arg[0] in "\"'":
+        arg = arg[1:-1]
+    elif any(c.isspace() for c in arg):
+        return None
+    if "\"" in arg or "'" in arg:
+        return None
+    return arg
+
+
+def _quoted(path):
+    r"""Return *path* quoted for use on the command line if it contains spaces."""
+    return "\"%s\"" % path if any(c.isspace() for c in path) else path
+
+
+class _Relay(object):
+    r"""Passes output on to *watcher*, remembering whether any was passed."""
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+        self.used = False
+
+    def __call__(self, chunk):
+        self.used = True
+        self.watcher(chunk)
+
+
+class _ResultWaiter(object):
+    r"""
+    Waits for the cleartool result trailer, which may be split across chunks of output, while
+    checking for cancellation and deadline expiration.
+
+    """
+    def __init__(self, regexp, cmd, deadline=None, token=None, watcher=None, popen=None):
+        self.regexp = regexp
+        self.cmd = cmd
+        self.deadline = deadline
+        self.token = token
+        self.watcher = watcher
+        self.popen = popen
+        self.tail = ""
+
+    def __call__(self, out, err):
+        if out:
+            if self.watcher is not None:
+                self.watcher(out)
+            text = self.tail + out
+            self.tail = text[-64:]
+            m = self.regexp.search(text)
+            if m:
+                return m
+        if self.token is not None and self.token.cancelled:
+            raise Cancelled(self.cmd)
+        if self.deadline is not None and time.time() > self.deadline:
+            raise DeadlineExceeded(self.cmd)
+        if not out and self.popen is not None and self.popen.poll() is not None:
+            raise SessionDied(self.cmd)
+        return None
+
+
+_null_log = "-log " + ( "NUL" if sys.platform == "win32" else "/dev/null" )
+
 _config = nxpy.command.option.Config(
 
     prefix="-",
 
     # boolean options, which appear on the command line without arguments.
-    bool_opts=("cact", "cview", "eventid", "force", "identical", "keep", "long", "me", "nco",
-            "none", "nxn", "preview", "print_report", "recurse", "short", "slink",
-            "visible", "vob_only"),
+    bool_opts=("all", "avobs", "cact", "cview", "directory", "eventid", "flatest", "force",
+            "identical", "keep", "long", "me", "merge", "nco", "none", "nxn", "preview",
+            "print_report", "recurse", "replace", "short", "slink", "visible", "vob_only"),
 
     # Options with an associated value
-    value_opts=("activity", "comment", "in_stream", "invob", "log", "proj",
-            "stream", "target", "to", "user", "view"),
+    value_opts=("activity", "branch", "comment", "component", "ftag", "fversion", "in_stream",
+            "invob", "log", "proj", "since", "stream", "target", "to", "user", "version", "view"),
 
     # Options with multiple arguments, separated by commas.
     iterable_opts=("activities", ),
@@ -62,11 +226,11 @@ _config = nxpy.command.option.Config(
     format_opts={"fmt": "\"%s\""},
 
     # Options whose name must be translated, e.g. because it is not a valid identifier.
-    mapped_opts={"in_stream": "-in", "nolog": "-log NUL", "print_report": "-print", "proj": "-in"},
+    mapped_opts={"in_stream": "-in", "nolog": _null_log, "print_report": "-print", "proj": "-in"},
 
     # Boolean options that are expressed by the lack of an opposite command line option
     opposite_opts={"activity": "-none", "checkout": "-nco -force", "comment": "-nc", "keep": "-rm",
-            "log": "-log NUL"}
+            "log": _null_log}
 
     )
 
@@ -74,6 +238,221 @@ _config = nxpy.command.option.Config(
 command_line = "cleartool -status"
 
 
+class UnbufferedInterpreter(nxpy.command.interpreter.Interpreter):
+    r"""
+    An interpreter whose output pipes are not buffered, so that output that was already read
+    from a pipe is never held back while waiting for more to arrive.
+
+    """
+    def __init__(self, cmd):
+        nxpy.command.interpreter.BaseInterpreter.__init__(self,
+                nxpy.core.nonblocking_subprocess.NonblockingPopen(cmd.split(), bufsize=0,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE))
+
+
+class CommandSpec(object):
+    r"""
+    Declarative description of a cleartool sub-command, compiled once into a fast command line
+    builder that performs the same validation as :py:class:`.command.option.Parser`.
+    
+    """
+    def __init__(self, name, command=None, defaults=(), exclusive=(), exactly_one=(),
+            not_with_args=(), one_or_args=(), min_args=0, max_args=None, run={}, full=False,
+            readonly=False, doc=None):
+        r"""
+        *name* is the name of the corresponding :py:class:`.ClearTool` method and *command* the
+        sub-command with its fixed options, defaulting to *name*. *defaults* is a sequence of
+        *(option, default)* pairs listing the supported options. *exclusive* and *exactly_one* are
+        sequences of groups of options among which at most and exactly one, respectively, may be
+        specified; *not_with_args* and *one_or_args* are options that may not be combined with
+        arguments, or that must be specified if and only if no arguments are. *min_args* and
+        *max_args* bound the number of arguments. *run* holds keyword arguments for the
+        interpreter; if *full* is *True* the generated method returns output, error and command
+        line rather than just the output. *readonly* tells whether the sub-command leaves the
+        repository unchanged, so that it may safely be retried. *doc* is the generated method's
+        docstring.
+        
+        """
+        self.name = name
+        self.command = command or name
+        self.defaults = tuple(defaults)
+        self.exclusive = tuple(tuple(g) for g in exclusive)
+        self.exactly_one = tuple(tuple(g) for g in exactly_one)
+        self.not_with_args = tuple(not_with_args)
+        self.one_or_args = tuple(one_or_args)
+        self.min_args = min_args
+        self.max_args = max_args
+        self.run = dict(run)
+        self.full = full
+        self.readonly = readonly
+        self.doc = doc
+        self._compile(_config)
+
+    def _compile(self, config):
+        self._valid = frozenset(o for o, d in self.defaults)
+        self._initial = dict(self.defaults)
+        renderers = []
+        for opt, default in self.defaults:
+            if opt in config.opts:
+                flag = config.prefix + opt
+            else:
+                flag = config.mapped_opts.get(opt)
+            if opt in config.value_opts:
+                kind = 1
+            elif opt in config.iterable_opts:
+                kind = 2
+            elif opt in config.format_opts:
+                kind = 3
+            else:
+                kind = 0
+            renderers.append(( opt, flag, kind, config.format_opts.get(opt),
+                    config.opposite_opts.get(opt) ))
+        self._renderers = tuple(renderers)
+        self._separator = config.separator
+
+    def build(self, args, options):
+        r"""
+        Validate *args* and *options* and return the command line. Raise
+        :py:exc:`.InvalidArgument` or :py:exc:`.command.option.InvalidOptionError` on errors.
+        
+        """
+        if len(args) < self.min_args:
+            if self.min_args == 1:
+                raise InvalidArgument("At least one element must be specified")
+            raise InvalidArgument("At least %d arguments must be specified" % self.min_args)
+        if self.max_args is not None and len(args) > self.max_args:
+            raise InvalidArgument("%s: at most %d arguments may be specified" % ( self.name,
+                    self.max_args ))
+        if options:
+            invalid = set(options).difference(self._valid)
+            if invalid:
+                raise nxpy.command.option.InvalidOptionError(", ".join(invalid) +
+                        ": invalid option(s)")
+            values = dict(self._initial)
+            values.update(options)
+        else:
+            values = self._initial
+        for group in self.exclusive:
+            if sum(1 for o in group if values[o]) > 1:
+                raise nxpy.command.option.InvalidOptionError(", ".join(group) +
+                        ": mutually exclusive options")
+        for group in self.exactly_one:
+            if sum(1 for o in group if values[o]) != 1:
+                raise nxpy.command.option.InvalidOptionError(", ".join(group) +
+                        ": only one among these options should be specified")
+        if self.not_with_args and args and any(values[o] for o in self.not_with_args):
+            raise nxpy.command.option.InvalidOptionError(", ".join(self.not_with_args) +
+                    ": This/these option(s) is/are invalid when arguments are specified")
+        if self.one_or_args and ( any(values[o] for o in self.one_or_args) +
+                bool(args) ) != 1:
+            raise nxpy.command.option.InvalidOptionError(", ".join(self.one_or_args) +
+                    ": This/these option(s) is/are mutually exclusive with arguments")
+        line = [ self.command ]
+        for opt, flag, kind, fmt, opposite in self._renderers:
+            value = values[opt]
+            if value:
+                if flag:
+                    line.append(flag)
+                if kind == 1:
+                    line.append(value)
+                elif kind == 2:
+                    line.append(self._separator.join(value))
+                elif kind == 3:
+                    line.append(fmt % value)
+            elif opposite:
+                line.append(opposite)
+        line.extend(args)
+        return " ".join(line)
+
+
+commands = collections.OrderedDict((s.name, s) for s in (
+    CommandSpec("checkin", defaults=( ( "comment", "" ), ( "identical", False ) ), min_args=1),
+    CommandSpec("checkout", "checkout -nq", ( ( "comment", "" ), ), min_args=1),
+    CommandSpec("deliver", defaults=( ( "activities", () ), ( "cact", False ), ( "long", False ),
+            ( "preview", False ), ( "short", False ), ( "stream", "" ), ( "target", "" ),
+            ( "to", "" ) ), exclusive=( ( "activities", "cact" ), ( "long", "short" ) ),
+            max_args=0, run={ "raise_on_error": False }, full=True),
+    CommandSpec("describe", defaults=( ( "fmt", "" ), ( "short", False ) ),
+            exclusive=( ( "fmt", "short" ), ), readonly=True),
+    CommandSpec("findmerge", defaults=( ( "avobs", False ), ( "directory", False ),
+            ( "ftag", "" ), ( "fversion", "" ), ( "flatest", False ), ( "log", "" ),
+            ( "print_report", False ), ( "merge", False ) ),
+            exactly_one=( ( "ftag", "fversion", "flatest" ), ( "print_report", "merge" ) ),
+            one_or_args=( "avobs", ), run={ "raise_on_error": False, "interval": 0.1 },
+            full=True, doc=r"""
+        Return output, error and command line, as errors concerning single elements don't stop
+        the search. Unless *log* is specified no log file is written.
+
+        """),
+    CommandSpec("get", "get -to", min_args=2, max_args=2),
+    CommandSpec("ln", defaults=( ( "checkout", True ), ( "comment", False ), ( "slink", True ) )),
+    CommandSpec("ls", defaults=( ( "long", False ), ( "nxn", True ), ( "short", True ),
+            ( "visible", False ), ( "vob_only", False ) ), readonly=True),
+    CommandSpec("lsactivity", defaults=( ( "cact", False ), ( "fmt", "" ), ( "long", False ),
+            ( "me", False ), ( "short", False ), ( "in_stream", "" ), ( "invob", "" ),
+            ( "user", "" ), ( "view", "" ) ),
+            exclusive=( ( "in_stream", "cact", "user", "me" ), ( "in_stream", "invob" ),
+            ( "fmt", "long", "short" ) ), run={ "interval": 0.1 }, readonly=True, doc=r"""
+        Note: *fmt=r"%[versions]p\n"* causes a race condition with activities that have a large
+        number of contribuents.
+
+        """),
+    CommandSpec("lsbl", defaults=( ( "component", "" ), ( "stream", "" ), ( "invob", "" ),
+            ( "fmt", "" ), ( "long", False ), ( "short", False ) ),
+            exclusive=( ( "stream", "invob" ), ( "fmt", "long", "short" ) ), readonly=True),
+    CommandSpec("lscheckout", defaults=( ( "avobs", False ), ( "cview", False ), ( "me", False ),
+            ( "user", "" ), ( "recurse", False ), ( "fmt", "" ), ( "short", False ) ),
+            exclusive=( ( "me", "user" ), ( "avobs", "recurse" ), ( "fmt", "short" ) ),
+            not_with_args=( "avobs", ), readonly=True),
+    CommandSpec("lshistory", defaults=( ( "all", False ), ( "eventid", False ), ( "fmt", "" ),
+            ( "long", False ), ( "nco", False ), ( "recurse", False ), ( "since", "" ),
+            ( "branch", "" ) ),
+            exclusive=( ( "fmt", "long" ), ( "all", "nco" ) ), min_args=1, max_args=1,
+            readonly=True),
+    CommandSpec("lsproject", defaults=( ( "cview", False ), ( "view", "" ), ( "invob", "" ),
+            ( "fmt", "" ) ), exactly_one=( ( "cview", "view", "invob" ), ), max_args=0,
+            readonly=True),
+    CommandSpec("lsstream", defaults=( ( "view", "" ), ( "proj", "" ), ( "invob", "" ),
+            ( "fmt", "" ) ), exclusive=( ( "view", "proj", "invob" ), ), max_args=0,
+            readonly=True),
+    CommandSpec("lsview", defaults=( ( "cview", False ), ( "short", False ) ),
+            not_with_args=( "cview", ), readonly=True),
+    CommandSpec("lsvob", defaults=( ( "short", False ), ), max_args=0, readonly=True),
+    CommandSpec("mklabel", defaults=( ( "replace", False ), ( "recurse", False ),
+            ( "version", "" ), ( "comment", "" ) ), min_args=2, doc=r"""
+        Attach the label type given as first argument to the elements that follow.
+
+        """),
+    CommandSpec("mv", defaults=( ( "comment", "" ), )),
+    CommandSpec("rmname", defaults=( ( "checkout", True ), ( "comment", "" ) )),
+    CommandSpec("setactivity", defaults=( ( "none", False ), ( "view", "" ) ),
+            one_or_args=( "none", ), max_args=1),
+    CommandSpec("uncheckout", defaults=( ( "keep", False ), )),
+    CommandSpec("update", defaults=( ( "print_report", False ), ( "force", False ),
+            ( "nolog", False ), ( "log", "" ) ), exclusive=( ( "log", "nolog" ), ), max_args=0,
+            run={ "raise_on_error": False, "timeout": 300, "interval": 0.5, "quantum": 0.5 }),
+    ))
+r"""The registry of sub-command specifications, by :py:class:`.ClearTool` method name."""
+
+
+def _recorded(func):
+    r"""Makes calls to a sub-command method visible to the :py:class:`.ClearTool`'s recorder."""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.recorder is None or self._call is not None:
+            return func(self, *args, **kwargs)
+        return self.recorder.call(self, func, args, kwargs)
+    return wrapper
+
+
+SessionState = collections.namedtuple("SessionState", ( "cwd", "activity", "view" ))
+SessionState.__doc__ = r"""
+The session state known to a :py:class:`.ClearTool` instance: its current directory, the current
+activity and the tag of the current view. Unknown values are *None*.
+
+"""
+
+
 class ClearTool(object):
     r"""
     Allows manipulation of ClearCase UCM projects by driving the  cleartool utility in a
@@ -85,164 +464,523 @@ class ClearTool(object):
     
     """
     _result_re = re.compile(r"Command \d+ returned status (\d)\r\n")
+    _raw_result_re = re.compile(br"Command \d+ returned status (\d+)\r\n")
+    _raw_read_size = 65536
 
-    def __init__(self, cmd=None, log=False):
+    def __init__(self, cmd=None, log=False, admission=None, factory=None, recorder=None,
+            retries=0, stall=None):
         r"""
         Create a *cleartool* interpreter.
         
         *cmd* is an optional :py:class:`.command.interpreter.Interpreter` instance, used mainly to
         supply an alternative implementation for tests; *log* is an optional logging destination.
+        *admission* is an optional :py:class:`.admission.Admission` instance, which may be shared
+        with other *ClearTool* instances in order to limit the load placed on each VOB.
+        *factory* is an optional callable that returns a new interpreter, used by
+        :py:meth:`.restart`; it defaults to one that executes *cleartool* when *cmd* is not given.
+        *recorder* is an optional :py:class:`.replay.Recorder` instance which captures all the
+        sub-command calls.
+
+        If the interpreter process is found dead it is restarted before the next command. Read-only
+        sub-commands interrupted because the interpreter died, or because it produced no output for
+        *stall* seconds, are retried on a restarted interpreter up to *retries* times, unless part
+        of their output was already passed to a :py:meth:`.watch` callback.
         
         """
+        if factory is None and cmd is None:
+            factory = ClearTool._interpreter
+        self._factory = factory
+        self._log = log
         if cmd is not None:
             self.cmd = cmd
         else:
-            self.cmd = nxpy.command.interpreter.Interpreter(command_line)
+            self.cmd = factory()
         self.cmd.setLog(log)
+        self.admission = admission
+        self._deadline = None
+        self._token = None
+        self._watcher = None
+        self._streaming = False
+        self._raw = False
+        self.recorder = recorder
+        self._call = None
+        self.retries = retries
+        self.stall = stall
+        self._pending = None
+        self._clearState()
+
+    def _clearState(self):
+        self._cd = None
+        self._cwd = None
+        self._activities = {}
+        self._cview = None
+
+    @property
+    def state(self):
+        r"""
+        A :py:class:`.SessionState` describing the session as tracked locally, without running
+        any command.
+        
+        """
+        activity = self._activities.get("")
+        view = None
+        if self._cview:
+            view = self._cview.lstrip("* ").split()[0]
+        return SessionState(self._cwd, activity[0] if activity else None, view)
+
+    @staticmethod
+    def _interpreter():
+        return UnbufferedInterpreter(command_line)
+
+    @contextlib.contextmanager
+    def limit(self, timeout=None, token=None):
+        r"""
+        Context manager that bounds the commands executed within it. Commands still running
+        *timeout* seconds after entering the context raise :py:exc:`.DeadlineExceeded`; those
+        running when *token*, a :py:class:`.CancelToken`, is cancelled raise :py:exc:`.Cancelled`.
+        In both cases the interpreter is restarted, so that the instance remains usable; if it
+        cannot be restarted, further commands raise :py:exc:`.SessionBusy` until the abandoned
+        one completes. Waits for admission are bounded in the same way. Nested contexts may only
+        shorten the enclosing deadline.
+        
+        """
+        old_deadline, old_token = self._deadline, self._token
+        if timeout is not None:
+            deadline = time.time() + timeout
+            if self._deadline is None or deadline < self._deadline:
+                self._deadline = deadline
+        if token is not None:
+            self._token = token
+        try:
+            yield self
+        finally:
+            self._deadline, self._token = old_deadline, old_token
+
+    @contextlib.contextmanager
+    def watch(self, callback, stream=False):
+        r"""
+        Context manager that passes to *callback* each chunk of output of the commands executed
+        within it, as soon as it is received. Chunks are not aligned to line boundaries and
+        include the result trailer printed by cleartool.
+
+        If *stream* is *True* chunks are discarded once passed to *callback*, so that commands
+        with large outputs run in constant memory; sub-commands then return an empty output.
+        Streaming takes precedence over :py:meth:`.raw`.
+        
+        """
+        old = self._watcher, self._streaming
+        self._watcher, self._streaming = callback, stream
+        try:
+            yield self
+        finally:
+            self._watcher, self._streaming = old
+
+    @contextlib.contextmanager
+    def raw(self):
+        r"""
+        Context manager within which sub-commands return their output as a :py:class:`memoryview`
+        over the bytes received from cleartool, without decoding or copying it. Only the end of
+        the output is searched for the result trailer, so this mode is well suited to commands
+        that produce large outputs. The :py:meth:`.pwd` and :py:meth:`.watch` methods are not
+        affected.
+        
+        """
+        old = self._raw
+        self._raw = True
+        try:
+            yield self
+        finally:
+            self._raw = old
+
+    def close(self):
+        r"""Terminate the interpreter process."""
+        popen = getattr(self.cmd, "popen", None)
+        if popen is not None and popen.poll() is None:
+            try:
+                popen.kill()
+                popen.wait()
+            except OSError:
+                pass
+
+    @property
+    def alive(self):
+        r"""*True* unless the interpreter process is known to have terminated."""
+        popen = getattr(self.cmd, "popen", None)
+        return popen is None or popen.poll() is None
+
+    def probe(self, timeout=5.0):
+        r"""
+        Check that the interpreter answers a trivial command within *timeout* seconds. Return
+        *True* if it does; otherwise restart it, if possible, and return *False*.
+        
+        """
+        if not self.alive:
+            if self._factory is not None:
+                self.restart()
+            return False
+        try:
+            with self.limit(timeout):
+                self._run("pwd", raw=False)
+            return True
+        except ( Cancelled, SessionBusy, SessionDied ):
+            return False
+
+    def restart(self):
+        r"""
+        Terminate the interpreter process, interrupting any command being executed, and start a
+        new one.
+        
+        """
+        if self._factory is None:
+            raise ClearToolError("No factory available to restart the interpreter")
+        self.close()
+        self.cmd = self._factory()
+        self.cmd.setLog(self._log)
+        self._pending = None
+        self._replay()
+
+    def _abandon(self, cmd, tail):
+        r"""
+        Deal with command *cmd* being interrupted, *tail* being the end of the output received.
+        The interpreter is restarted if possible, otherwise the command is remembered so that its
+        remaining output is discarded before the next command is executed.
+
+        """
+        if self._factory is not None:
+            self.restart()
+        elif self.alive:
+            self._pending = ( cmd, tail )
+
+    def _resync(self, cmd):
+        r"""
+        Discard the output of an abandoned command, if complete; raise :py:exc:`.SessionBusy` if
+        it is still running.
+
+        """
+        pending, tail = self._pending
+        popen = self.cmd.popen
+        while True:
+            out = popen.recv(self._raw_read_size)
+            popen.recv_err(self._raw_read_size)
+            if out is None:
+                self._pending = None
+                return
+            if not out:
+                self._pending = ( pending, tail )
+                raise SessionBusy(cmd, pending)
+            text = tail + out
+            if self._result_re.search(text):
+                self._pending = None
+                return
+            tail = text[-64:]
+
+    def _replay(self):
+        r"""
+        Restore the current directory of a restarted session. The current activity is a property
+        of the view and needs not be restored. The command is executed directly, as admission may
+        be held by the command that was interrupted; if it fails the local state is discarded.
+        
+        """
+        cd, cwd = self._cd, self._cwd
+        target = cwd if cwd is not None else cd
+        if not target:
+            return
+        deadline, token, watcher = self._deadline, self._token, self._watcher
+        self._deadline, self._token, self._watcher = None, None, None
+        self._cd, self._cwd = None, None
+        try:
+            self._execute("cd " + _quoted(target))
+            self._cd, self._cwd = cd, cwd
+        except ( ClearToolError, nxpy.command.error.TimeoutError ):
+            self._clearState()
+        finally:
+            self._deadline, self._token, self._watcher = deadline, token, watcher
 
     def _run(self, parser, **kwargs):
         if isinstance(parser, nxpy.command.option.Parser):
             cmd = parser.getCommandLine()
         else:
             cmd = parser
+        execute = self._execute
+        if kwargs.pop("raw", self._raw) and sys.platform != "win32" and not self._streaming:
+            execute = self._execute_raw
+        if self._call is not None:
+            execute = self._call.wrap(execute)
+        attempts = 1
+        if kwargs.pop("readonly", False):
+            attempts += self.retries
+            if self.stall:
+                kwargs.setdefault("timeout", self.stall)
+        if not self.alive and self._factory is not None:
+            self.restart()
+        if self._pending is not None:
+            self._resync(cmd)
+        watcher = self._watcher
+        for attempt in range(attempts):
+            relay = None
+            if watcher is not None and attempts > 1:
+                relay = self._watcher = _Relay(watcher)
+            try:
+                if self.admission is not None:
+                    vob = self._admit(cmd)
+                    try:
+                        return execute(cmd, **kwargs)
+                    finally:
+                        self.admission.release(vob)
+                return execute(cmd, **kwargs)
+            except ( SessionDied, nxpy.command.error.TimeoutError ):
+                # Output already passed on to the watcher cannot be taken back
+                if attempt + 1 == attempts or self._factory is None or ( relay and relay.used ):
+                    raise
+            finally:
+                self._watcher = watcher
+
+    def _admit(self, cmd):
+        r"""
+        Wait for the admission of *cmd*, for no longer than the current deadline allows and until
+        the current token is cancelled. Return the VOB it was admitted on.
+
+        """
+        timeout = -1
+        if self._deadline is not None:
+            left = max(self._deadline - time.time(), 0)
+            default = self.admission.timeout
+            timeout = left if default is None or default < 0 else min(default, left)
+        vob = self.admission.vobOf(cmd, self._cwd)
+        try:
+            self.admission.acquire(vob, cmd, timeout, self._token)
+        except Cancelled:
+            raise
+        except ClearToolError:
+            self._check(cmd)
+            raise
+        return vob
+
+    def commandLine(self, name, *args, **options):
+        r"""
+        Return the command line that the *name* method would execute with *args* and *options*,
+        validating them as the method would, without executing it.
+
+        """
+        return commands[name].build(args, options)
+
+    def _check(self, cmd):
+        if self._token is not None and self._token.cancelled:
+            raise Cancelled(cmd)
+        if self._deadline is not None and time.time() > self._deadline:
+            raise DeadlineExceeded(cmd)
+
+    def _execute_raw(self, cmd, timeout=0, interval=0.01, raise_on_error=True, **kwargs):
+        r"""
+        Execute *cmd* reading the interpreter's output directly from its pipes. Return a
+        :py:class:`memoryview` over the output, the contents of standard error as :py:class:`bytes`
+        and the command line.
+        
+        """
+        self._check(cmd)
+        popen = self.cmd.popen
+        out = bytearray()
+        err = bytearray()
+        streams = { popen.stdout.fileno(): out, popen.stderr.fileno(): err }
+        self.cmd.send_cmd(cmd)
+        last = time.time()
+        try:
+            while True:
+                self._check(cmd)
+                ready = select.select(list(streams.keys()), [], [], interval)[0]
+                now = time.time()
+                if not ready:
+                    if timeout and now - last > timeout:
+                        raise nxpy.command.error.TimeoutError(bytes(err))
+                    continue
+                last = now
+                start = len(out)
+                for fd in ready:
+                    data = os.read(fd, self._raw_read_size)
+                    if not data:
+                        raise SessionDied(cmd)
+                    streams[fd].extend(data)
+                if len(out) > start:
+                    m = self._raw_result_re.search(out, max(0, start - 64))
+                    if m:
+                        break
+        except ( Cancelled, SessionDied, nxpy.command.error.TimeoutError ):
+            self._abandon(cmd, bytes(out[-64:]).decode("utf-8", "replace"))
+            raise
+        if raise_on_error and err:
+            raise FailedCommand(cmd, err=err.decode("utf-8", "replace"))
+        return memoryview(out)[:m.start()], bytes(err), cmd
+
+    def _execute(self, cmd, **kwargs):
         raise_on_failure = False
         try:
             raise_on_failure = kwargs["raise_on_failure"]
             del kwargs["raise_on_failure"]
         except KeyError:
             pass
+        self._check(cmd)
         try:
-            kwargs["cond"] = nxpy.command.interpreter.RegexpWaiter(self._result_re,
-                    nxpy.command.interpreter.EXP_OUT)
-            out, err = self.cmd.run(cmd, **kwargs)
+            waiter = _ResultWaiter(self._result_re, cmd, self._deadline, self._token,
+                    self._watcher, getattr(self.cmd, "popen", None))
+            kwargs["cond"] = waiter
+            try:
+                if self._streaming:
+                    out, err = self._stream(cmd, **kwargs)
+                else:
+                    out, err = self.cmd.run(cmd, **kwargs)
+            except ( Cancelled, SessionDied, nxpy.command.error.TimeoutError ):
+                self._abandon(cmd, waiter.tail)
+                raise
             if raise_on_failure:
                 err_code = ClearTool._result_re.search(out).group(1)
                 if err_code > 0:
                     raise FailedCommand(cmd, err_code=err_code)
             return ClearTool._result_re.sub("", out), err, cmd
+        except FailedCommand:
+            raise
         except nxpy.command.interpreter.BadCommand:
             e = sys.exc_info()[1]
             raise FailedCommand(e.command, err=e.stderr)
 
+    def _stream(self, cmd, cond, timeout=0, retries=0, interval=0.01, quantum=0.01,
+            raise_on_error=True, log=None):
+        r"""
+        Execute *cmd* as :py:meth:`.command.interpreter.BaseInterpreter.run` does, except that
+        output is only passed to *cond*, which keeps track of its end, and is then discarded.
+        Return the result trailer in place of the output, together with standard error.
+
+        """
+        self.cmd.send_cmd(cmd, log=log)
+        popen = self.cmd.popen
+        err_list = []
+        timer = nxpy.command.interpreter.Timer(timeout, retries, interval, quantum)
+        while not timer.expired():
+            out = popen.recv(self._raw_read_size)
+            err = popen.recv_err()
+            if err:
+                err_list.append(err)
+            m = cond(out, err)
+            if m:
+                break
+            if out or err:
+                timer.reset()
+                t = timer.quantum
+            else:
+                t = timer.getInterval()
+            if t > 0:
+                time.sleep(t)
+        else:
+            raise nxpy.command.error.TimeoutError("".join(err_list))
+        err = "".join(err_list)
+        if raise_on_error and err:
+            raise nxpy.command.interpreter.BadCommand(cmd, err)
+        return m.group(0), err
+
 # The cleartool sub-commands
 
+    @_recorded
     def cd(self, dir_=""):
+        r"""
+        Change the current directory. Changing to the directory known to be the current one
+        doesn't execute any command. Paths that contain spaces must be quoted; if *dir_* isn't a
+        single path the current directory becomes unknown.
+        
+        """
+        dest = None
+        path = _plain_path(dir_)
+        if path:
+            if os.path.isabs(path):
+                dest = os.path.normpath(path)
+            elif self._cwd is not None:
+                dest = os.path.normpath(os.path.join(self._cwd, path))
+            if dest is not None and dest == self._cwd:
+                return
+        elif self._cd == "":
+            return
         self._run("cd " + dir_)
+        self._activities.pop("", None)
+        self._cview = None
+        self._cd = dest if dir_ else ""
+        self._cwd = dest
+
+    @_recorded
+    def execute(self, cmd, **kwargs):
+        r"""
+        Execute command line *cmd* as is and return its output, the contents of standard error and
+        the command line. *kwargs* are passed on to the interpreter, e.g. *timeout* or
+        *raise_on_error*; *readonly=True* allows retries as for read-only sub-commands.
 
-    def checkin(self, *elements, **options):
-        if not elements:
-            raise InvalidArgument("At least one element must be specified")
-        op = nxpy.command.option.Parser(_config, "checkin", elements, options, comment="", 
-                identical=False)
-        return self._run(op)[0]
-
-    def checkout(self, *elements, **options):
-        if not elements:
-            raise InvalidArgument(
-                    "At least one element must be specified")
-        op = nxpy.command.option.Parser(_config, "checkout -nq", elements, options, comment="")
-        return self._run(op)[0]
-
-    def deliver(self, **options):
-        op = nxpy.command.option.Parser(_config, "deliver", (), options, activities=(), cact=False,
-                long=False, preview=False, short=False, stream="", target="",
-                to="")
-        op.checkExclusiveOptions("activities", "cact")
-        op.checkExclusiveOptions("long", "short")
-        return self._run(op, raise_on_error=False)
-
-    def describe(self, *args, **options):
-        op = nxpy.command.option.Parser(_config, "describe", args, options, fmt="", short=False)
-        op.checkExclusiveOptions("fmt", "short")
-        return self._run(op)[0]
+        """
+        return self._run(cmd, **kwargs)
 
+    @_recorded
     def get(self, dest, src):
-        op = nxpy.command.option.Parser(_config, "get -to", ( dest, src ), {})
-        return self._run(op)[0]
+        return self._run(commands["get"].build(( dest, src ), {}))[0]
 
+    @_recorded
     def ln(self, dest, *src, **options):
         r"""Note: Arguments are inverted with respect to the original command, beware!"""
-        args = src + (dest, )
-        op = nxpy.command.option.Parser(_config, "ln", args, options, checkout=True, comment=False, 
-                slink=True)
-        return self._run(op)[0]
-
-    def ls(self, *files, **options):
-        op = nxpy.command.option.Parser(_config, "ls", files, options, nxn=True, short=True, 
-                visible=False, vob_only=False)
-        return self._run(op)[0]
-    
-    def lsactivity(self, *activities, **options):
-        r"""
-        Note: *fmt=r"%[versions]p\n"* causes a race condition with activities that have a large
-        number of contribuents.
+        return self._run(commands["ln"].build(src + ( dest, ), options))[0]
 
-        """
-        op = nxpy.command.option.Parser(_config, "lsactivity", activities, options, cact=False, 
-                fmt="", long=False, me=False, short=False, in_stream="", 
-                user="", view="")
-        op.checkExclusiveOptions("in_stream", "cact", "user", "me")
-        op.checkExclusiveOptions("fmt", "long", "short")
-        return self._run(op, interval=0.1)[0]
-    
+    @_recorded
     def lshistory(self, obj, **options):
-        op = nxpy.command.option.Parser(_config, "lshistory", ( obj, ), options, all=False, 
-                eventid=False, fmt="", long=False, nco=False, recurse=False)
-        op.checkExclusiveOptions("fmt", "long")
-        op.checkExclusiveOptions("all", "nco")
-        return self._run(op)[0]
-
-    def lsproject(self, **options):
-        op = nxpy.command.option.Parser(_config, "lsproject", (), options, cview=False, view="", 
-                invob="", fmt="")
-        op.checkExactlyOneOption("cview", "view", "invob")
-        return self._run(op)[0]
-
-    def lsstream(self, **options):
-        op = nxpy.command.option.Parser(_config, "lsstream", (), options, view="", proj="", 
-                invob="", fmt="")
-        op.checkExclusiveOptions("view", "proj", "invob")
-        return self._run(op)[0]
+        return self._run(commands["lshistory"].build(( obj, ), options), readonly=True)[0]
 
+    @_recorded
     def lsview(self, *tags, **options):
-        op = nxpy.command.option.Parser(_config, "lsview", [ "\'%s\'" % (t) for t in tags ],
-                options, cview=False, short=False)
-        op.checkNotBothOptsAndArgs("cview")
-        return self._run(op)[0]
-
-    def lsvob(self):
-        op = nxpy.command.option.Parser(_config, "lsvob", (), {})
-        return self._run(op)[0]
-
+        r"""The result of *lsview(cview=True)* is remembered until the current directory changes."""
+        cmd = commands["lsview"].build([ "\'%s\'" % (t) for t in tags ], options)
+        cview = options == { "cview": True }
+        if cview and self._cview is not None:
+            return self._cview
+        out = self._run(cmd, readonly=True)[0]
+        if cview and not self._raw:
+            self._cview = out
+        return out
+
+    @_recorded
     def mv(self, dest, *src, **options):
         r"""Note: Arguments are inverted with respect to the original command, beware!"""
-        args = src + (dest, )
-        op = nxpy.command.option.Parser(_config, "mv", args, options, comment="")
-        return self._run(op)[0]
+        return self._run(commands["mv"].build(src + ( dest, ), options))[0]
 
+    @_recorded
     def pwd(self):
-        return self._run("pwd")[0].strip()
+        r"""Return the current directory, executing a command only if it isn't known."""
+        if self._cwd is None:
+            self._cwd = self._run("pwd", raw=False)[0].strip()
+        return self._cwd
 
-    def rmname(self, *args, **options):
-        op = nxpy.command.option.Parser(_config, "rmname", args, options, checkout=True, comment="")
-        return self._run(op)[0]
-        
+    @_recorded
     def setactivity(self, activity, **options):
+        r"""Setting the activity known to be the current one doesn't execute any command."""
         if activity:
             args = ( activity, )
         else:
             args = ()
             options["none"] = True
-        op = nxpy.command.option.Parser(_config, "setactivity", args, options, none=False, view="")
-        op.checkOneBetweenOptsAndArgs("none")
-        return self._run(op)[0]
-
-    def uncheckout(self, *elements, **options):
-        op = nxpy.command.option.Parser(_config, "uncheckout", elements, options, keep=False)
-        return self._run(op)[0]
-
-    def update(self, **options):
-        op = nxpy.command.option.Parser(_config, "update", (), options, print_report=False,
-                force=False, nolog=False, log="")
-        op.checkExclusiveOptions("log", "nolog")
-        return self._run(op, raise_on_error=False, timeout=300, interval=0.5, quantum=0.5)[0]
+        cmd = commands["setactivity"].build(args, options)
+        view = options.get("view", "")
+        try:
+            current, out = self._activities[view]
+            if current == activity:
+                return out
+        except KeyError:
+            pass
+        out = self._run(cmd)[0]
+        self._activities[view] = ( activity, out )
+        return out
+
+
+def _generate(spec):
+    r"""Create the :py:class:`.ClearTool` method for the sub-command described by *spec*."""
+    def method(self, *args, **options):
+        result = self._run(spec.build(args, options), readonly=spec.readonly, **spec.run)
+        return result if spec.full else result[0]
+    method.__name__ = spec.name
+    method.__doc__ = spec.doc
+    return _recorded(method)
+
+
+for _spec in commands.values():
+    if _spec.name not in ClearTool.__dict__:
+        setattr(ClearTool, _spec.name, _generate(_spec))
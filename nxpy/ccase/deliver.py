@@ -0,0 +1,135 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Concurrent deliver previews for all the streams of a UCM project.
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import re
+import sys
+import time
+
+
+_activity_re = re.compile(r"^\s*(activity:\S+)")
+_version_re = re.compile(r"^\s*(\S.*@@\S*)\s*$")
+_from_re = re.compile(r"^\s*FROM: stream \"([^\"]*)\"")
+_to_re = re.compile(r"^\s*TO: stream \"([^\"]*)\"")
+_error_re = re.compile(r"^cleartool: Error: (.*)$")
+_quoted_re = re.compile(r"\"([^\"]*)\"")
+
+
+class DeliverReport(object):
+    r"""The outcome of a deliver preview for a single stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        r"""The selector of the source stream."""
+        self.source = None
+        r"""The name of the source stream, as reported by cleartool."""
+        self.target = None
+        r"""The name of the target stream, as reported by cleartool."""
+        self.activities = collections.OrderedDict()
+        r"""Pending activities, mapped to the list of versions in their change sets."""
+        self.conflicts = []
+        r"""
+        Elements that need attention: those with versions in more than one pending activity and
+        those mentioned in error messages, e.g. because they are checked out.
+
+        """
+        self.errors = []
+        r"""Error messages reported by cleartool."""
+        self.elapsed = None
+        r"""Duration of the preview in seconds."""
+        self.exception = None
+        r"""The exception raised by the preview, if any."""
+
+    @property
+    def pending(self):
+        r"""*True* if there are activities to deliver."""
+        return bool(self.activities)
+
+    def __repr__(self):
+        return "<DeliverReport %s: %d activities, %d conflicts, %d errors>" % ( self.stream,
+                len(self.activities), len(self.conflicts), len(self.errors))
+
+
+def parse_preview(report, out, err):
+    r"""Fill *report*, a :py:class:`.DeliverReport`, from the output of *deliver -preview -long*."""
+    current = None
+    for line in out.splitlines():
+        m = _activity_re.match(line)
+        if m:
+            current = report.activities.setdefault(m.group(1), [])
+            continue
+        m = _version_re.match(line)
+        if m and current is not None:
+            current.append(m.group(1))
+            continue
+        m = _from_re.match(line)
+        if m:
+            report.source = m.group(1)
+            continue
+        m = _to_re.match(line)
+        if m:
+            report.target = m.group(1)
+    elements = collections.OrderedDict()
+    for act, versions in report.activities.items():
+        for v in versions:
+            elements.setdefault(v.split("@@")[0], set()).add(act)
+    conflicts = [ e for e, acts in elements.items() if len(acts) > 1 ]
+    for line in err.splitlines():
+        m = _error_re.match(line)
+        if m:
+            report.errors.append(m.group(1))
+            conflicts.extend(q for q in _quoted_re.findall(m.group(1)) if q not in conflicts)
+    report.conflicts = conflicts
+    return report
+
+
+def preview(tool, stream, **options):
+    r"""
+    Run a deliver preview from *stream* by means of *tool*, a :py:class:`.ClearTool`, and return
+    a :py:class:`.DeliverReport`. *options* are passed on to :py:meth:`.ClearTool.deliver`. Failures
+    are recorded in the report rather than raised.
+
+    """
+    report = DeliverReport(stream)
+    start = time.time()
+    try:
+        out, err = tool.deliver(preview=True, long=True, stream=stream, **options)[:2]
+        parse_preview(report, out, err)
+    except Exception:
+        report.exception = sys.exc_info()[1]
+    report.elapsed = time.time() - start
+    return report
+
+
+def project_streams(tool, project):
+    r"""Return the selectors of the streams of *project*, except its integration stream."""
+    integration = tool.describe(project, fmt=r"%[istream]Xp").strip()
+    return [ s for s in tool.lsstream(proj=project, fmt=r"%Xn\n").splitlines()
+            if s and s != integration ]
+
+
+def preview_project(pool, project, streams=None, done=None, **options):
+    r"""
+    Run deliver previews for the streams of *project* concurrently, on the sessions of *pool*, a
+    :py:class:`.pool.SessionPool`. *streams* defaults to all the streams of the project except the
+    integration stream. *done* is called with each :py:class:`.DeliverReport` as soon as it is
+    available. Return the list of reports, in stream order.
+
+    """
+    if streams is None:
+        with pool.session() as tool:
+            streams = project_streams(tool, project)
+    return pool.map(lambda tool, stream: preview(tool, stream, **options), streams, done)
@@ -0,0 +1,288 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Streaming export of history events and activities to JSON Lines or CSV files.
+
+The work is split in shards, e.g. one per VOB or per branch, which are exported concurrently on
+the sessions of a :py:class:`.pool.SessionPool`. Records are written as cleartool produces them.
+Each shard run produces a new file in the output directory; a state file records for each shard
+a cursor, the time of the most recent record exported, so that later runs only export newer
+records. A shard's file only appears, and its cursor only moves, when the shard completes.
+
+Run as a program with *python -m nxpy.ccase.export*; use *--help* for a list of options.
+
+"""
+
+from __future__ import absolute_import
+
+import argparse
+import bz2
+import collections
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import threading
+
+import six
+
+import nxpy.ccase.changeset
+import nxpy.ccase.cleartool
+import nxpy.ccase.pool
+
+
+HISTORY = "history"
+ACTIVITIES = "activities"
+
+Shard = collections.namedtuple("Shard", ( "name", "pname", "options" ))
+Shard.__doc__ = r"""
+A unit of export work: its *name*, the *pname* passed to the listing command and the additional
+*options* for it.
+
+"""
+
+_kinds = {
+    HISTORY: ( r"%Nd\t%u\t%o\t%En\t%Vn\n",
+            ( "shard", "time", "user", "operation", "element", "branch", "version" ) ),
+    ACTIVITIES: ( r"%Nd\t%u\t%Xn\t%[stream]Xp\t%[headline]p\n",
+            ( "shard", "time", "user", "activity", "stream", "headline" ) ),
+}
+
+_months = ( "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec" )
+
+_openers = { None: io.open, "gz": gzip.open, "bz2": bz2.BZ2File }
+
+_state_file = "export-state.json"
+
+
+def since(date):
+    r"""Convert a *%Nd* formatted date, e.g. *20190312.154512*, to a *-since* argument."""
+    y, m, d, hh, mm, ss = nxpy.ccase.changeset.date_fields(date)
+    return "%02d-%s-%04d.%02d:%02d:%02d" % ( d, _months[m - 1], y, hh, mm, ss )
+
+
+def iso_time(date):
+    r"""Convert a *%Nd* formatted date to ISO 8601 format."""
+    return "%04d-%02d-%02dT%02d:%02d:%02d" % nxpy.ccase.changeset.date_fields(date)
+
+
+def history_shards(tool, vobs=(), branches=()):
+    r"""
+    Return the shards that export the history of *vobs*, or of all the VOBs listed by *tool* if
+    none is specified; if *branches* are given there is one shard per VOB and branch type.
+
+    """
+    vobs = list(vobs) or [ v for v in tool.lsvob(short=True).splitlines() if v ]
+    if not branches:
+        return [ Shard(v, v, { "all": True }) for v in vobs ]
+    return [ Shard(v + ":" + b, v, { "all": True, "branch": b }) for v in vobs for b in branches ]
+
+
+def activity_shards(vobs=(), streams=()):
+    r"""Return the shards that export the activities in project *vobs* and in *streams*."""
+    return ( [ Shard(v, None, { "invob": v }) for v in vobs ] +
+            [ Shard(s, None, { "in_stream": s }) for s in streams ] )
+
+
+def _parse_history(shard, fields):
+    if len(fields) != 5:
+        return None
+    date, user, operation, element, version = fields
+    return ( shard, date, user, operation, element, version.rpartition("/")[0], version )
+
+
+def _parse_activity(shard, fields):
+    if len(fields) < 5:
+        return None
+    return ( shard, fields[0], fields[1], fields[2], fields[3], "\t".join(fields[4:]) )
+
+
+class _JsonWriter(object):
+    def __init__(self, file_, columns):
+        self.file = file_
+        self.columns = columns
+
+    def write(self, values):
+        rec = dict(zip(self.columns, values))
+        rec["time"] = iso_time(rec["time"])
+        line = json.dumps(rec, ensure_ascii=False, sort_keys=True) + u"\n"
+        self.file.write(line.encode("utf-8"))
+
+
+class _CsvWriter(object):
+    def __init__(self, file_, columns):
+        self.file = file_
+        self.write(columns, header=True)
+
+    def write(self, values, header=False):
+        if not header:
+            values = ( values[0], iso_time(values[1]) ) + tuple(values[2:])
+        if six.PY2:
+            buf = io.BytesIO()
+            csv.writer(buf, lineterminator="\n").writerow([ v.encode("utf-8")
+                    if isinstance(v, six.text_type) else v for v in values ])
+            self.file.write(buf.getvalue())
+        else:
+            buf = io.StringIO()
+            csv.writer(buf, lineterminator="\n").writerow(values)
+            self.file.write(buf.getvalue().encode("utf-8"))
+
+
+_writers = { "jsonl": _JsonWriter, "csv": _CsvWriter }
+
+
+class Exporter(object):
+    r"""
+    Exports records of *kind*, either :py:data:`.HISTORY` or :py:data:`.ACTIVITIES`, to the
+    *output* directory in *format_*, either *"jsonl"* or *"csv"*, optionally compressed with
+    *compress*, either *"gz"* or *"bz2"*.
+
+    """
+    def __init__(self, output, kind=HISTORY, format_="jsonl", compress=None):
+        if kind not in _kinds:
+            raise ValueError("%s: unknown kind of record" % kind)
+        if format_ not in _writers:
+            raise ValueError("%s: unknown format" % format_)
+        if compress not in _openers:
+            raise ValueError("%s: unknown compression" % compress)
+        self.output = output
+        self.kind = kind
+        self.format = format_
+        self.compress = compress
+        self.fmt, self.columns = _kinds[kind]
+        self._parse = _parse_history if kind == HISTORY else _parse_activity
+        self._lock = threading.Lock()
+        if not os.path.isdir(output):
+            os.makedirs(output)
+        self.state_path = os.path.join(output, _state_file)
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with io.open(self.state_path, encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def cursor(self, shard):
+        r"""Return the *%Nd* time of the most recent record exported for *shard*, or *None*."""
+        return self.state.get(self._key(shard), {}).get("cursor")
+
+    def _key(self, shard):
+        return self.kind + ":" + shard.name
+
+    def _path(self, shard, seq):
+        name = re.sub(r"[^\w.-]+", "_", shard.name).strip("_")
+        path = os.path.join(self.output, "%s-%s-%05d.%s" % ( self.kind, name, seq, self.format ))
+        return path + "." + self.compress if self.compress else path
+
+    def _save(self):
+        tmp = self.state_path + ".tmp"
+        with io.open(tmp, "w", encoding="utf-8") as f:
+            f.write(six.text_type(json.dumps(self.state, sort_keys=True, indent=1)))
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        os.rename(tmp, self.state_path)
+
+    def export(self, tool, shard):
+        r"""
+        Export the records of *shard* newer than its cursor by means of *tool*, a
+        :py:class:`.ClearTool`. Return the number of records written.
+
+        """
+        key = self._key(shard)
+        with self._lock:
+            entry = dict(self.state.get(key, { "cursor": None, "seq": 0 }))
+        cursor = entry["cursor"]
+        path = self._path(shard, entry["seq"] + 1)
+        part = path + ".part"
+        opener = _openers[self.compress]
+        counts = [ 0, cursor ]
+        with opener(part, "wb") as f:
+            writer = _writers[self.format](f, self.columns)
+
+            def feed(line):
+                rec = self._parse(shard.name, line.split("\t"))
+                if rec is None or ( cursor is not None and rec[1] <= cursor ):
+                    return
+                writer.write(rec)
+                counts[0] += 1
+                if counts[1] is None or rec[1] > counts[1]:
+                    counts[1] = rec[1]
+
+            watcher = nxpy.ccase.cleartool.LineWatcher(feed)
+            with tool.watch(watcher, stream=True):
+                if self.kind == HISTORY:
+                    options = dict(shard.options)
+                    if cursor is not None:
+                        options["since"] = since(cursor)
+                    tool.lshistory(shard.pname, fmt=self.fmt, **options)
+                else:
+                    tool.lsactivity(fmt=self.fmt, **shard.options)
+            watcher.flush()
+        if counts[0]:
+            os.rename(part, path)
+            entry["seq"] += 1
+        else:
+            os.remove(part)
+        entry["cursor"] = counts[1]
+        with self._lock:
+            self.state[key] = entry
+            self._save()
+        return counts[0]
+
+    def run(self, pool, shards, done=None):
+        r"""
+        Export *shards* concurrently on the sessions of *pool*, a :py:class:`.pool.SessionPool`.
+        *done* is called with each shard and its record count as soon as the shard completes.
+        Return the list of record counts, in shard order.
+
+        """
+        def task(tool, shard):
+            return shard, self.export(tool, shard)
+        results = pool.map(task, shards, None if done is None else lambda r: done(*r))
+        return [ r[1] for r in results ]
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="python -m nxpy.ccase.export",
+            description="Export ClearCase history or activities to JSON Lines or CSV files.")
+    parser.add_argument("kind", choices=( HISTORY, ACTIVITIES ))
+    parser.add_argument("output", help="output directory")
+    parser.add_argument("--format", choices=sorted(_writers), default="jsonl")
+    parser.add_argument("--compress", choices=( "gz", "bz2" ))
+    parser.add_argument("--vob", action="append", default=[],
+            help="VOB to export, may be repeated; history defaults to all VOBs")
+    parser.add_argument("--branch", action="append", default=[],
+            help="shard history by branch type, may be repeated")
+    parser.add_argument("--stream", action="append", default=[],
+            help="stream whose activities should be exported, may be repeated")
+    parser.add_argument("--sessions", type=int, default=4, help="number of cleartool sessions")
+    return parser
+
+
+def main(argv=None, factory=None):
+    r"""Command line entry point. *factory* is passed on to :py:class:`.pool.SessionPool`."""
+    args = _parser().parse_args(argv)
+    exporter = Exporter(args.output, args.kind, args.format, args.compress)
+    with nxpy.ccase.pool.SessionPool(args.sessions, factory) as pool:
+        if args.kind == HISTORY:
+            with pool.session() as tool:
+                shards = history_shards(tool, args.vob, args.branch)
+        else:
+            shards = activity_shards(args.vob, args.stream)
+
+        def done(shard, count):
+            sys.stderr.write("%s: %d records\n" % ( shard.name, count ))
+        exporter.run(pool, shards, done)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Compact, column oriented store for large numbers of history events.
+
+Events are kept in :py:mod:`array` columns, one entry per event; strings that repeat across
+events, such as users, operations, elements and branches, are stored once and referred to by
+integer identifiers.
+
+"""
+
+from __future__ import absolute_import
+
+import array
+import collections
+
+import six
+
+import nxpy.ccase.changeset
+import nxpy.ccase.cleartool
+
+
+Event = collections.namedtuple("Event", ( "time", "user", "operation", "element", "branch",
+        "version" ))
+Event.__doc__ = r"""
+A history event: its *time* in seconds since the epoch, the *user* who caused it, the *operation*,
+e.g. *checkin* or *mkbranch*, the *element* path, the *branch* and the *version* number, which is
+-1 for events that don't concern a numbered version.
+
+"""
+
+
+fmt = r"%Nd\t%u\t%o\t%En\t%Vn\n"
+r"""The *lshistory* format understood by :py:meth:`.HistoryStore.feed`."""
+
+_strings = ( "user", "operation", "element", "branch" )
+_columns = ( "time", ) + _strings + ( "version", )
+
+
+class _Strings(object):
+    r"""Assigns consecutive integer identifiers to strings."""
+
+    def __init__(self):
+        self.values = []
+        self.ids = {}
+
+    def intern(self, value):
+        try:
+            return self.ids[value]
+        except KeyError:
+            self.ids[value] = len(self.values)
+            self.values.append(value)
+            return self.ids[value]
+
+
+class HistoryStore(object):
+    r"""
+    Holds history events in columns. *time* is an array of doubles, *version* an array of
+    integers, while the *user*, *operation*, *element* and *branch* columns hold integer
+    identifiers of strings stored once per column. Events are added with :py:meth:`.append` or
+    :py:meth:`.feed`, one *lshistory* output line at a time.
+
+    """
+    def __init__(self):
+        self._columns = { "time": array.array("d"), "version": array.array("i") }
+        self._tables = {}
+        for name in _strings:
+            self._columns[name] = array.array("i")
+            self._tables[name] = _Strings()
+
+    def append(self, time_, user, operation, element, version):
+        r"""
+        Add an event. *version* is a version identifier, e.g. */main/dev/3*, from which branch and
+        version number are extracted.
+
+        """
+        branch, sep, number = version.rpartition("/")
+        c = self._columns
+        t = self._tables
+        c["time"].append(time_)
+        c["user"].append(t["user"].intern(user))
+        c["operation"].append(t["operation"].intern(operation))
+        c["element"].append(t["element"].intern(element))
+        c["branch"].append(t["branch"].intern(branch))
+        c["version"].append(int(number) if number.isdigit() else -1)
+
+    def feed(self, line):
+        r"""
+        Add the event described by *line*, formatted according to :py:data:`.fmt`. Return *False*
+        if *line* doesn't describe an event.
+
+        """
+        fields = line.rstrip("\r\n").split("\t")
+        if len(fields) != 5:
+            return False
+        try:
+            t = nxpy.ccase.changeset.parse_time(fields[0])
+        except ValueError:
+            return False
+        self.append(t, fields[1], fields[2], fields[3], fields[4])
+        return True
+
+    def load(self, tool, obj, **options):
+        r"""
+        Add the history of *obj* obtained by means of *tool*, a :py:class:`.ClearTool`, parsing the
+        output of :py:meth:`.ClearTool.lshistory` as it arrives. *options* are passed on to
+        :py:meth:`.ClearTool.lshistory`. Return the number of events added.
+
+        """
+        before = len(self)
+        watcher = nxpy.ccase.cleartool.LineWatcher(self.feed)
+        with tool.watch(watcher, stream=True):
+            tool.lshistory(obj, fmt=fmt, **options)
+        watcher.flush()
+        return len(self) - before
+
+    def __len__(self):
+        return len(self._columns["time"])
+
+    def __getitem__(self, row):
+        c = self._columns
+        values = [ c["time"][row] ]
+        for name in _strings:
+            values.append(self._tables[name].values[c[name][row]])
+        values.append(c["version"][row])
+        return Event(*values)
+
+    def __iter__(self):
+        for i in six.moves.range(len(self)):
+            yield self[i]
+
+    def column(self, name):
+        r"""Return the :py:mod:`array` that holds column *name*."""
+        return self._columns[name]
+
+    def values(self, name):
+        r"""Return the list of strings referred to by the identifiers in column *name*."""
+        return self._tables[name].values
+
+    def select(self, since=None, until=None, **criteria):
+        r"""
+        Return an :py:mod:`array` of the indices of the events that happened between *since*
+        included and *until* excluded and match all the *criteria*. These are keyword arguments
+        named after the string columns, whose value is either a string or a collection of strings.
+
+        """
+        tests = []
+        for name, value in criteria.items():
+            if name not in self._tables:
+                raise ValueError("%s: unknown column" % name)
+            if isinstance(value, six.string_types):
+                value = ( value, )
+            ids = self._tables[name].ids
+            tests.append(( self._columns[name], set(ids[v] for v in value if v in ids) ))
+        times = self._columns["time"]
+        rows = array.array("l")
+        for i in six.moves.range(len(times)):
+            t = times[i]
+            if since is not None and t < since or until is not None and t >= until:
+                continue
+            if all(col[i] in ids for col, ids in tests):
+                rows.append(i)
+        return rows
+
+    def groupBy(self, name, rows=None):
+        r"""
+        Return a dictionary that maps each value of column *name* to the :py:mod:`array` of the
+        indices of the events with that value, among *rows* if specified or among all the events.
+
+        """
+        col = self._columns[name]
+        groups = {}
+        for i in ( six.moves.range(len(col)) if rows is None else rows ):
+            try:
+                groups[col[i]].append(i)
+            except KeyError:
+                groups[col[i]] = array.array("l", ( i, ))
+        if name in self._tables:
+            values = self._tables[name].values
+            return dict(( values[k], v ) for k, v in groups.items())
+        return groups
+
+    def count(self, name, rows=None):
+        r"""Return a dictionary that maps each value of column *name* to its number of events."""
+        return dict(( k, len(v) ) for k, v in self.groupBy(name, rows).items())
@@ -0,0 +1,231 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Snapshots of the ClearCase infrastructure, i.e. VOBs, views, projects and streams, and the
+differences between them.
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import gzip
+import json
+import os
+import time
+
+
+VOBS = "vobs"
+VIEWS = "views"
+PROJECTS = "projects"
+STREAMS = "streams"
+
+Vob = collections.namedtuple("Vob", ( "tag", "storage", "mounted", "public", "attributes" ))
+Vob.__doc__ = r"""
+A VOB as listed by *lsvob*: its *tag*, *storage* path, whether it is *mounted* and *public* and
+its *attributes*, e.g. *"ucmvob"*, as a comma separated string.
+
+"""
+
+View = collections.namedtuple("View", ( "tag", "storage", "active" ))
+View.__doc__ = r"""A view as listed by *lsview*: its *tag*, *storage* path and if it's *active*."""
+
+Project = collections.namedtuple("Project", ( "name", "integration" ))
+Project.__doc__ = r"""A UCM project: its selector *name* and its *integration* stream selector."""
+
+Stream = collections.namedtuple("Stream", ( "name", "project" ))
+Stream.__doc__ = r"""A UCM stream: its selector *name* and its *project* selector."""
+
+_project_fmt = r"%Xn\t%[istream]Xp\n"
+_stream_fmt = r"%Xn\t%[project]Xp\n"
+
+_records = { VOBS: Vob, VIEWS: View, PROJECTS: Project, STREAMS: Stream }
+
+
+def parse_vobs(out):
+    r"""Return a list of :py:class:`.Vob` tuples parsed from default *lsvob* output."""
+    result = []
+    for line in out.splitlines():
+        words = line.split()
+        mounted = bool(words) and words[0] == "*"
+        if mounted:
+            words = words[1:]
+        if len(words) < 2:
+            continue
+        public = len(words) > 2 and words[2] == "public"
+        attributes = " ".join(words[3:]).strip("()")
+        result.append(Vob(words[0], words[1], mounted, public, attributes))
+    return result
+
+
+def parse_views(out):
+    r"""Return a list of :py:class:`.View` tuples parsed from default *lsview* output."""
+    result = []
+    for line in out.splitlines():
+        active = line.startswith("*")
+        words = line.lstrip("* ").split(None, 1)
+        if len(words) < 2:
+            continue
+        result.append(View(words[0], words[1].strip(), active))
+    return result
+
+
+def _parse_fields(out, record):
+    result = []
+    for line in out.splitlines():
+        fields = line.split("\t")
+        if len(fields) == len(record._fields):
+            result.append(record(*fields))
+    return result
+
+
+class Snapshot(object):
+    r"""
+    The state of the infrastructure at a given *time*. Each category, i.e. :py:data:`.VOBS`,
+    :py:data:`.VIEWS`, :py:data:`.PROJECTS` and :py:data:`.STREAMS`, is a dictionary that maps
+    tags or selectors to records.
+
+    """
+    _format_version = 1
+
+    def __init__(self, time_=None, **categories):
+        self.time = time_
+        r"""Time the snapshot was taken, in seconds since the epoch."""
+        self.categories = dict(( c, dict(categories.get(c, {})) ) for c in _records)
+
+    def __getitem__(self, category):
+        return self.categories[category]
+
+    @classmethod
+    def take(cls, tool, pvobs=()):
+        r"""
+        Take a snapshot by means of *tool*, a :py:class:`.ClearTool`. Projects and streams are
+        listed for each of the project VOBs in *pvobs*.
+
+        """
+        t = time.time()
+        vobs = parse_vobs(tool.lsvob())
+        views = parse_views(tool.lsview())
+        projects = []
+        streams = []
+        for pvob in pvobs:
+            projects.extend(_parse_fields(tool.lsproject(invob=pvob, fmt=_project_fmt), Project))
+            streams.extend(_parse_fields(tool.lsstream(invob=pvob, fmt=_stream_fmt), Stream))
+        return cls(t, vobs=( ( v.tag, v ) for v in vobs ), views=( ( v.tag, v ) for v in views ),
+                projects=( ( p.name, p ) for p in projects ),
+                streams=( ( s.name, s ) for s in streams ))
+
+    def save(self, path):
+        r"""Write the snapshot to *path* as gzip compressed JSON."""
+        data = { "version": self._format_version, "time": self.time }
+        for c, records in self.categories.items():
+            data[c] = [ list(r) for r in records.values() ]
+        with gzip.open(path, "wb") as f:
+            f.write(json.dumps(data, separators=( ",", ":" )).encode("utf-8"))
+
+    @classmethod
+    def load(cls, path):
+        r"""Read a snapshot written by :py:meth:`.save`."""
+        with gzip.open(path, "rb") as f:
+            data = json.loads(f.read().decode("utf-8"))
+        if data.get("version") != cls._format_version:
+            raise ValueError("%s: unsupported snapshot format" % path)
+        categories = {}
+        for c, record in _records.items():
+            categories[c] = [ ( r[0], record(*r) ) for r in data.get(c, ()) ]
+        return cls(data["time"], **categories)
+
+
+Change = collections.namedtuple("Change", ( "category", "key", "old", "new" ))
+Change.__doc__ = r"""
+A difference between two snapshots in *category* for the object identified by *key*: *old* is
+*None* for objects added and *new* is *None* for those removed.
+
+"""
+
+
+class Diff(object):
+    r"""The list of :py:class:`.Change` tuples between two snapshots."""
+
+    def __init__(self, changes):
+        self.changes = changes
+
+    def added(self, category):
+        r"""Return the records added to *category*."""
+        return [ c.new for c in self.changes if c.category == category and c.old is None ]
+
+    def removed(self, category):
+        r"""Return the records removed from *category*."""
+        return [ c.old for c in self.changes if c.category == category and c.new is None ]
+
+    def changed(self, category):
+        r"""Return the changes to records of *category* present in both snapshots."""
+        return [ c for c in self.changes if c.category == category and c.old and c.new ]
+
+    @property
+    def unmounted(self):
+        r"""Tags of the VOBs that were mounted and no longer are, or were removed."""
+        return [ c.key for c in self.changes if c.category == VOBS and c.old and c.old.mounted
+                and not ( c.new and c.new.mounted ) ]
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    __nonzero__ = __bool__
+
+
+def diff(old, new):
+    r"""Return the :py:class:`.Diff` between snapshots *old* and *new*."""
+    changes = []
+    for c in sorted(_records):
+        before = old[c]
+        after = new[c]
+        for key in sorted(set(before) | set(after)):
+            b = before.get(key)
+            a = after.get(key)
+            if a != b:
+                changes.append(Change(c, key, b, a))
+    return Diff(changes)
+
+
+class Inventory(object):
+    r"""
+    Polls the infrastructure by means of *tool*, a :py:class:`.ClearTool`, reporting only the
+    changes since the previous poll. If *path* is given the last snapshot is kept there, so that
+    changes are tracked across runs.
+
+    """
+    def __init__(self, tool, pvobs=(), path=None):
+        self.tool = tool
+        self.pvobs = list(pvobs)
+        self.path = path
+        self.last = None
+        r"""The most recent :py:class:`.Snapshot`."""
+        if path is not None and os.path.exists(path):
+            self.last = Snapshot.load(path)
+
+    def poll(self):
+        r"""
+        Take a new snapshot and return the :py:class:`.Diff` from the previous one; on the first
+        poll everything is reported as added.
+
+        """
+        current = Snapshot.take(self.tool, self.pvobs)
+        result = diff(self.last or Snapshot(), current)
+        self.last = current
+        if self.path is not None:
+            current.save(self.path)
+        return result
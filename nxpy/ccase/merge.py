@@ -0,0 +1,123 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Merge planning by means of *findmerge -print*, either serial or split among several sessions.
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import re
+import sys
+import threading
+
+import six
+from six.moves import queue
+
+import nxpy.ccase.cleartool
+import nxpy.ccase.walk
+
+
+MergeCandidate = collections.namedtuple("MergeCandidate", ( "path", "target", "source", "base",
+        "automatic" ))
+MergeCandidate.__doc__ = r"""
+An element that needs merging: its *path*, the *target* version in the current view, the *source*
+version to merge from, their common *base* version and whether the merge can be completed
+*automatic*-ally, as reported by *findmerge*.
+
+"""
+
+
+_needs_re = re.compile(r"^Needs Merge \"([^\"]*)\" \[(.*)\]\s*$")
+_to_re = re.compile(r"\bto (\S+)")
+_from_re = re.compile(r"\bfrom (\S+)")
+_base_re = re.compile(r"\bbase (?:also )?([^\s\)]+)")
+_error_re = re.compile(r"^cleartool: Error: (.*)$")
+
+
+def parse_line(line):
+    r"""Return the :py:class:`.MergeCandidate` described by *line*, or *None*."""
+    m = _needs_re.match(line)
+    if not m:
+        return None
+    path, detail = m.groups()
+    fields = []
+    for regexp in ( _to_re, _from_re, _base_re ):
+        f = regexp.search(detail)
+        fields.append(f.group(1) if f else None)
+    return MergeCandidate(path, fields[0], fields[1], fields[2], "(automatic)" in detail)
+
+
+def parse_findmerge(out):
+    r"""Return the list of :py:class:`.MergeCandidate` tuples in *findmerge -print* output."""
+    return [ c for c in ( parse_line(l) for l in out.splitlines() ) if c ]
+
+
+def plan(tool, *paths, **options):
+    r"""
+    Run *findmerge -print* on *paths* by means of *tool*, a :py:class:`.ClearTool`, and return the
+    list of :py:class:`.MergeCandidate` tuples found. *options* are passed on to
+    :py:meth:`.ClearTool.findmerge` and must include one of *ftag*, *fversion* or *flatest*. Raise
+    :py:exc:`.FailedCommand` if cleartool reports errors.
+
+    """
+    options.setdefault("print_report", True)
+    out, err, cmd = tool.findmerge(*paths, **options)
+    errors = [ m.group(1) for m in ( _error_re.match(l) for l in err.splitlines() ) if m ]
+    if errors:
+        raise nxpy.ccase.cleartool.FailedCommand(cmd, err=err)
+    return parse_findmerge(out)
+
+
+def parallel_plan(pool, root, **options):
+    r"""
+    Yield the :py:class:`.MergeCandidate` tuples for the tree below *root*, running
+    *findmerge -print* concurrently on the sessions of *pool*, a :py:class:`.pool.SessionPool`.
+    The work is split by subdirectory of *root*; *root* itself and the files it contains are
+    examined separately, by means of the *directory* option. Candidates are yielded as soon as
+    each subtree is complete. *options* are as for :py:func:`.plan`. If any subtree fails, the
+    first exception is raised after all the others are complete.
+
+    """
+    with pool.session() as tool:
+        entries = nxpy.ccase.walk.list_dir(tool, root)
+    subdirs = [ e.path for e in entries if e.directory and e.version is not None ]
+    files = [ e.path for e in entries if not e.directory and e.version is not None ]
+    tasks = [ None ] + subdirs
+    out = queue.Queue()
+    end = object()
+    errors = []
+
+    def task(tool, subtree):
+        if subtree is None:
+            return plan(tool, root, *files, directory=True, **options)
+        return plan(tool, subtree, **options)
+
+    def run():
+        try:
+            pool.map(task, tasks, out.put)
+        except Exception:
+            errors.append(sys.exc_info())
+        finally:
+            out.put(end)
+
+    t = threading.Thread(target=run)
+    t.daemon = True
+    t.start()
+    while True:
+        candidates = out.get()
+        if candidates is end:
+            break
+        for c in candidates:
+            yield c
+    t.join()
+    if errors:
+        six.reraise(*errors[0])
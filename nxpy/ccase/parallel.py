@@ -0,0 +1,214 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Parsing of large captured command outputs on all the available processors.
+
+A captured output file is split into chunks at record boundaries, i.e. where a line that doesn't
+start with white space follows a newline; chunks are parsed in separate processes and the
+results are merged in their original order. Parsers must be module level functions that take
+the text of a chunk and return a list of records, such as :py:func:`.history_long` and
+:py:func:`.activity_long`.
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import concurrent.futures
+import io
+import multiprocessing
+import os
+import re
+
+import six
+
+
+HistoryRecord = collections.namedtuple("HistoryRecord", ( "time", "user", "event", "name",
+        "comment" ))
+HistoryRecord.__doc__ = r"""
+An event from *lshistory -long* output: its *time* as reported, the login name of the *user*, the
+*event* description, e.g. *create version*, the *name* of the object and the *comment*.
+
+"""
+
+ActivityRecord = collections.namedtuple("ActivityRecord", ( "name", "time", "owner", "group",
+        "stream", "title", "versions" ))
+ActivityRecord.__doc__ = r"""
+An activity from *lsactivity -long* output: its *name*, creation *time* as reported, *owner*,
+*group*, *stream*, *title* and the list of change set *versions*.
+
+"""
+
+
+_chunk_size = 64 * 1024 * 1024
+_block_size = 64 * 1024
+_boundary_re = re.compile(br"\n(?=[^\s])")
+_login_re = re.compile(r"\(([^.@)]+)[^)]*\)\s*$")
+_event_re = re.compile(r"^\s*(.*?)\s*\"([^\"]*)\"")
+
+
+def split(path, chunk_size=_chunk_size):
+    r"""
+    Return a list of *(start, end)* byte offsets that divide the file at *path* into chunks of
+    about *chunk_size* bytes, each beginning at a record boundary.
+
+    """
+    size = os.path.getsize(path)
+    bounds = [ 0 ]
+    with io.open(path, "rb") as f:
+        pos = chunk_size
+        while pos < size:
+            f.seek(pos - 1)
+            found = None
+            carry = b""
+            while found is None:
+                block = f.read(_block_size)
+                if not block:
+                    break
+                data = carry + block
+                m = _boundary_re.search(data)
+                if m:
+                    found = f.tell() - len(data) + m.end()
+                carry = data[-1:]
+            if found is None:
+                break
+            bounds.append(found)
+            pos = found + chunk_size
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def records(text):
+    r"""Split *text* into records, each a list of lines, at lines not starting with white space."""
+    result = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if line[0].isspace() and result:
+            result[-1].append(line)
+        else:
+            result.append([ line ])
+    return result
+
+
+def history_long(text):
+    r"""
+    Parse *lshistory -long* output, where each event looks like::
+
+        2019-03-12T15:45:12+01:00   Nicola Musatti (nicola.users@host)
+          create version "src/a.c@@/main/3"
+          "The comment"
+
+    Return a list of :py:class:`.HistoryRecord` tuples.
+
+    """
+    result = []
+    for rec in records(text):
+        head = rec[0].split(None, 1)
+        m = _login_re.search(rec[0])
+        user = m.group(1) if m else ( head[1].strip() if len(head) > 1 else "" )
+        event = name = ""
+        comment = []
+        if len(rec) > 1:
+            m = _event_re.match(rec[1])
+            if m:
+                event, name = m.groups()
+            else:
+                event = rec[1].strip()
+            comment = [ l.strip().strip("\"") for l in rec[2:] ]
+        result.append(HistoryRecord(head[0], user, event, name, "\n".join(comment)))
+    return result
+
+
+def activity_long(text):
+    r"""
+    Parse *lsactivity -long* output, where each activity looks like::
+
+        activity "fix_1"
+          2019-03-12T15:45:12+01:00 by Nicola Musatti (nicola.users@host)
+          owner: nicola
+          group: users
+          stream: dev@\pvob
+          title: Fix a bug
+          change set versions:
+            src/a.c@@/main/dev/3
+
+    Return a list of :py:class:`.ActivityRecord` tuples.
+
+    """
+    result = []
+    for rec in records(text):
+        m = _event_re.match(rec[0])
+        name = m.group(2) if m else rec[0].strip()
+        fields = { "time": rec[1].split(None, 1)[0] if len(rec) > 1 else "" }
+        versions = []
+        in_versions = False
+        for line in rec[2:]:
+            key, sep, value = line.strip().partition(":")
+            if in_versions:
+                versions.append(line.strip())
+            elif key == "change set versions":
+                in_versions = True
+            elif sep:
+                fields[key] = value.strip()
+        result.append(ActivityRecord(name, fields["time"], fields.get("owner", ""),
+                fields.get("group", ""), fields.get("stream", ""), fields.get("title", ""),
+                versions))
+    return result
+
+
+def parse_chunk(path, start, end, parser):
+    r"""Return the records found by *parser* in the bytes from *start* to *end* of *path*."""
+    with io.open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return parser(data.decode("utf-8", "replace"))
+
+
+def parse_file(path, parser, workers=None, chunk_size=_chunk_size):
+    r"""
+    Yield the records found by *parser* in the file at *path*, in order, parsing chunks of about
+    *chunk_size* bytes concurrently in up to *workers* processes, by default one per processor.
+    No more than two chunks per process are parsed ahead of the records being consumed.
+
+    """
+    chunks = split(path, chunk_size)
+    if len(chunks) < 2 or workers == 1:
+        for start, end in chunks:
+            for r in parse_chunk(path, start, end, parser):
+                yield r
+        return
+    window = 2 * ( workers or multiprocessing.cpu_count() )
+    pending = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        for start, end in chunks:
+            pending.append(executor.submit(parse_chunk, path, start, end, parser))
+            if len(pending) == window:
+                for r in pending.popleft().result():
+                    yield r
+        while pending:
+            for r in pending.popleft().result():
+                yield r
+
+
+def capture(tool, path, name, *args, **options):
+    r"""
+    Write to *path* the output of the *name* sub-command executed with *args* and *options* by
+    *tool*, a :py:class:`.ClearTool`, in raw mode where available, so that the output needs not
+    be decoded. Return the number of bytes written.
+
+    """
+    with tool.raw():
+        out = getattr(tool, name)(*args, **options)
+    if isinstance(out, six.text_type):
+        out = out.encode("utf-8")
+    with io.open(path, "wb") as f:
+        f.write(out)
+    return len(out)
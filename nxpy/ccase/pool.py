@@ -0,0 +1,150 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+A pool of :py:class:`.ClearTool` sessions, for running cleartool commands concurrently.
+
+"""
+
+from __future__ import absolute_import
+
+import contextlib
+import sys
+import threading
+
+import six
+from six.moves import queue
+
+import nxpy.ccase.cleartool
+
+
+class SessionPool(object):
+    r"""
+    Holds up to *size* :py:class:`.ClearTool` instances, each driving its own cleartool process.
+    Sessions are created on demand and handed out to one thread at a time.
+
+    """
+    def __init__(self, size=4, factory=None):
+        r"""
+        *size* is the maximum number of sessions; *factory* is a callable that returns a new
+        :py:class:`.ClearTool` instance and defaults to the class itself.
+
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.factory = factory or nxpy.ccase.cleartool.ClearTool
+        self._idle = queue.LifoQueue()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        r"""
+        Return an idle session, creating one if the pool is not full, otherwise waiting at most
+        *timeout* seconds for one to be released. Raise :py:exc:`six.moves.queue.Empty` on timeout.
+
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._sessions) < self.size:
+                tool = self.factory()
+                self._sessions.append(tool)
+                return tool
+        return self._idle.get(timeout=timeout)
+
+    def acquireIdle(self, exclude=()):
+        r"""
+        Return an idle session not among those in *exclude*, without creating one or waiting, or
+        *None* if there is none.
+
+        """
+        with self._idle.mutex:
+            idle = self._idle.queue
+            for i in range(len(idle) - 1, -1, -1):
+                if not any(idle[i] is t for t in exclude):
+                    return idle.pop(i)
+        return None
+
+    def release(self, tool):
+        r"""Return *tool* to the pool."""
+        self._idle.put(tool)
+
+    @contextlib.contextmanager
+    def session(self, timeout=None):
+        r"""Context manager that acquires a session and releases it on exit."""
+        tool = self.acquire(timeout)
+        try:
+            yield tool
+        finally:
+            self.release(tool)
+
+    def map(self, func, items, done=None):
+        r"""
+        Call *func* with a session and each of *items*, running as many calls concurrently as
+        there are sessions. *done*, if given, is called with each result as soon as it is available;
+        calls to it are serialized. Return the list of results in the same order as *items*. If any
+        call raises an exception the first one is raised again after all the calls complete.
+
+        """
+        items = list(items)
+        results = [ None ] * len(items)
+        errors = []
+        work = queue.Queue()
+        for i in enumerate(items):
+            work.put(i)
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                try:
+                    i, item = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    with self.session() as tool:
+                        results[i] = func(tool, item)
+                except Exception:
+                    with lock:
+                        errors.append(sys.exc_info())
+                    continue
+                if done is not None:
+                    with lock:
+                        done(results[i])
+
+        threads = [ threading.Thread(target=worker) for i in range(min(self.size, len(items))) ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            six.reraise(*errors[0])
+        return results
+
+    @property
+    def sessions(self):
+        r"""The sessions created so far."""
+        with self._lock:
+            return list(self._sessions)
+
+    def close(self):
+        r"""Terminate all the sessions."""
+        with self._lock:
+            for tool in self._sessions:
+                tool.close()
+            self._sessions = []
+        self._idle = queue.LifoQueue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
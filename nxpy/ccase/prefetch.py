@@ -0,0 +1,276 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Speculative prefetching of the UCM objects returned by listing commands.
+
+Scripts often list objects and then query each of them in turn, e.g. they describe each of the
+activities listed by *lsactivity* or list the activities of each of the streams listed by
+*lsstream*. A :py:class:`.Prefetcher` executes those follow-up queries in the background on the
+spare sessions of a :py:class:`.pool.SessionPool` as soon as the listing is returned, so that the
+script's own calls are served from a short-lived cache.
+
+"""
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+from six.moves import queue
+
+import nxpy.ccase.cleartool
+
+
+_follow = {
+    "lsactivity": ( "activity", "describe" ),
+    "lsstream": ( "stream", "lsactivity" ),
+}
+
+_scopes = ( "in_stream", "invob", "proj" )
+
+
+def listed(out, options):
+    r"""
+    Return the names of the objects listed in *out*, the output of a listing command invoked with
+    *options*. Both the default and the *short* output formats are understood; nothing is
+    returned for custom formats.
+
+    """
+    if options.get("fmt") or options.get("long"):
+        return []
+    names = []
+    for line in out.splitlines():
+        words = line.split()
+        if options.get("short") and words:
+            names.append(words[0])
+        elif len(words) > 1:
+            names.append(words[1])
+    return names
+
+
+def selector(kind, name, options):
+    r"""
+    Return the selector of object *name* of type *kind*, e.g. *activity*, qualified with the
+    project VOB taken from the scope *options* of the command that listed it, or *None* if the
+    project VOB is unknown. Unqualified selectors are resolved against the current directory and
+    view, so their results may not be shared between sessions.
+
+    """
+    if ":" not in name.partition("@")[0]:
+        name = kind + ":" + name
+    if "@" in name:
+        return name
+    for o in _scopes:
+        scope = options.get(o) or ""
+        if scope and o == "invob":
+            return name + "@" + scope
+        if "@" in scope:
+            return name + "@" + scope.rpartition("@")[2]
+    return None
+
+
+class _Entry(object):
+    def __init__(self, expires):
+        self.expires = expires
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.started = False
+        self.claimed = False
+
+
+class _Batch(object):
+    def __init__(self):
+        self.work = queue.Queue()
+        self.workers = 1
+        self.lock = threading.Lock()
+
+
+class Prefetcher(object):
+    r"""
+    Wraps *tool*, a :py:class:`.ClearTool`, so that the objects listed by its *lsactivity* and
+    *lsstream* methods are prefetched on the sessions of *pool*, a :py:class:`.pool.SessionPool`:
+    activities are described and the activities of streams are listed. Prefetched results are
+    served to later calls with the same command line for *ttl* seconds after they were requested;
+    listings served this way are followed up in turn. Only objects whose project VOB is known,
+    from their name or from the scope of the listing, are prefetched. Commands that are not
+    read-only clear the cache.
+
+    Only sessions that are idle or that the pool may still create are used, so prefetching never
+    delays other users of the pool; at most *limit* objects are prefetched for each listing.
+    *options* maps the follow-up commands, i.e. *"describe"* and *"lsactivity"*, to the keyword
+    arguments to use for them: these must match those used by the script for its calls to be
+    served from the cache.
+
+    """
+    def __init__(self, tool, pool, ttl=30.0, limit=100, options=None):
+        self.tool = tool
+        self.pool = pool
+        self.ttl = ttl
+        self.limit = limit
+        self.options = dict(options or {})
+        self.prefetched = 0
+        r"""Number of follow-up commands executed in the background."""
+        self.hits = 0
+        r"""Number of calls served from prefetched results."""
+        self.misses = 0
+        r"""Number of read-only calls executed directly on *tool*."""
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._closed = False
+
+    def _followups(self, name, options, out):
+        kind, command = _follow[name]
+        opts = self.options.get(command, {})
+        result = []
+        for n in listed(out, options)[:self.limit]:
+            sel = selector(kind, n, options)
+            if sel is None:
+                continue
+            if command == "describe":
+                result.append(( command, ( sel, ), dict(opts) ))
+            else:
+                o = dict(opts)
+                o["in_stream"] = sel
+                result.append(( command, (), o ))
+        return result
+
+    def _key(self, name, args, kwargs):
+        spec = nxpy.ccase.cleartool.commands.get(name)
+        if spec is None or not spec.readonly:
+            return None
+        return self.tool.commandLine(name, *args, **kwargs)
+
+    def _purge(self, now):
+        for k, e in list(self._cache.items()):
+            if e.expires < now:
+                del self._cache[k]
+
+    def call(self, name, *args, **kwargs):
+        r"""Execute :py:class:`.ClearTool` method *name*, serving it from the cache if possible."""
+        key = self._key(name, args, kwargs)
+        if key is None:
+            with self._lock:
+                self._cache.clear()
+                self._generation += 1
+            return getattr(self.tool, name)(*args, **kwargs)
+        with self._lock:
+            self._purge(time.time())
+            entry = self._cache.pop(key, None)
+            if entry is not None and not entry.started:
+                entry.claimed = True
+                entry = None
+        if entry is not None:
+            entry.done.wait()
+            if entry.error is None:
+                with self._lock:
+                    self.hits += 1
+                out = entry.result
+            else:
+                entry = None
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            out = getattr(self.tool, name)(*args, **kwargs)
+        if name in _follow and not self._closed:
+            self._prefetch(self._followups(name, kwargs, out))
+        return out
+
+    def _prefetch(self, calls):
+        batch = _Batch()
+        with self._lock:
+            generation = self._generation
+            expires = time.time() + self.ttl
+            for name, args, kwargs in calls:
+                key = self.tool.commandLine(name, *args, **kwargs)
+                if key not in self._cache:
+                    entry = _Entry(expires)
+                    self._cache[key] = entry
+                    batch.work.put(( entry, key, name, args, kwargs ))
+        for i in range(min(self.pool.size, batch.work.qsize())):
+            try:
+                tool = self.pool.acquire(timeout=0)
+            except queue.Empty:
+                break
+            with batch.lock:
+                batch.workers += 1
+            t = threading.Thread(target=self._worker, args=( tool, batch, generation ))
+            t.daemon = True
+            t.start()
+        with batch.lock:
+            batch.workers -= 1
+            if batch.workers == 0:
+                self._drop(batch)
+
+    def _worker(self, tool, batch, generation):
+        try:
+            while not self._closed and generation == self._generation:
+                try:
+                    entry, key, name, args, kwargs = batch.work.get_nowait()
+                except queue.Empty:
+                    return
+                with self._lock:
+                    if entry.claimed:
+                        continue
+                    entry.started = True
+                try:
+                    entry.result = getattr(tool, name)(*args, **kwargs)
+                    with self._lock:
+                        self.prefetched += 1
+                except Exception as e:
+                    entry.error = e
+                entry.done.set()
+        finally:
+            self.pool.release(tool)
+            with batch.lock:
+                batch.workers -= 1
+                if batch.workers == 0:
+                    self._drop(batch)
+
+    def _drop(self, batch):
+        r"""Remove from the cache the entries of *batch* that no session will execute."""
+        while True:
+            try:
+                entry, key = batch.work.get_nowait()[:2]
+            except queue.Empty:
+                return
+            with self._lock:
+                if self._cache.get(key) is entry:
+                    del self._cache[key]
+            entry.error = nxpy.ccase.cleartool.ClearToolError("not prefetched")
+            entry.done.set()
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not hasattr(nxpy.ccase.cleartool.ClearTool, name):
+            raise AttributeError(name)
+        if name not in nxpy.ccase.cleartool.commands:
+            return getattr(self.tool, name)
+        def call(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+    def clear(self):
+        r"""Discard all cached and pending results."""
+        with self._lock:
+            self._cache.clear()
+            self._generation += 1
+
+    def close(self):
+        r"""Stop prefetching; *tool* and *pool* are left open."""
+        self._closed = True
+        self.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
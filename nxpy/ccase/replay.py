@@ -0,0 +1,267 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Capture of :py:class:`.ClearTool` workloads and their replay.
+
+A :py:class:`.Recorder` writes a trace file with one JSON record per line for each sub-command
+call made by the :py:class:`.ClearTool` instances attached to it. A :py:class:`.Replayer` reads
+the trace and executes the same calls, with their original timing or at a scaled rate, against
+real cleartool sessions or against the fake one provided by :py:mod:`.test.fake`.
+
+"""
+
+from __future__ import absolute_import
+
+import io
+import json
+import re
+import sys
+import threading
+import time
+
+import six
+
+
+def _text(data):
+    if data is None or isinstance(data, six.text_type):
+        return data
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return data.decode("utf-8", "replace")
+
+
+class _Call(object):
+    r"""A sub-command call being recorded."""
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.commands = []
+
+    def wrap(self, execute):
+        def run(cmd, **kwargs):
+            start = time.time()
+            rec = { "cmd": cmd, "t": self.recorder.offset(start) }
+            self.commands.append(rec)
+            try:
+                result = execute(cmd, **kwargs)
+            except Exception:
+                e = sys.exc_info()[1]
+                rec["error"] = repr(e)
+                rec["elapsed"] = time.time() - start
+                if self.recorder.outputs:
+                    rec["out"] = u""
+                    rec["err"] = _text(getattr(e, "stderr", None)) or u""
+                raise
+            rec["elapsed"] = time.time() - start
+            if self.recorder.outputs:
+                rec["out"] = _text(result[0])
+                rec["err"] = _text(result[1])
+            return result
+        return run
+
+
+class Recorder(object):
+    r"""Writes a trace of the calls made by the :py:class:`.ClearTool` instances attached to it."""
+
+    def __init__(self, dest, outputs=True):
+        r"""
+        *dest* is either a path or a text file-like object; *outputs* tells whether command
+        output should be included in the trace.
+
+        """
+        if isinstance(dest, six.string_types):
+            self.file = io.open(dest, "w", encoding="utf-8")
+            self._own = True
+        else:
+            self.file = dest
+            self._own = False
+        self.outputs = outputs
+        self.start = time.time()
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def offset(self, t):
+        r"""Convert time *t* to an offset from the start of the recording."""
+        return t - self.start
+
+    def attach(self, tool):
+        r"""Start recording the calls made through *tool*, which is returned."""
+        tool.recorder = self
+        return tool
+
+    def _session(self, tool):
+        with self._lock:
+            return self._sessions.setdefault(id(tool), len(self._sessions))
+
+    def call(self, tool, func, args, kwargs):
+        r"""Execute *func*, a :py:class:`.ClearTool` method, on *tool* and record the call."""
+        rec = { "session": self._session(tool), "method": func.__name__, "args": list(args),
+                "kwargs": kwargs }
+        call = _Call(self)
+        tool._call = call
+        start = time.time()
+        try:
+            return func(tool, *args, **kwargs)
+        except Exception:
+            rec["error"] = repr(sys.exc_info()[1])
+            raise
+        finally:
+            tool._call = None
+            rec["t"] = self.offset(start)
+            rec["elapsed"] = time.time() - start
+            rec["commands"] = call.commands
+            self._write(rec)
+
+    def _write(self, rec):
+        line = json.dumps(rec, default=repr, ensure_ascii=False)
+        with self._lock:
+            self.file.write(six.text_type(line) + u"\n")
+            self.file.flush()
+
+    def close(self):
+        r"""Close the trace file, if it was opened by the recorder."""
+        if self._own:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def percentile(values, p):
+    r"""Return the *p*-th percentile of *values*, with *p* between 0 and 100."""
+    values = sorted(values)
+    if not values:
+        return None
+    k = int(round(( len(values) - 1 ) * p / 100.0))
+    return values[k]
+
+
+class ReplayResult(object):
+    r"""The outcome of replaying a single call."""
+
+    def __init__(self, record, t, elapsed, error):
+        self.record = record
+        r"""The trace record."""
+        self.t = t
+        r"""Start offset of the replayed call."""
+        self.elapsed = elapsed
+        r"""Duration of the replayed call."""
+        self.error = error
+        r"""Exception raised by the replayed call, if any."""
+
+
+class ReplayReport(object):
+    r"""The outcome of a replay."""
+
+    def __init__(self, results, duration):
+        self.results = results
+        r"""List of :py:class:`.ReplayResult` instances, ordered by start time."""
+        self.duration = duration
+        r"""Total duration of the replay."""
+
+    def summary(self):
+        r"""Return a dictionary of latency statistics for the original and the replayed calls."""
+        original = [ r.record["elapsed"] for r in self.results ]
+        replayed = [ r.elapsed for r in self.results ]
+        s = { "calls": len(self.results), "duration": self.duration,
+                "errors": sum(1 for r in self.results if r.error is not None) }
+        for p in ( 50, 90, 99 ):
+            s["original_p%d" % p] = percentile(original, p)
+            s["replayed_p%d" % p] = percentile(replayed, p)
+        return s
+
+
+class Replayer(object):
+    r"""Replays a trace written by a :py:class:`.Recorder`."""
+
+    def __init__(self, source):
+        r"""*source* is either a path or an iterable of trace lines."""
+        if isinstance(source, six.string_types):
+            with io.open(source, encoding="utf-8") as f:
+                lines = f.readlines()
+        else:
+            lines = source
+        self.records = sorted(( json.loads(l) for l in lines if l.strip() ),
+                key=lambda r: r["t"])
+
+    def sessions(self):
+        r"""Return a dictionary that maps each session identifier to its records."""
+        sessions = {}
+        for r in self.records:
+            sessions.setdefault(r["session"], []).append(r)
+        return sessions
+
+    def rules(self, timing=True):
+        r"""
+        Return a list of rules for :py:class:`.test.fake.FakeEnv` which reproduce the recorded
+        outputs and, if *timing* is *True*, the recorded durations.
+
+        """
+        rules = []
+        seen = set()
+        for r in self.records:
+            for c in r["commands"]:
+                if c["cmd"] in seen or "out" not in c:
+                    continue
+                seen.add(c["cmd"])
+                rule = { "match": "^" + re.escape(c["cmd"]) + "$", "out": c["out"],
+                        "err": c["err"], "status": 1 if "error" in c else 0 }
+                if timing:
+                    rule["delay"] = c["elapsed"]
+                rules.append(rule)
+        return rules
+
+    def replay(self, factory, rate=1.0, commands=False):
+        r"""
+        Replay the trace, using a separate :py:class:`.ClearTool` returned by *factory* for each
+        recorded session. Calls are started at their original offsets divided by *rate*, or as
+        soon as possible if *rate* is zero. If *commands* is *True* the recorded command lines
+        are executed instead of the recorded method calls. Return a :py:class:`.ReplayReport`.
+
+        """
+        results = []
+        lock = threading.Lock()
+        start = time.time()
+
+        def play(records):
+            tool = factory()
+            try:
+                for r in records:
+                    if rate:
+                        delay = start + r["t"] / rate - time.time()
+                        if delay > 0:
+                            time.sleep(delay)
+                    t = time.time()
+                    error = None
+                    try:
+                        if commands:
+                            for c in r["commands"]:
+                                tool.execute(c["cmd"])
+                        else:
+                            getattr(tool, r["method"])(*r["args"], **r["kwargs"])
+                    except Exception:
+                        error = sys.exc_info()[1]
+                    res = ReplayResult(r, t - start, time.time() - t, error)
+                    with lock:
+                        results.append(res)
+            finally:
+                tool.close()
+
+        threads = [ threading.Thread(target=play, args=( records, ))
+                for records in self.sessions().values() ]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        results.sort(key=lambda r: r.t)
+        return ReplayReport(results, time.time() - start)
@@ -0,0 +1,212 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Routing of cleartool commands to sessions dedicated to specific views.
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import contextlib
+import os.path
+import re
+import sys
+import threading
+import time
+
+import nxpy.ccase.cleartool
+
+
+def default_root(tag):
+    r"""Return the root directory of dynamic view *tag* on the current platform."""
+    if sys.platform == "win32":
+        return "M:\\" + tag
+    return "/view/" + tag
+
+
+_default_root_re = re.compile(r"^(?:/view/([^/]+)|[Mm]:\\([^\\]+))")
+
+
+def _accepts_view(method):
+    spec = nxpy.ccase.cleartool.commands.get(method)
+    return spec is not None and any(o == "view" for o, d in spec.defaults)
+
+
+class _Entry(object):
+    def __init__(self, tool, root):
+        self.tool = tool
+        self.root = root
+        self.lock = threading.Lock()
+        self.users = 0
+        self.used = time.time()
+
+
+class ViewRouter(object):
+    r"""
+    Keeps a warm :py:class:`.ClearTool` session for each view tag, already positioned in the
+    view's root directory, and routes each call to the session of the view it refers to. At most
+    *max_views* sessions are kept; when a new one is needed the least recently used idle session is
+    closed. This bounds the memory used by the router, as each session is a separate cleartool
+    process of roughly constant size: rather than measuring memory, choose *max_views* as the
+    memory budget divided by the size of one process.
+
+    Sub-commands invoked on the router are routed according to their *view* keyword argument, if
+    present, or to the view whose root contains their first positional argument. The *view*
+    argument is passed on only to sub-commands that support it. Calls that cannot be routed raise
+    :py:exc:`.cleartool.InvalidArgument`; use :py:meth:`.session` to address a view explicitly.
+
+    """
+    def __init__(self, roots={}, factory=None, max_views=8, resolver=default_root):
+        r"""
+        *roots* maps view tags to their root directories; roots for other tags are computed by
+        *resolver*. *factory* is a callable that returns a new :py:class:`.ClearTool`.
+        *max_views* is the maximum number of sessions, i.e. of cleartool processes, kept at once.
+
+        """
+        self.roots = dict(roots)
+        self.factory = factory or nxpy.ccase.cleartool.ClearTool
+        self.max_views = max_views
+        self.resolver = resolver
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Condition()
+
+    def root(self, tag):
+        r"""Return the root directory of view *tag*."""
+        try:
+            return self.roots[tag]
+        except KeyError:
+            return self.resolver(tag)
+
+    def viewOf(self, path):
+        r"""
+        Return the tag of the view whose root contains *path*, or *None*. With the default
+        resolver paths below */view/<tag>* or *M:\\<tag>* are recognized for any tag.
+
+        """
+        path = os.path.normpath(path)
+        best = None
+        for tag, root in list(self.roots.items()) + [ ( t, e.root ) for t, e in
+                list(self._entries.items()) ]:
+            root = os.path.normpath(root)
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                if best is None or len(root) > len(best[1]):
+                    best = ( tag, root )
+        if best is None and self.resolver is default_root:
+            m = _default_root_re.match(path)
+            if m:
+                return m.group(1) or m.group(2)
+        return best[0] if best else None
+
+    def _evict(self):
+        for tag, e in self._entries.items():
+            if e.users == 0:
+                del self._entries[tag]
+                if e.tool is not None:
+                    e.tool.close()
+                return True
+        return False
+
+    def _entry(self, tag):
+        with self._lock:
+            e = self._entries.get(tag)
+            if e is None:
+                while len(self._entries) >= self.max_views:
+                    if not self._evict():
+                        self._lock.wait()
+                e = _Entry(None, self.root(tag))
+                self._entries[tag] = e
+            else:
+                del self._entries[tag]
+                self._entries[tag] = e
+            e.users += 1
+        return e
+
+    def _done(self, e):
+        with self._lock:
+            e.users -= 1
+            e.used = time.time()
+            self._lock.notify_all()
+
+    @contextlib.contextmanager
+    def session(self, tag):
+        r"""
+        Context manager that yields the session of view *tag*, for the exclusive use of the
+        calling thread. The session is created if needed and changed to the view's root
+        directory.
+
+        """
+        e = self._entry(tag)
+        try:
+            with e.lock:
+                if e.tool is None:
+                    tool = self.factory()
+                    try:
+                        tool.cd(e.root)
+                    except Exception:
+                        tool.close()
+                        with self._lock:
+                            if self._entries.get(tag) is e:
+                                del self._entries[tag]
+                        raise
+                    e.tool = tool
+                yield e.tool
+        finally:
+            self._done(e)
+
+    def route(self, method, *args, **kwargs):
+        r"""Execute :py:class:`.ClearTool` *method* with the given arguments on the right view."""
+        tag = kwargs.get("view")
+        if tag and not _accepts_view(method):
+            del kwargs["view"]
+        if not tag and args:
+            tag = self.viewOf(args[0])
+        if not tag:
+            raise nxpy.ccase.cleartool.InvalidArgument(method + ": unable to determine the view")
+        with self.session(tag) as tool:
+            return getattr(tool, method)(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not hasattr(nxpy.ccase.cleartool.ClearTool, name):
+            raise AttributeError(name)
+        def call(*args, **kwargs):
+            return self.route(name, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+    @property
+    def views(self):
+        r"""The tags of the views that currently have a session, least recently used first."""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def evictIdle(self, max_idle):
+        r"""Close the sessions that have not been used for more than *max_idle* seconds."""
+        limit = time.time() - max_idle
+        with self._lock:
+            for tag, e in list(self._entries.items()):
+                if e.users == 0 and e.used < limit:
+                    del self._entries[tag]
+                    if e.tool is not None:
+                        e.tool.close()
+
+    def close(self):
+        r"""Close all the sessions."""
+        with self._lock:
+            for e in self._entries.values():
+                if e.tool is not None:
+                    e.tool.close()
+            self._entries.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,96 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Periodic health checks of the idle sessions in a :py:class:`.pool.SessionPool`.
+
+"""
+
+from __future__ import absolute_import
+
+import sys
+import threading
+
+
+class Supervisor(object):
+    r"""
+    Probes the idle sessions of *pool* every *interval* seconds by means of
+    :py:meth:`.ClearTool.probe`, so that dead or unresponsive interpreters are restarted before
+    they are handed out. Sessions in use are not disturbed.
+
+    """
+    def __init__(self, pool, interval=60.0, timeout=5.0):
+        r"""
+        *pool* is a :py:class:`.pool.SessionPool`; *timeout* is the time allowed to each session
+        to answer a probe.
+
+        """
+        self.pool = pool
+        self.interval = interval
+        self.timeout = timeout
+        self.probes = 0
+        r"""Number of probes performed."""
+        self.restarts = 0
+        r"""Number of probes that failed, causing the session to be restarted."""
+        self.error = None
+        r"""The last exception raised by a sweep in the background thread, if any."""
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sweep(self):
+        r"""
+        Probe each idle session once, taking a single session from the pool at a time. Return the
+        number of sessions restarted.
+
+        """
+        probed = []
+        restarted = 0
+        for i in range(len(self.pool.sessions)):
+            tool = self.pool.acquireIdle(probed)
+            if tool is None:
+                break
+            probed.append(tool)
+            try:
+                alive = tool.probe(self.timeout)
+            finally:
+                self.pool.release(tool)
+            self.probes += 1
+            if not alive:
+                restarted += 1
+                self.restarts += 1
+        return restarted
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception:
+                self.error = sys.exc_info()[1]
+
+    def start(self):
+        r"""Start probing in a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        r"""Stop probing and wait for the background thread to terminate."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,180 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+A scriptable stand-in for *cleartool -status*.
+
+When executed as a program this module reads commands from its standard input and answers them
+the way *cleartool -status* does, terminating each reply with a *Command N returned status S*
+trailer. Replies are taken from a JSON file containing a list of rules; each rule is a mapping with
+a *match* regular expression and optional *out*, *err*, *status*, *delay*, *chunks*,
+*chunk_delay* and *exit* entries. The first rule whose *match* is found in the command line is
+applied; commands that match no rule are echoed back with a status of 0. The *cd* and *pwd*
+commands are emulated unless a rule matches them. The *{cwd}* placeholder is replaced in replies
+with the current directory.
+
+:py:class:`.FakeEnv` takes care of writing the rules and creating :py:class:`.ClearTool` instances
+which drive the fake program.
+
+"""
+
+from __future__ import absolute_import
+
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+import nxpy.ccase.cleartool
+
+
+def _reply(out, err, status, count):
+    if err:
+        sys.stderr.write(err)
+        sys.stderr.flush()
+    if out:
+        sys.stdout.write(out)
+    sys.stdout.write("Command %d returned status %d\r\n" % ( count, status ))
+    sys.stdout.flush()
+
+
+def _find(rules, line):
+    for r in rules:
+        if re.search(r["match"], line):
+            return r
+    return None
+
+
+def main(argv=None):
+    r"""Run the fake interpreter loop."""
+    ap = argparse.ArgumentParser(description="Fake cleartool -status")
+    ap.add_argument("rules", nargs="?", default=None)
+    ap.add_argument("--log", default=None)
+    args = ap.parse_args(argv)
+    rules = []
+    if args.rules:
+        with io.open(args.rules, encoding="utf-8") as f:
+            rules = json.load(f)
+    home = os.getcwd()
+    cwd = home
+    count = 0
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        if line in ( "quit", "exit" ):
+            break
+        count += 1
+        if args.log:
+            with io.open(args.log, "a", encoding="utf-8") as f:
+                f.write(line + u"\n")
+        rule = _find(rules, line)
+        if rule is None:
+            words = line.split(None, 1)
+            if words[0] == "pwd":
+                _reply(cwd + "\n", "", 0, count)
+            elif words[0] == "cd":
+                dest = home
+                if len(words) > 1:
+                    dest = os.path.normpath(os.path.join(cwd, words[1].strip("\"")))
+                if os.path.isdir(dest):
+                    cwd = dest
+                    _reply("", "", 0, count)
+                else:
+                    _reply("", "cleartool: Error: Unable to change directory to \"%s\".\n" %
+                            words[1], 1, count)
+            else:
+                _reply(line + "\n", "", 0, count)
+            continue
+        if rule.get("delay"):
+            time.sleep(rule["delay"])
+        if rule.get("exit"):
+            sys.exit(1)
+        for c in rule.get("chunks", ()):
+            sys.stdout.write(c.replace("{cwd}", cwd))
+            sys.stdout.flush()
+            if rule.get("chunk_delay"):
+                time.sleep(rule["chunk_delay"])
+        _reply(rule.get("out", "").replace("{cwd}", cwd), rule.get("err", ""),
+                rule.get("status", 0), count)
+
+
+class FakeEnv(object):
+    r"""
+    Temporary setup for a fake *cleartool*. Use as a context manager, or call :py:meth:`.close`
+    to terminate the interpreters that were created.
+
+    """
+    def __init__(self, rules=()):
+        r"""*rules* is a list of reply rules, as described in the module documentation."""
+        self.dir = tempfile.mkdtemp(prefix="nxpy_ccase_")
+        self.rules_path = os.path.join(self.dir, "rules.json")
+        self.log_path = os.path.join(self.dir, "commands.log")
+        self.setRules(rules)
+        self.command_line = " ".join(( sys.executable, "-u", "-m", "nxpy.ccase.test.fake",
+                self.rules_path, "--log", self.log_path ))
+        self.interpreters = []
+
+    def setRules(self, rules):
+        r"""Replace the reply rules. Only interpreters created afterwards are affected."""
+        with io.open(self.rules_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(list(rules), ensure_ascii=False))
+
+    def interpreter(self):
+        r"""Start a fake interpreter."""
+        cmd = nxpy.ccase.cleartool.UnbufferedInterpreter(self.command_line)
+        self.interpreters.append(cmd)
+        return cmd
+
+    def tool(self, **kwargs):
+        r"""
+        Create a :py:class:`.ClearTool` driving a new fake interpreter, which is also able to
+        restart it.
+
+        """
+        kwargs.setdefault("factory", self.interpreter)
+        return nxpy.ccase.cleartool.ClearTool(cmd=self.interpreter(), **kwargs)
+
+    def commands(self):
+        r"""Return the list of command lines received so far by all the interpreters."""
+        try:
+            with io.open(self.log_path, encoding="utf-8") as f:
+                return f.read().splitlines()
+        except IOError:
+            return []
+
+    def close(self):
+        r"""Terminate all the interpreters and remove temporary files."""
+        for cmd in self.interpreters:
+            try:
+                cmd.popen.kill()
+                cmd.popen.wait()
+            except OSError:
+                pass
+        self.interpreters = []
+        for n in os.listdir(self.dir):
+            os.remove(os.path.join(self.dir, n))
+        os.rmdir(self.dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Concurrent update of many snapshot views, with progress reported while the updates run.
+
+"""
+
+from __future__ import absolute_import
+
+import re
+import sys
+import threading
+import time
+
+import nxpy.ccase.cleartool
+
+
+LOADED = "loaded"
+UNLOADED = "unloaded"
+HIJACKED = "hijacked"
+
+
+_events = (
+    ( LOADED, re.compile(r"^Loading \"([^\"]*)\"") ),
+    ( UNLOADED, re.compile(r"^Unloaded \"([^\"]*)\"") ),
+    ( HIJACKED, re.compile(r"^Keeping hijacked object \"([^\"]*)\"") ),
+)
+
+_log_re = re.compile(r"^Log has been written to \"([^\"]*)\"")
+
+
+class ViewUpdate(object):
+    r"""Summary of the update of a single view."""
+
+    def __init__(self, root):
+        self.root = root
+        r"""The view's root directory."""
+        self.loaded = []
+        r"""Paths of the objects loaded."""
+        self.unloaded = []
+        r"""Paths of the objects unloaded."""
+        self.hijacked = []
+        r"""Paths of the hijacked objects that were kept."""
+        self.log = None
+        r"""Path of the update log, if reported."""
+        self.start = None
+        r"""Start time, in seconds since the epoch."""
+        self.elapsed = None
+        r"""Duration of the update in seconds."""
+        self.error = None
+        r"""
+        Exception raised by the update, if it failed, or :py:exc:`.cleartool.FailedCommand` if
+        it reported errors.
+
+        """
+
+    @property
+    def ok(self):
+        r"""*True* if the update completed."""
+        return self.error is None and self.elapsed is not None
+
+    def __repr__(self):
+        return "<ViewUpdate %s: %d loaded, %d unloaded, %d hijacked, %s>" % ( self.root,
+                len(self.loaded), len(self.unloaded), len(self.hijacked),
+                "failed" if self.error else "%.1fs" % ( self.elapsed or 0 ))
+
+
+class UpdateParser(object):
+    r"""
+    Parses the report of an *update* command line by line, filling a :py:class:`.ViewUpdate`
+    and invoking *progress* with the view root, the event kind and the path for each object
+    loaded, unloaded or hijacked.
+
+    """
+    def __init__(self, summary, progress=None):
+        self.summary = summary
+        self.progress = progress
+
+    def __call__(self, line):
+        for kind, regexp in _events:
+            m = regexp.match(line)
+            if m:
+                getattr(self.summary, kind).append(m.group(1))
+                if self.progress:
+                    self.progress(self.summary.root, kind, m.group(1))
+                return
+        m = _log_re.match(line)
+        if m:
+            self.summary.log = m.group(1)
+
+
+def update_view(tool, root, progress=None, **options):
+    r"""
+    Update the snapshot view whose root directory is *root* by means of *tool*, a
+    :py:class:`.ClearTool`; *options* are as for :py:meth:`.ClearTool.update`. Return a
+    :py:class:`.ViewUpdate`; failures, including errors reported by cleartool, are recorded in it
+    rather than raised.
+
+    """
+    summary = ViewUpdate(root)
+    watcher = nxpy.ccase.cleartool.LineWatcher(UpdateParser(summary, progress))
+    summary.start = time.time()
+    try:
+        tool.cd(root)
+        cmd = tool.commandLine("update", **options)
+        with tool.watch(watcher):
+            out, err, cmd = tool.execute(cmd, **nxpy.ccase.cleartool.commands["update"].run)
+        watcher.flush()
+        summary.elapsed = time.time() - summary.start
+        errors = [ l for l in err.splitlines() if "Error:" in l ]
+        if errors:
+            summary.error = nxpy.ccase.cleartool.FailedCommand(cmd, err="\n".join(errors))
+    except Exception:
+        summary.error = sys.exc_info()[1]
+    return summary
+
+
+def update_views(pool, roots, progress=None, done=None, **options):
+    r"""
+    Update the snapshot views whose root directories are listed in *roots* concurrently, using
+    the sessions of *pool*, a :py:class:`.pool.SessionPool`, which thus bounds parallelism.
+    *progress* is invoked as described for :py:class:`.UpdateParser` and *done* with each
+    :py:class:`.ViewUpdate` as soon as the corresponding view is complete; calls to both are
+    serialized. Return the list of :py:class:`.ViewUpdate` instances, in the same order as
+    *roots*.
+
+    """
+    lock = threading.Lock()
+    if progress is not None:
+        report = progress
+        def progress(*args):
+            with lock:
+                report(*args)
+    return pool.map(lambda tool, root: update_view(tool, root, progress, **options), roots, done)
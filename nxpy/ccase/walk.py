@@ -0,0 +1,183 @@
+# nxpy.ccase package ---------------------------------------------------------
+
+# Copyright Nicola Musatti 2019
+# Use, modification, and distribution are subject to the Boost Software
+# License, Version 1.0. (See accompanying file LICENSE.txt or copy at
+# http://www.boost.org/LICENSE_1_0.txt)
+
+# See https://github.com/nmusatti/nxpy_ccase. --------------------------------
+
+r"""
+Recursive walk of VOB directory trees, either serial or split among several sessions.
+
+"""
+
+from __future__ import absolute_import
+
+import collections
+import os.path
+import re
+import sys
+import threading
+
+import six
+from six.moves import queue
+
+
+Entry = collections.namedtuple("Entry", ( "path", "kind", "version", "state", "directory" ))
+Entry.__doc__ = r"""
+An object found while walking a tree: its *path*, the *kind* reported by *ls -long*, e.g.
+*"version"* or *"view private object"*, its *version* if it is an element, its *state*, one of
+:py:data:`.CHECKEDOUT`, :py:data:`.HIJACKED`, :py:data:`.PRIVATE` or *None*, and whether it is a
+*directory*.
+
+"""
+
+CHECKEDOUT = "checkedout"
+HIJACKED = "hijacked"
+PRIVATE = "view-private"
+
+
+_line_re = re.compile(r"^(\S+(?: \S+)*?)\s{2,}(\S.*?)(?:\s+Rule: .*)?$")
+
+
+def parse_line(line, directory):
+    r"""
+    Parse a line of *ls -long* output for *directory*. Return an :py:class:`.Entry`, or *None*
+    if the line doesn't describe an object.
+
+    """
+    m = _line_re.match(line.rstrip())
+    if not m:
+        return None
+    kind, name = m.groups()
+    name = name.split(" --> ")[0]
+    version = None
+    state = None
+    if "@@" in name:
+        name, version = name.split("@@", 1)
+        if version.endswith("[hijacked]"):
+            version = version[:-len("[hijacked]")].rstrip()
+            state = HIJACKED
+        version = version.split(" ")[0]
+        if version.endswith("CHECKEDOUT"):
+            state = CHECKEDOUT
+    elif "private" in kind:
+        state = PRIVATE
+    path = os.path.join(directory, os.path.basename(name.rstrip("/\\")))
+    return Entry(path, kind, version, state, "directory" in kind)
+
+
+def list_dir(tool, directory):
+    r"""Return the list of :py:class:`.Entry` tuples for the contents of *directory*."""
+    out = tool.ls(directory, long=True, short=False, nxn=False)
+    return [ e for e in ( parse_line(l, directory) for l in out.splitlines() ) if e ]
+
+
+def walk(tool, root):
+    r"""
+    Yield an :py:class:`.Entry` for each object below *root*, listing one directory at a time
+    by means of *tool*, a :py:class:`.ClearTool`.
+
+    """
+    stack = [ root ]
+    while stack:
+        entries = list_dir(tool, stack.pop())
+        for e in entries:
+            yield e
+        stack.extend(reversed([ e.path for e in entries if e.directory ]))
+
+
+class _WorkQueue(object):
+    r"""
+    One double ended queue per worker: workers take their own most recently found directories
+    and steal the oldest ones from the others when they run out.
+
+    """
+    def __init__(self, workers):
+        self.deques = [ collections.deque() for i in range(workers) ]
+        self.cond = threading.Condition()
+        self.pending = 0
+        self.stopped = False
+
+    def push(self, worker, directory):
+        with self.cond:
+            self.deques[worker].append(directory)
+            self.pending += 1
+            self.cond.notify()
+
+    def pop(self, worker):
+        with self.cond:
+            while not self.stopped:
+                if self.deques[worker]:
+                    return self.deques[worker].pop()
+                for d in self.deques:
+                    if d:
+                        return d.popleft()
+                if self.pending == 0:
+                    return None
+                self.cond.wait()
+            return None
+
+    def done(self):
+        with self.cond:
+            self.pending -= 1
+            if self.pending == 0:
+                self.cond.notify_all()
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+
+
+def parallel_walk(pool, root):
+    r"""
+    Yield an :py:class:`.Entry` for each object below *root*, listing directories concurrently
+    on all the sessions of *pool*, a :py:class:`.pool.SessionPool`. Entries are yielded as soon as
+    they are available; the entries are the same as those produced by :py:func:`.walk`, but their
+    order differs.
+
+    """
+    work = _WorkQueue(pool.size)
+    out = queue.Queue()
+    end = object()
+    errors = []
+
+    def worker(i):
+        try:
+            with pool.session() as tool:
+                while True:
+                    directory = work.pop(i)
+                    if directory is None:
+                        break
+                    try:
+                        for e in list_dir(tool, directory):
+                            out.put(e)
+                            if e.directory:
+                                work.push(i, e.path)
+                    finally:
+                        work.done()
+        except Exception:
+            errors.append(sys.exc_info())
+            work.stop()
+        finally:
+            out.put(end)
+
+    work.push(0, root)
+    threads = [ threading.Thread(target=worker, args=( i, )) for i in range(pool.size) ]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    try:
+        running = len(threads)
+        while running:
+            e = out.get()
+            if e is end:
+                running -= 1
+            else:
+                yield e
+    finally:
+        work.stop()
+    if errors:
+        six.reraise(*errors[0])
@@ -54,10 +54,14 @@ setup(
     packages=['nxpy.ccase'],
     install_requires=[
         'six',
+        'futures; python_version < "3"',
         'nxpy_command',
         'nxpy_path',
         'nxpy_file',
         'nxpy_temp_file',
         'nxpy_test',
     ],
+    extras_require={
+        'analytics': ['numpy'],
+    },
 )